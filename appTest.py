@@ -1,7 +1,42 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
-import random
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from catalog import CATALOG_BACKEND, DATA_DIR, CatalogSource
+from comparison import (
+    COMPARISON_LIMIT,
+    WIDE_COMPARISON_LIMIT,
+    ComparisonCache,
+    ComparisonMatrix,
+    first_selected,
+    highlight_classes,
+    highlight_rows,
+    render_comparison_table,
+    render_wide_comparison_table,
+)
+from downsample import CHART_POINTS, downsampled_window
+from facets import FacetIndex, facet_label, range_selection
+from history import HISTORY_SEED, PRICE_WALK, simulated_history, today
+from pagination import page_controls, paginate
+from products import (
+    PRODUCT_CATALOG_DIR,
+    PRODUCT_SCHEMA,
+    PRODUCT_SORTS,
+    PRODUCT_SPECS,
+    ProductCatalog,
+    ProductSqliteCatalog,
+    product_source_records,
+    value_scores,
+)
+from profiling import Profiler, render_profiler_panel
+from similarity import SIMILAR_PRODUCTS, SimilarityIndex
+from sorting import SortOrders
+from sqlstore import SqlFacetIndex, SqlSortOrders, SqliteCatalog
+from theme import apply_theme
+from timeseries import PRICE_STORE_DIR, TimeSeriesStore
 
 # Configuração da página
 st.set_page_config(
@@ -11,264 +46,72 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS customizado para um design mais limpo
-st.markdown("""
-<style>
-/* Reset e base */
-.main > div {
-    padding-top: 2rem;
-}
-
-/* Header */
-.header-container {
-    background: white;
-    padding: 2rem 0 1rem 0;
-    border-bottom: 1px solid #e0e0e0;
-    margin-bottom: 2rem;
-}
-
-.header-title {
-    font-size: 2rem;
-    font-weight: 700;
-    color: #1a1a1a;
-    margin: 0;
-    text-align: center;
-}
-
-.header-subtitle {
-    font-size: 1rem;
-    color: #666;
-    text-align: center;
-    margin-top: 0.5rem;
-}
-
-/* Sidebar styling */
-.sidebar-header {
-    background: #f8f9fa;
-    padding: 1rem;
-    border-radius: 8px;
-    margin-bottom: 1rem;
-    border-left: 4px solid #007bff;
-}
-
-/* Product cards */
-.product-card {
-    background: white;
-    border: 1px solid #e0e0e0;
-    border-radius: 12px;
-    padding: 1.5rem;
-    margin-bottom: 1rem;
-    transition: all 0.3s ease;
-    box-shadow: 0 2px 4px rgba(0,0,0,0.08);
-}
-
-.product-card:hover {
-    box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-    transform: translateY(-2px);
-}
-
-.product-image {
-    width: 60px;
-    height: 60px;
-    background: #f8f9fa;
-    border-radius: 8px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 2rem;
-    margin-bottom: 1rem;
-}
-
-.product-name {
-    font-size: 1.1rem;
-    font-weight: 600;
-    color: #1a1a1a;
-    margin: 0.5rem 0;
-}
-
-.product-price {
-    font-size: 1.5rem;
-    font-weight: 700;
-    color: #007bff;
-    margin: 0.8rem 0;
-}
-
-.product-year {
-    font-size: 0.9rem;
-    color: #666;
-    margin-bottom: 1rem;
-}
-
-.add-button {
-    background: #007bff;
-    color: white;
-    border: none;
-    padding: 0.7rem 1rem;
-    border-radius: 6px;
-    width: 100%;
-    font-weight: 600;
-    cursor: pointer;
-    transition: background 0.3s ease;
-}
-
-.add-button:hover {
-    background: #0056b3;
-}
-
-.remove-button {
-    background: #dc3545;
-    color: white;
-    border: none;
-    padding: 0.7rem 1rem;
-    border-radius: 6px;
-    width: 100%;
-    font-weight: 600;
-    cursor: pointer;
-}
-
-/* Comparison section */
-.comparison-header {
-    background: #f8f9fa;
-    padding: 1.5rem;
-    border-radius: 8px;
-    margin-bottom: 2rem;
-    text-align: center;
-}
-
-.comparison-title {
-    font-size: 1.5rem;
-    font-weight: 600;
-    color: #1a1a1a;
-    margin: 0;
-}
-
-.spec-table {
-    background: white;
-    border-radius: 8px;
-    overflow: hidden;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-}
-
-.spec-row {
-    border-bottom: 1px solid #f0f0f0;
-    padding: 1rem;
-}
-
-.spec-row:last-child {
-    border-bottom: none;
-}
-
-.spec-label {
-    font-weight: 600;
-    color: #333;
-    padding: 0.5rem 0;
-}
-
-.best-price {
-    background: #d4edda;
-    color: #155724;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-.most-recent {
-    background: #cce7ff;
-    color: #004085;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-.premium {
-    background: #fff3cd;
-    color: #856404;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-/* Clear button */
-.clear-button {
-    background: #6c757d;
-    color: white;
-    border: none;
-    padding: 0.5rem 1rem;
-    border-radius: 4px;
-    font-size: 0.9rem;
-    cursor: pointer;
-    margin-top: 1rem;
-}
+# CSS customizado para um design mais limpo (static/style.css)
+apply_theme()
 
-/* Price history charts */
-.chart-container {
-    background: white;
-    padding: 1.5rem;
-    border-radius: 8px;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-    margin-bottom: 1rem;
-}
-
-.chart-title {
-    font-size: 1.1rem;
-    font-weight: 600;
-    margin-bottom: 1rem;
-    text-align: center;
-}
-
-.current-price {
-    font-size: 1.2rem;
-    font-weight: 700;
-    color: #007bff;
-    text-align: center;
-    margin-bottom: 0.5rem;
-}
-
-.price-trend {
-    font-size: 0.9rem;
-    text-align: center;
-    margin-bottom: 1rem;
-}
-
-.price-down {
-    color: #28a745;
-}
-
-.price-up {
-    color: #dc3545;
-}
-
-/* Recommendation cards */
-.recommendation-card {
-    padding: 1rem;
-    border-radius: 8px;
-    text-align: center;
-    margin-bottom: 1rem;
-}
-
-.rec-success {
-    background-color: #d4edda;
-    border: 1px solid #c3e6cb;
-    color: #155724;
-}
-
-.rec-info {
-    background-color: #d1ecf1;
-    border: 1px solid #bee5eb;
-    color: #0c5460;
-}
-
-.rec-warning {
-    background-color: #fff3cd;
-    border: 1px solid #ffeaa7;
-    color: #856404;
-}
-</style>
-""", unsafe_allow_html=True)
+# Arquivo de dados dos produtos (JSON, JSON lines, CSV ou Parquet); quando
+# existe, é a fonte do catálogo e é recarregado a quente sempre que muda
+PRODUCT_SOURCE = os.environ.get('PRODUCT_SOURCE', os.path.join(DATA_DIR, 'products.json'))
 
 # Base de dados dos produtos
-@st.cache_data
+@st.cache_resource
+def load_product_source():
+    """Catálogo colunar de produtos ligado ao arquivo de dados, compartilhado por todas as sessões"""
+    catalog_class = ProductSqliteCatalog if CATALOG_BACKEND == 'sqlite' else ProductCatalog
+    source = CatalogSource(
+        PRODUCT_CATALOG_DIR,
+        PRODUCT_SOURCE,
+        PRODUCT_SCHEMA,
+        lambda: product_source_records(product_seed_data()),
+        catalog_class,
+        convert=product_source_records
+    )
+    # Numa recarga, só as comparações com produtos alterados saem do cache
+    source.on_change(load_comparison_cache().invalidate)
+    return source
+
 def load_product_data():
+    """Catálogo de produtos atual (um stat do arquivo de dados por rerun)"""
+    return load_product_source().current()
+
+@st.cache_resource(max_entries=2)
+def load_product_facets(_product_data, version):
+    """Índice de categoria/marca e das faixas de preço/ano (bitmaps e valores ordenados, ou consultas SQL), construído uma vez por versão do catálogo"""
+    index_class = SqlFacetIndex if isinstance(_product_data, SqliteCatalog) else FacetIndex
+    return index_class.from_catalog(_product_data, ['category', 'brand'], ['price', 'year'])
+
+@st.cache_resource(max_entries=2)
+def load_product_orders(_product_data, version):
+    """Ordenações da lista de produtos, cada permutação montada uma vez por versão do catálogo (no SQLite, só as de chaves calculadas)"""
+    orders_class = SqlSortOrders if isinstance(_product_data, SqliteCatalog) else SortOrders
+    return orders_class(_product_data, {
+        'price': lambda: _product_data.column('price'),
+        'year': lambda: _product_data.column('year'),
+        'value': lambda: value_scores(_product_data),
+    })
+
+@st.cache_resource(max_entries=2)
+def load_similarity_index(_product_data, version):
+    """Índice de produtos semelhantes (kNN), aberto uma vez por versão do catálogo"""
+    return SimilarityIndex.from_catalog(_product_data)
+
+@st.cache_resource
+def load_comparison_cache():
+    """Cache de comparações compartilhado por todas as sessões do processo"""
+    return ComparisonCache()
+
+@st.cache_resource
+def load_profiler():
+    """Perfilador de reruns compartilhado por todas as sessões do processo"""
+    comparisons = load_comparison_cache()
+    profiler = Profiler()
+    profiler.watch('históricos', lambda: simulated_history.cache_info().hits)
+    profiler.watch('janelas', lambda: downsampled_window.cache_info().hits)
+    profiler.watch('comparações', lambda: comparisons.stats()['hits'])
+    return profiler
+
+def product_seed_data():
+    """Dados iniciais gravados no catálogo quando ele ainda não existe"""
     return {
         'iPhone 15 Pro Max': {
             'brand': 'Apple',
@@ -386,38 +229,27 @@ def load_product_data():
         }
     }
 
-def generate_price_history(current_price, months=6):
-    """Gera histórico de preços simulado"""
-    dates = []
-    prices = []
-    
-    start_date = datetime.now() - timedelta(days=months*30)
-    
-    # Começar com um preço um pouco mais alto
-    base_price = current_price * 1.15
-    
-    for i in range(months * 4):  # 4 pontos por mês
-        date = start_date + timedelta(days=i*7)  # A cada semana
-        
-        # Simular flutuação de preços com tendência de queda
-        variation = random.uniform(-0.08, 0.03)  # Mais chance de cair
-        base_price = base_price * (1 + variation)
-        
-        # Garantir que não fique muito abaixo do preço atual
-        if base_price < current_price * 0.85:
-            base_price = current_price * random.uniform(0.9, 1.1)
-            
-        dates.append(date.strftime('%d/%m'))
-        prices.append(max(base_price, current_price * 0.8))
-    
-    # Garantir que o último preço seja próximo ao atual
-    prices[-1] = current_price
-    
-    return dates, prices
+def generate_price_history(product_name, current_price, months=6, seed=HISTORY_SEED):
+    """Gera histórico de preços simulado (determinístico e memorizado por produto)"""
+    return simulated_history(product_name, current_price, months, seed, PRICE_WALK, today())
+
+@st.cache_resource
+def load_price_store():
+    """Armazenamento de observações reais de preços, compartilhado por todas as sessões"""
+    return TimeSeriesStore(PRICE_STORE_DIR)
 
-def create_price_chart_data(product_name, current_price):
+def create_price_chart_data(product_name, current_price, months=6, max_points=CHART_POINTS):
     """Cria dados para gráfico de histórico de preços usando Streamlit nativo"""
-    dates, prices = generate_price_history(current_price)
+    # Observações reais do produto têm prioridade sobre o histórico simulado
+    # (reduzidas a no máximo max_points pontos antes de chegar ao navegador)
+    store = load_price_store()
+    end = today() + timedelta(days=1)
+    start = end - timedelta(days=months * 30)
+    timestamps, prices = downsampled_window(store, product_name, start, end, max_points, store.version())
+    if len(prices):
+        dates = pd.to_datetime(timestamps)
+    else:
+        dates, prices = generate_price_history(product_name, current_price, months)
     
     # Calcular tendência
     price_change = (prices[-1] - prices[0]) / prices[0] * 100
@@ -432,7 +264,101 @@ def create_price_chart_data(product_name, current_price):
     
     return chart_data, trend_text, trend_class
 
+def compute_product_comparison(product_data, products):
+    """Tabela, recomendações e métricas de uma seleção de produtos
+
+    Os vencedores de cada recomendação são guardados com empates, para que
+    quem renderiza escolha o primeiro na ordem de seleção.
+    """
+    selected_idx = [product_data.index_of(product) for product in products]
+    selected_data = [product_data.record(index) for index in selected_idx]
+    matrix = ComparisonMatrix(
+        "Especificação",
+        [(data['icon'], product, data['brand']) for product, data in zip(products, selected_data)]
+    )
+    
+    # Preço (linha especial)
+    prices = [data['price'] for data in selected_data]
+    matrix.add_row(
+        "Preço",
+        [f"R$ {price:,}" for price in prices],
+        highlight_classes(prices, 'lower', 'best-price', 'premium'),
+        strong=True
+    )
+    
+    # Outras especificações, com o texto original
+    all_specs = set()
+    for data in selected_data:
+        all_specs.update(data['specifications'].keys())
+    specs = sorted(all_specs)
+    texts = [[data['specifications'].get(spec) for data in selected_data] for spec in specs]
+    
+    # Melhor/pior de todas as especificações numéricas de uma vez, a partir das
+    # colunas tipadas (o texto só é convertido quando o catálogo é gravado)
+    spec_columns = {label: (column, direction) for label, column, _, direction in PRODUCT_SPECS}
+    numeric = [i for i, spec in enumerate(specs) if spec in spec_columns]
+    values = np.array(
+        [product_data.metric(spec_columns[specs[i]][0], selected_idx) for i in numeric], dtype=np.float64
+    ).reshape(len(numeric), len(products))
+    # Sem o texto da especificação, a célula fica sem destaque (o ano também existe fora dela)
+    missing = np.array([[value is None for value in texts[i]] for i in numeric], dtype=bool).reshape(values.shape)
+    values[missing] = np.nan
+    best, worst = highlight_rows(values, [spec_columns[specs[i]][1] for i in numeric])
+    classes = {}
+    for row, i in enumerate(numeric):
+        best_class = 'most-recent' if spec_columns[specs[i]][1] == 'recent' else 'best-performance'
+        classes[i] = [
+            best_class if is_best else 'worst-performance' if is_worst else None
+            for is_best, is_worst in zip(best[row], worst[row])
+        ]
+    
+    for i, spec in enumerate(specs):
+        matrix.add_row(
+            spec,
+            ["-" if value is None else f"{value}" for value in texts[i]],
+            classes.get(i)
+        )
+    
+    # Melhor custo-benefício: score baseado em ano/preço
+    value_scores = [data['year'] / (data['price'] / 1000) for data in selected_data]
+    years = [data['year'] for data in selected_data]
+    
+    return {
+        'matrix': matrix,
+        'items': {
+            product: {'price': data['price'], 'year': data['year']}
+            for product, data in zip(products, selected_data)
+        },
+        'best_value': [p for p, score in zip(products, value_scores) if score == max(value_scores)],
+        'newest': [p for p, year in zip(products, years) if year == max(years)],
+        'cheapest': [p for p, price in zip(products, prices) if price == min(prices)],
+        'avg_price': sum(prices) / len(prices),
+        'price_range': max(prices) - min(prices),
+        'newest_year': max(years),
+    }
+
+def render_similar_products(product_data, selected, limit=COMPARISON_LIMIT):
+    """Mostra, para cada produto selecionado, os mais parecidos da mesma categoria"""
+    similarity = load_similarity_index(product_data, product_data.version)
+    selected_idx = [product_data.index_of(product) for product in selected]
+    can_add = len(selected) < limit
+    similar_cols = st.columns(len(selected))
+    for i, (product, index) in enumerate(zip(selected, selected_idx)):
+        with similar_cols[i]:
+            st.markdown(f"**{product}**")
+            for neighbor in similarity.neighbors(index, SIMILAR_PRODUCTS, exclude=selected_idx):
+                name = str(product_data.names[neighbor])
+                st.markdown(f"{product_data.value(neighbor, 'icon')} {name}  \nR$ {product_data.value(neighbor, 'price'):,}")
+                if can_add and st.button("➕ Adicionar", key=f"similar_{product}_{name}"):
+                    st.session_state.selected_products.append(name)
+                    st.rerun()
+
 def main():
+    # Marcações de tempo por seção (sem custo quando o perfilamento está desligado)
+    profiler = load_profiler()
+    perf = profiler.begin('produtos')
+    perf.section('cabeçalho')
+    
     # Header
     st.markdown("""
     <div class="header-container">
@@ -448,29 +374,43 @@ def main():
     if 'selected_products' not in st.session_state:
         st.session_state.selected_products = []
     
+    # Produtos removidos do catálogo numa recarga saem da seleção
+    st.session_state.selected_products = [
+        product for product in st.session_state.selected_products if product in product_data
+    ]
+    
+    # Limite da seleção: o modo de comparação ampla troca os cartões lado a
+    # lado por uma tabela rolável e um gráfico com todas as séries
+    limit = WIDE_COMPARISON_LIMIT if st.session_state.get('wide_comparison') else COMPARISON_LIMIT
+    
     # Layout principal
     col1, col2 = st.columns([1, 2])
     
     with col1:
+        perf.section('selecionados')
+        
         # Seção de seleção de produtos
-        st.markdown("""
+        st.markdown(f"""
         <div class="sidebar-header">
             <h3>Produtos Selecionados</h3>
-            <p>Até 4 produtos selecionados</p>
+            <p>Até {limit} produtos selecionados</p>
         </div>
         """, unsafe_allow_html=True)
         
-        # Mostrar produtos selecionados
+        st.toggle(
+            f"Comparação ampla (até {WIDE_COMPARISON_LIMIT})",
+            key="wide_comparison",
+            help=f"Compara mais de {COMPARISON_LIMIT} produtos numa tabela com rolagem horizontal"
+        )
+        
+        # Mostrar produtos selecionados (um único elemento, qualquer que seja a seleção)
         if st.session_state.selected_products:
-            for product in st.session_state.selected_products:
-                data = product_data[product]
-                
-                st.markdown(f"""
+            st.markdown("".join(f"""
                 <div style="display: flex; align-items: center; padding: 0.5rem; background: #f8f9fa; border-radius: 6px; margin-bottom: 0.5rem;">
-                    <span style="margin-right: 0.5rem;">{data['icon']}</span>
+                    <span style="margin-right: 0.5rem;">{product_data.value(product_data.index_of(product), 'icon')}</span>
                     <span style="flex: 1; font-weight: 500;">{product}</span>
                 </div>
-                """, unsafe_allow_html=True)
+                """ for product in st.session_state.selected_products), unsafe_allow_html=True)
             
             if st.button("🗑️ Limpar", key="clear_all", help="Remove todos os produtos"):
                 st.session_state.selected_products = []
@@ -481,31 +421,78 @@ def main():
         st.markdown("---")
         
         # Seção de seleção de produtos
-        st.markdown("""
+        st.markdown(f"""
         <h4>Selecionar Produtos</h4>
-        <p>Escolha até 4 produtos para comparar</p>
+        <p>Escolha até {limit} produtos para comparar</p>
         """, unsafe_allow_html=True)
         
-        # Filtros
-        categories = ['Todos'] + list(set([data['category'] for data in product_data.values()]))
-        selected_category = st.selectbox("Categoria", categories)
+        perf.section('filtros')
+        
+        # Filtros (cada opção mostra quantos produtos restam com os demais filtros)
+        facet_index = load_product_facets(product_data, product_data.version)
+        selected_category = st.session_state.get('filter_category', 'Todos')
+        selected_brand = st.session_state.get('filter_brand', 'Todas')
+        price_bounds = facet_index.bounds('price')
+        year_bounds = facet_index.bounds('year')
+        selections = {
+            'category': None if selected_category == 'Todos' else selected_category,
+            'brand': None if selected_brand == 'Todas' else selected_brand,
+            'price': range_selection(st.session_state, 'filter_price', price_bounds),
+            'year': range_selection(st.session_state, 'filter_year', year_bounds),
+        }
+        
+        category_counts, category_total = facet_index.facet_counts('category', selections)
+        st.selectbox(
+            "Categoria",
+            ['Todos'] + facet_index.options('category'),
+            format_func=facet_label('Todos', category_counts, category_total),
+            key="filter_category"
+        )
+        
+        brand_counts, brand_total = facet_index.facet_counts('brand', selections)
+        st.selectbox(
+            "Marca",
+            ['Todas'] + facet_index.options('brand'),
+            format_func=facet_label('Todas', brand_counts, brand_total),
+            key="filter_brand"
+        )
+        
+        # Faixas numéricas: cada uma são duas buscas binárias nos valores ordenados
+        # (no SQLite, um BETWEEN sobre o índice da coluna)
+        for column, label, bounds in (('price', "Preço (R$)", price_bounds), ('year', "Ano de Lançamento", year_bounds)):
+            if bounds[0] < bounds[1]:
+                st.slider(label, bounds[0], bounds[1], bounds, key=f"filter_{column}")
+        
+        sort = st.selectbox(
+            "Ordenar por",
+            list(PRODUCT_SORTS),
+            format_func=PRODUCT_SORTS.get,
+            key="product_sort"
+        )
+        
+        # Filtrar produtos com um AND entre os bitmaps das facetas (no SQLite,
+        # uma consulta indexada da qual só a página atual é lida, via LIMIT/OFFSET);
+        # uma ordenação só filtra a permutação já montada para a versão (no SQLite,
+        # um ORDER BY pelo índice da coluna na mesma consulta)
+        mask = facet_index.mask(selections)
+        if sort is None:
+            matches = facet_index.indices(mask)
+        else:
+            orders = load_product_orders(product_data, product_data.version)
+            matches = facet_index.sorted_indices(mask, orders.order(*sort))
         
-        brands = ['Todas'] + list(set([data['brand'] for data in product_data.values()]))
-        selected_brand = st.selectbox("Marca", brands)
+        perf.section('cartões')
         
-        # Filtrar produtos
-        filtered_products = {}
-        for name, data in product_data.items():
-            if selected_category != 'Todos' and data['category'] != selected_category:
-                continue
-            if selected_brand != 'Todas' and data['brand'] != selected_brand:
-                continue
-            filtered_products[name] = data
+        # Paginar: só os produtos da página atual são materializados e renderizados
+        start, end, page, pages = paginate(len(matches), key="product_list", reset_on=(selected_category, selected_brand, selections['price'], selections['year'], sort))
+        page_products = {}
+        for i in matches[start:end]:
+            page_products[str(product_data.names[i])] = product_data.record(i)
         
         # Exibir produtos disponíveis
-        for product_name, data in filtered_products.items():
+        for product_name, data in page_products.items():
             is_selected = product_name in st.session_state.selected_products
-            can_add = len(st.session_state.selected_products) < 4
+            can_add = len(st.session_state.selected_products) < limit
             
             st.markdown(f"""
             <div class="product-card">
@@ -526,17 +513,21 @@ def main():
                         st.session_state.selected_products.append(product_name)
                         st.rerun()
                 else:
-                    st.button("Limite atingido (4 produtos)", disabled=True, key=f"disabled_{product_name}")
+                    st.button(f"Limite atingido ({limit} produtos)", disabled=True, key=f"disabled_{product_name}")
+        
+        page_controls("product_list", page, pages, len(matches), start, end)
     
     with col2:
         if not st.session_state.selected_products:
-            st.markdown("""
+            st.markdown(f"""
             <div style="text-align: center; padding: 4rem 2rem; color: #666;">
                 <h3>👈 Selecione produtos para comparar</h3>
-                <p>Escolha até 4 produtos na barra lateral para ver a comparação detalhada</p>
+                <p>Escolha até {limit} produtos na barra lateral para ver a comparação detalhada</p>
             </div>
             """, unsafe_allow_html=True)
         else:
+            perf.section('tabela')
+            
             # Header da comparação
             st.markdown("""
             <div class="comparison-header">
@@ -547,93 +538,48 @@ def main():
             # Tabela de especificações
             st.markdown("### 📋 Especificações")
             
-            # Criar tabela de comparação
-            all_specs = set()
-            for product in st.session_state.selected_products:
-                all_specs.update(product_data[product]['specifications'].keys())
-            
-            # Cabeçalho da tabela
-            cols = st.columns([2] + [1] * len(st.session_state.selected_products))
-            with cols[0]:
-                st.markdown("**Especificação**")
-            
-            for i, product in enumerate(st.session_state.selected_products):
-                with cols[i + 1]:
-                    data = product_data[product]
-                    st.markdown(f"""
-                    <div style="text-align: center;">
-                        <div style="font-size: 1.5rem; margin-bottom: 0.5rem;">{data['icon']}</div>
-                        <div style="font-weight: 600; font-size: 0.9rem;">{product}</div>
-                        <div style="color: #666; font-size: 0.8rem;">{data['brand']}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-            
-            st.markdown("---")
-            
-            # Preço (linha especial)
-            cols = st.columns([2] + [1] * len(st.session_state.selected_products))
-            with cols[0]:
-                st.markdown("**Preço**")
+            # Modelo da comparação (tabela, recomendações e métricas), compartilhado
+            # entre sessões e calculado só na primeira vez que esta seleção aparece
+            selected = st.session_state.selected_products
+            model = load_comparison_cache().get_or_compute(
+                selected,
+                product_data.fingerprint(selected),
+                lambda products: compute_product_comparison(product_data, products)
+            )
+            items = model['items']
+            wide = len(selected) > COMPARISON_LIMIT
+            if wide:
+                render_wide_comparison_table(model['matrix'].reordered(selected))
+            else:
+                render_comparison_table(model['matrix'].reordered(selected))
             
-            prices = [product_data[product]['price'] for product in st.session_state.selected_products]
-            min_price = min(prices)
-            max_price = max(prices)
+            perf.section('semelhantes')
             
-            for i, product in enumerate(st.session_state.selected_products):
-                with cols[i + 1]:
-                    price = product_data[product]['price']
-                    if price == min_price and len(st.session_state.selected_products) > 1:
-                        st.markdown(f'<div class="best-price">R$ {price:,}</div>', unsafe_allow_html=True)
-                    elif price == max_price and len(st.session_state.selected_products) > 1:
-                        st.markdown(f'<div class="premium">R$ {price:,}</div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"**R$ {price:,}**")
+            # Vizinhos mais próximos nas especificações numéricas e no preço
+            # (uma coluna por produto: só na comparação lado a lado)
+            st.markdown("### 🔎 Produtos Semelhantes")
+            if wide:
+                st.caption(f"Disponível com até {COMPARISON_LIMIT} produtos selecionados")
+            else:
+                render_similar_products(product_data, selected, limit)
             
-            # Outras especificações
-            for spec in sorted(all_specs):
-                cols = st.columns([2] + [1] * len(st.session_state.selected_products))
-                with cols[0]:
-                    st.markdown(f"**{spec}**")
-                
-                # Para ano de lançamento, destacar o mais recente
-                if spec == "Ano de Lançamento":
-                    years = []
-                    for product in st.session_state.selected_products:
-                        specs = product_data[product]['specifications']
-                        if spec in specs:
-                            years.append(specs[spec])
-                    
-                    max_year = max(years) if years else 0
-                    
-                    for i, product in enumerate(st.session_state.selected_products):
-                        with cols[i + 1]:
-                            specs = product_data[product]['specifications']
-                            if spec in specs:
-                                value = specs[spec]
-                                if value == max_year and len(st.session_state.selected_products) > 1:
-                                    st.markdown(f'<div class="most-recent">{value}</div>', unsafe_allow_html=True)
-                                else:
-                                    st.markdown(f"{value}")
-                            else:
-                                st.markdown("-")
-                else:
-                    for i, product in enumerate(st.session_state.selected_products):
-                        with cols[i + 1]:
-                            specs = product_data[product]['specifications']
-                            if spec in specs:
-                                st.markdown(f"{specs[spec]}")
-                            else:
-                                st.markdown("-")
+            perf.section('históricos')
             
             # Histórico de preços usando gráficos nativos do Streamlit
-            if len(st.session_state.selected_products) <= 2:
-                st.markdown("### 📈 Histórico de Preços")
-                
-                chart_cols = st.columns(len(st.session_state.selected_products))
+            st.markdown("### 📈 Histórico de Preços")
+            if len(selected) > 2:
+                # Um único gráfico com uma série por produto
+                histories = pd.concat([
+                    create_price_chart_data(product, items[product]['price'])[0].assign(Produto=product)
+                    for product in selected
+                ], ignore_index=True)
+                st.line_chart(histories, x='Data', y='Preço', color='Produto', height=300)
+            else:
+                chart_cols = st.columns(len(selected))
                 
-                for i, product in enumerate(st.session_state.selected_products):
+                for i, product in enumerate(selected):
                     with chart_cols[i]:
-                        data = product_data[product]
+                        data = items[product]
                         chart_data, trend_text, trend_class = create_price_chart_data(product, data['price'])
                         
                         st.markdown(f"""
@@ -645,30 +591,26 @@ def main():
                         # Usar line_chart nativo do Streamlit
                         st.line_chart(chart_data.set_index('Data')['Preço'], height=200)
             
+            perf.section('gráfico de preços')
+            
             # Gráfico de comparação de preços
             st.markdown("### 💰 Comparação de Preços")
             
             price_comparison = pd.DataFrame({
-                'Produto': st.session_state.selected_products,
-                'Preço (R$)': [product_data[product]['price'] for product in st.session_state.selected_products]
+                'Produto': selected,
+                'Preço (R$)': [items[product]['price'] for product in selected]
             })
             
             st.bar_chart(price_comparison.set_index('Produto')['Preço (R$)'])
             
-            # Recomendações
-            st.markdown("### 💡 Recomendações")
+            perf.section('recomendações')
             
-            # Melhor custo-benefício (mais recente com menor preço)
-            best_value = None
-            best_score = 0
+            # Recomendações (empates resolvidos pela ordem de seleção)
+            st.markdown("### 💡 Recomendações")
             
-            for product in st.session_state.selected_products:
-                data = product_data[product]
-                # Score baseado em ano/preço
-                score = data['year'] / (data['price'] / 1000)
-                if score > best_score:
-                    best_score = score
-                    best_value = product
+            best_value = first_selected(selected, model['best_value'])
+            newest = first_selected(selected, model['newest'])
+            cheapest = first_selected(selected, model['cheapest'])
             
             rec_cols = st.columns(3)
             
@@ -678,53 +620,49 @@ def main():
                     <div class="recommendation-card rec-success">
                         <h4>🏆 Melhor Custo-Benefício</h4>
                         <h3>{best_value}</h3>
-                        <p>R$ {product_data[best_value]['price']:,}</p>
+                        <p>R$ {items[best_value]['price']:,}</p>
                     </div>
                     """, unsafe_allow_html=True)
             
             with rec_cols[1]:
                 # Mais recente
-                newest = max(st.session_state.selected_products, 
-                           key=lambda x: product_data[x]['year'])
                 st.markdown(f"""
                 <div class="recommendation-card rec-info">
                     <h4>🆕 Mais Recente</h4>
                     <h3>{newest}</h3>
-                    <p>{product_data[newest]['year']}</p>
+                    <p>{items[newest]['year']}</p>
                 </div>
                 """, unsafe_allow_html=True)
             
             with rec_cols[2]:
                 # Mais barato
-                cheapest = min(st.session_state.selected_products, 
-                             key=lambda x: product_data[x]['price'])
                 st.markdown(f"""
                 <div class="recommendation-card rec-warning">
                     <h4>💰 Mais Econômico</h4>
                     <h3>{cheapest}</h3>
-                    <p>R$ {product_data[cheapest]['price']:,}</p>
+                    <p>R$ {items[cheapest]['price']:,}</p>
                 </div>
                 """, unsafe_allow_html=True)
             
+            perf.section('análise')
+            
             # Análise adicional
-            if len(st.session_state.selected_products) > 1:
+            if len(selected) > 1:
                 st.markdown("### 📊 Análise Comparativa")
                 
-                # Criar métricas comparativas
-                avg_price = sum(prices) / len(prices)
-                price_range = max_price - min_price
-                
                 metric_cols = st.columns(3)
                 
                 with metric_cols[0]:
-                    st.metric("Preço Médio", f"R$ {avg_price:,.0f}")
+                    st.metric("Preço Médio", f"R$ {model['avg_price']:,.0f}")
                 
                 with metric_cols[1]:
-                    st.metric("Diferença de Preço", f"R$ {price_range:,.0f}")
+                    st.metric("Diferença de Preço", f"R$ {model['price_range']:,.0f}")
                 
                 with metric_cols[2]:
-                    newest_year = max([product_data[p]['year'] for p in st.session_state.selected_products])
-                    st.metric("Ano Mais Recente", f"{newest_year}")
+                    st.metric("Ano Mais Recente", f"{model['newest_year']}")
+    
+    perf.end()
+    render_profiler_panel(profiler, 'produtos')
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import timedelta
+
+import numpy as np
+
+# synthetic vem antes: ele põe a raiz do repositório no sys.path
+from synthetic import BENCH_DATA_DIR, agent_event_log, agent_source, ensure_catalog
+
+from appTest import create_price_chart_data, generate_price_history
+from catalog import open_catalog
+from downsample import CHART_POINTS, downsampled_window
+from events import EventRollups
+from facets import FacetIndex
+from history import simulated_history, today
+from metrics import AGENT_SCHEMA, AgentCatalog, agent_source_records, pareto_frontier, performance_scores, top_k
+from products import PRODUCT_SCHEMA
+from similarity import SimilarityIndex
+from sorting import SortOrders
+from test2 import create_cost_chart_data, generate_cost_history
+from timeseries import TimeSeriesStore
+
+# Tempo mínimo medido por benchmark e limites de repetições
+MIN_TIME = 0.25
+MIN_ROUNDS = 5
+MAX_ROUNDS = 10_000
+
+# Parâmetros: meses de histórico, observações no armazenamento, tamanho da
+# frota e do catálogo de produtos
+HISTORY_MONTHS = [6, 24, 120, 600]
+STORE_ROWS = [1_000, 10_000, 100_000, 1_000_000]
+FLEET_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+PARSE_SIZES = [100, 1_000, 10_000, 100_000]
+EVENT_COUNTS = [1_000, 10_000, 100_000]
+CATALOG_SIZES = [1_000, 100_000, 1_000_000]
+
+# Referência no formato JSON do pytest-benchmark (mais a escala estimada); só é
+# regravada com --update-baseline, num commit à parte e apenas quando o
+# comportamento das funções muda
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_data.json')
+
+
+def measure(fn, setup=None):
+    """Estatísticas de tempo por chamada; `setup` roda antes de cada chamada, fora da medição"""
+    times = []
+    total = 0.0
+    while len(times) < MIN_ROUNDS or (total < MIN_TIME and len(times) < MAX_ROUNDS):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        total += elapsed
+    times = np.array(times)
+    return {
+        'min': float(times.min()),
+        'max': float(times.max()),
+        'mean': float(times.mean()),
+        'stddev': float(times.std()),
+        'median': float(np.median(times)),
+        'rounds': len(times),
+        'ops': float(1 / times.mean()),
+    }
+
+
+def history_benchmarks():
+    """Históricos simulados e dados dos gráficos, com e sem o cache de séries"""
+    cold = simulated_history.cache_clear
+    for months in HISTORY_MONTHS:
+        yield 'generate_price_history', 'months', months, lambda: generate_price_history('Produto', 5000, months), cold
+        yield 'generate_price_history (cache)', 'months', months, lambda: generate_price_history('Produto', 5000, months), None
+        yield 'generate_cost_history', 'months', months, lambda: generate_cost_history('Agente', 2500, months), cold
+        yield 'create_price_chart_data', 'months', months, lambda: create_price_chart_data('Produto', 5000, months), cold
+        yield 'create_cost_chart_data', 'months', months, lambda: create_cost_chart_data('Agente', 2500, months), cold
+
+
+def store_benchmarks():
+    """Leitura de uma janela do armazenamento já reduzida para o gráfico"""
+    store = TimeSeriesStore(os.path.join(BENCH_DATA_DIR, 'timeseries'))
+    end = today() + timedelta(days=1)
+    for rows in STORE_ROWS:
+        key = f'Produto {rows}'
+        start = end - timedelta(days=180)
+        if not len(store.read(key, start, end)[0]):
+            # Observações igualmente espaçadas cobrindo a janela de 6 meses
+            seconds = np.linspace(0, 180 * 86400, rows, endpoint=False).astype('timedelta64[s]')
+            timestamps = np.datetime64(start, 's') + seconds
+            prices = 5000 * np.cumprod(1 + np.random.default_rng(rows).normal(0, 0.001, rows))
+            store.append([key] * rows, timestamps, prices)
+            store.flush()
+        version = store.version()
+        yield ('downsampled_window', 'rows', rows,
+               lambda: downsampled_window(store, key, start, end, CHART_POINTS, version),
+               downsampled_window.cache_clear)
+
+
+def agent_benchmarks():
+    """Conversão das métricas em texto e score/ranking/fronteira da frota"""
+    for n in PARSE_SIZES:
+        source = agent_source(n)
+        yield 'agent_source_records', 'fleet', n, lambda: agent_source_records(source), None
+    for n in FLEET_SIZES:
+        catalog = open_catalog(ensure_catalog('agents', n), None, AGENT_SCHEMA, AgentCatalog)
+        yield 'performance_scores', 'fleet', n, lambda: performance_scores(catalog), None
+        scores = performance_scores(catalog)
+        yield 'top_k', 'fleet', n, lambda: top_k(scores, 10), None
+        yield 'pareto_frontier', 'fleet', n, lambda: pareto_frontier(catalog), None
+
+
+def filter_benchmarks():
+    """Filtro de categoria com uma faixa de preço (um décimo dos valores) e primeira página por preço"""
+    for n in CATALOG_SIZES:
+        catalog = open_catalog(ensure_catalog('products', n), None, PRODUCT_SCHEMA)
+        index = FacetIndex.from_catalog(catalog, ['category', 'brand'], ['price', 'year'])
+        low, high = index.bounds('price')
+        selections = {'category': 'Celulares', 'price': (low, low + (high - low) // 10)}
+        yield 'FacetIndex.mask (faixa)', 'catalog', n, lambda: index.mask(selections), index.cache_clear
+        orders = SortOrders(catalog, {'price': lambda: catalog.column('price')})
+        mask = index.mask({'category': 'Celulares'})
+        order = orders.order('price')
+        yield 'FacetIndex.sorted_indices', 'catalog', n, lambda: index.sorted_indices(mask, order)[:10], None
+
+
+def similarity_benchmarks():
+    """Busca dos produtos semelhantes de um produto (índice já montado para a versão)"""
+    for n in CATALOG_SIZES:
+        catalog = open_catalog(ensure_catalog('products', n), None, PRODUCT_SCHEMA)
+        index = SimilarityIndex.from_catalog(catalog)
+        yield 'SimilarityIndex.neighbors', 'catalog', n, lambda: index.neighbors(n // 2), None
+
+
+def event_benchmarks():
+    """Ingestão de logs de eventos nos rollups mensais (custo por evento constante)"""
+    # Diretório que nunca recebe checkpoint: cada rodada lê o log desde o início
+    directory = os.path.join(BENCH_DATA_DIR, 'events-state')
+    for n in EVENT_COUNTS:
+        path = agent_event_log(n)
+        yield 'EventRollups.tail', 'events', n, lambda: EventRollups(directory).tail(path, max_events=n), None
+
+
+def scaling(results):
+    """Expoente k de O(n^k) por grupo: inclinação de log(mediana) contra log(parâmetro)"""
+    groups = {}
+    for bench in results:
+        (value,) = bench['params'].values()
+        groups.setdefault(bench['group'], []).append((value, bench['stats']['median']))
+    return {
+        group: round(float(np.polyfit(np.log([p for p, _ in points]), np.log([t for _, t in points]), 1)[0]), 2)
+        for group, points in groups.items()
+        if len(points) > 1
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks das funções de dados dos apps")
+    parser.add_argument('--json', help="Grava os resultados neste arquivo ('-' para a saída padrão)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Regrava a referência com os resultados desta execução")
+    parser.add_argument('--groups', nargs='+', help="Só os grupos indicados")
+    args = parser.parse_args()
+
+    results = []
+    for suite in (history_benchmarks, store_benchmarks, agent_benchmarks, filter_benchmarks, similarity_benchmarks, event_benchmarks):
+        for group, param, value, fn, setup in suite():
+            if args.groups and group not in args.groups:
+                continue
+            stats = measure(fn, setup)
+            results.append({
+                'group': group,
+                'name': f'{group}[{value}]',
+                'params': {param: value},
+                'stats': stats,
+            })
+            print(f"{group:<32} {param}={value:<9,} mediana {stats['median'] * 1e3:>10.3f} ms  ({stats['rounds']} rodadas)", flush=True)
+
+    exponents = scaling(results)
+    for group, k in exponents.items():
+        print(f"{group:<32} ~ O(n^{k})")
+
+    output = {
+        'machine_info': {
+            'python_version': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+        },
+        'datetime': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'benchmarks': results,
+        'scaling': exponents,
+    }
+    text = json.dumps(output, ensure_ascii=False, indent=2) + '\n'
+    if args.json == '-':
+        print(text, end='')
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(text)
+    if args.update_baseline:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
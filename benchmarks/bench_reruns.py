@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from synthetic import REPO_DIR, ensure_catalog
+
+from catalog import ColumnarCatalog
+
+# Tamanhos dos catálogos sintéticos
+SIZES = [10, 1_000, 100_000, 1_000_000]
+
+# Repetições do cenário inteiro por app e tamanho (além do aquecimento)
+REPEATS = 5
+
+# Arquivo com os resultados de referência; só é regravado com --update-baseline,
+# num commit à parte e apenas quando o comportamento dos apps muda
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_reruns.json')
+
+# Um rerun fica marcado como regressão acima desta razão sobre a referência...
+REGRESSION_RATIO = 1.25
+# ...desde que a diferença também passe deste mínimo (evita ruído em reruns rápidos)
+REGRESSION_MIN_MS = 5.0
+
+# app -> (script, variáveis do catálogo e do arquivo de dados, tipo do catálogo,
+#         filtro, valor do filtro, chave da seleção)
+APPS = {
+    'produtos': ('appTest.py', 'PRODUCT_CATALOG_DIR', 'PRODUCT_SOURCE', 'products', 'filter_category', 'Celulares', 'selected_products'),
+    'agentes': ('test2.py', 'AGENT_CATALOG_DIR', 'AGENT_SOURCE', 'agents', 'filter_category', 'Atendimento', 'selected_agents'),
+}
+
+# Itens selecionados nos passos da comparação ampla (limitados ao tamanho do catálogo)
+WIDE_SELECTIONS = [10, 50]
+
+# Módulo que lê cada variável do catálogo ao ser importado
+CATALOG_MODULES = {
+    'PRODUCT_CATALOG_DIR': 'products',
+    'AGENT_CATALOG_DIR': 'metrics',
+}
+
+
+def count_elements(node):
+    """Quantidade de elementos (folhas) na árvore renderizada pelo AppTest"""
+    children = getattr(node, 'children', None)
+    if not children:
+        return 1
+    return sum(count_elements(child) for child in children.values())
+
+
+def timed_run(at, steps, name):
+    """Executa um rerun e acrescenta (ms, elementos) ao passo indicado"""
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].message}")
+    steps.setdefault(name, []).append((elapsed, count_elements(at.main) + count_elements(at.sidebar)))
+
+
+def run_scenario(script, filter_key, filter_value, selection_key, names, steps, timeout):
+    """Abre o app, muda um filtro, adiciona de 1 a 4 itens, limpa a comparação e compara muitos itens no modo amplo"""
+    at = AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=timeout)
+    timed_run(at, steps, 'inicial')
+
+    at.session_state[filter_key] = filter_value
+    timed_run(at, steps, 'filtro')
+
+    for count in range(1, 5):
+        add = [b.key for b in at.button if b.key and b.key.startswith('add_')]
+        at.button(key=add[0]).click()
+        timed_run(at, steps, f'adicionar {count}')
+
+    at.button(key='clear_all').click()
+    timed_run(at, steps, 'limpar')
+
+    at.session_state['wide_comparison'] = True
+    for count in WIDE_SELECTIONS:
+        at.session_state[selection_key] = names[:count]
+        timed_run(at, steps, f'ampla {count}')
+
+
+def summarize(samples):
+    ms = np.array([elapsed for elapsed, _ in samples])
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 1),
+        'p95_ms': round(float(np.percentile(ms, 95)), 1),
+        'elements': samples[-1][1],
+    }
+
+
+def bench_app(app, size, repeats, timeout):
+    """Latência por passo do cenário para um app e um tamanho de catálogo"""
+    script, catalog_var, source_var, kind, filter_key, filter_value, selection_key = APPS[app]
+    os.environ[catalog_var] = ensure_catalog(kind, size)
+    # O módulo já foi importado (por synthetic) com o valor anterior da
+    # variável, e o app o reaproveita a cada rerun: a constante é trocada também
+    setattr(sys.modules[CATALOG_MODULES[catalog_var]], catalog_var, os.environ[catalog_var])
+    # Sem arquivo de dados: o catálogo sintético é usado como está
+    os.environ[source_var] = os.path.join(os.environ[catalog_var], 'sem-arquivo.json')
+    # Os recursos em cache (catálogo, facetas, ...) são do processo; sem
+    # limpar, o próximo tamanho reaproveitaria o catálogo do anterior
+    st.cache_resource.clear()
+    names = [str(name) for name in ColumnarCatalog(os.environ[catalog_var]).names[:max(WIDE_SELECTIONS)]]
+
+    # A primeira execução abre o catálogo e monta os índices: fica à parte
+    cold = {}
+    run_scenario(script, filter_key, filter_value, selection_key, names, cold, timeout)
+    steps = {}
+    for _ in range(repeats):
+        run_scenario(script, filter_key, filter_value, selection_key, names, steps, timeout)
+
+    results = {'carga fria': summarize(cold['inicial'])}
+    results.update({name: summarize(samples) for name, samples in steps.items()})
+    return results
+
+
+def compare(baseline, results):
+    """Linhas de relatório com a variação do p50 e a lista de regressões"""
+    lines, regressions = [], []
+    for app, sizes in results.items():
+        for size, steps in sizes.items():
+            for step, new in steps.items():
+                old = baseline.get(app, {}).get(size, {}).get(step)
+                line = f"{app:<9} {size:>8} {step:<12} p50 {new['p50_ms']:>8.1f} ms  p95 {new['p95_ms']:>8.1f} ms  {new['elements']:>4} elementos"
+                if old:
+                    ratio = new['p50_ms'] / old['p50_ms'] if old['p50_ms'] else 1.0
+                    line += f"  ({ratio:.2f}x)"
+                    slower = new['p50_ms'] - old['p50_ms'] > REGRESSION_MIN_MS and ratio > REGRESSION_RATIO
+                    if slower or new['elements'] != old['elements']:
+                        line += "  ⚠"
+                        regressions.append((app, size, step))
+                lines.append(line)
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência de rerun dos apps com catálogos sintéticos (AppTest)")
+    parser.add_argument('--apps', nargs='+', choices=list(APPS), default=list(APPS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=SIZES)
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--timeout', type=float, default=120, help="Limite de cada rerun, em segundos")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Arquivo de referência")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Regrava a referência com os resultados desta execução")
+    parser.add_argument('--check', action='store_true', help="Sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    for app in args.apps:
+        results[app] = {}
+        for size in args.sizes:
+            results[app][str(size)] = bench_app(app, size, args.repeats, args.timeout)
+            print(f"{app} {size:,}: ok", flush=True)
+
+    lines, regressions = compare(baseline, results)
+    print('\n'.join(lines))
+
+    if args.update_baseline:
+        # Mantém na referência os apps/tamanhos que não foram medidos agora
+        merged = {app: dict(baseline.get(app, {})) for app in baseline}
+        for app, sizes in results.items():
+            merged.setdefault(app, {}).update(sizes)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'repeats': args.repeats, 'results': merged}, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+    if regressions:
+        print(f"{len(regressions)} passos acima da referência")
+        if args.check:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+# Os benchmarks rodam a partir desta pasta, mas importam os módulos do app
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import streamlit as st  # noqa: E402
+from streamlit.logger import set_log_level  # noqa: E402
+
+# Importar os apps fora de `streamlit run` só gera avisos de "bare mode"; a
+# configuração é lida antes, senão ela restaura o nível de log padrão depois
+st.get_option('logger.level')
+set_log_level('error')
+
+from catalog import DATA_DIR, current_version, write_catalog  # noqa: E402
+from metrics import AGENT_METRICS, AGENT_SCHEMA, format_metric  # noqa: E402
+from products import PRODUCT_SCHEMA, product_source_records  # noqa: E402
+
+# Catálogos sintéticos ficam fora do repositório e são reaproveitados entre execuções
+BENCH_DATA_DIR = os.environ.get('BENCH_DATA_DIR', os.path.join(DATA_DIR, 'bench'))
+
+PRODUCT_BRANDS = ['Apple', 'Samsung', 'Google', 'Xiaomi', 'OnePlus', 'Vivo', 'Motorola', 'Dell', 'Lenovo', 'Asus']
+PRODUCT_CATEGORIES = [('Celulares', '📱'), ('Notebooks', '💻'), ('Tablets', '📟')]
+AGENT_PROVIDERS = ['TechCorp', 'AIFlow', 'SmartBot', 'NeuralSys', 'CogniBot', 'AutoChat']
+AGENT_CATEGORIES = ['Atendimento', 'Suporte', 'Vendas']
+
+
+def product_records(n, seed=0):
+    """Produtos sintéticos com a mesma forma dos dados iniciais do app
+
+    Os valores são sorteados de forma vetorizada; os textos das
+    especificações vêm de listas pequenas, então são compartilhados entre
+    os registros e o dicionário cabe em memória mesmo com 1M de produtos.
+    """
+    rng = np.random.default_rng(seed)
+    brands = rng.integers(0, len(PRODUCT_BRANDS), n).tolist()
+    # Categorias em rodízio: todas aparecem mesmo nos catálogos pequenos
+    categories = (np.arange(n) % len(PRODUCT_CATEGORIES)).tolist()
+    prices = rng.integers(999, 15000, n).tolist()
+    years = rng.integers(2019, 2025, n).tolist()
+    ram = [f'{gb}GB' for gb in (4, 8, 12, 16)]
+    storage = [f'{gb}GB' for gb in (128, 256, 512, 1024)]
+    battery = [f'{mah} mAh' for mah in range(3000, 6001, 250)]
+    ram_idx = rng.integers(0, len(ram), n).tolist()
+    storage_idx = rng.integers(0, len(storage), n).tolist()
+    battery_idx = rng.integers(0, len(battery), n).tolist()
+
+    records = {}
+    for i in range(n):
+        category, icon = PRODUCT_CATEGORIES[categories[i]]
+        records[f'Produto {i:07d}'] = {
+            'brand': PRODUCT_BRANDS[brands[i]],
+            'category': category,
+            'price': prices[i],
+            'year': years[i],
+            'launch_date': f'{years[i]}-01-01',
+            'specifications': {
+                'Ano de Lançamento': years[i],
+                'Memória RAM': ram[ram_idx[i]],
+                'Armazenamento': storage[storage_idx[i]],
+                'Bateria': battery[battery_idx[i]],
+            },
+            'icon': icon,
+        }
+    return records
+
+
+def agent_records(n, seed=0):
+    """Agentes sintéticos já com as métricas em colunas tipadas"""
+    rng = np.random.default_rng(seed)
+    providers = rng.integers(0, len(AGENT_PROVIDERS), n).tolist()
+    categories = (np.arange(n) % len(AGENT_CATEGORIES)).tolist()
+    costs = rng.integers(1000, 5000, n).tolist()
+    years = rng.integers(2021, 2025, n).tolist()
+    atendimentos = rng.integers(5000, 30000, n).tolist()
+    erros = rng.integers(10, 100, n).tolist()
+    bugs = rng.integers(1, 20, n).tolist()
+    tempo = np.round(rng.uniform(1.0, 5.0, n), 1)
+    # Caudas das durações: p95/p99 alguns múltiplos acima da média
+    tempo_p95 = np.round(tempo * rng.uniform(1.5, 2.5, n), 1).tolist()
+    tempo_p99 = np.round(tempo * rng.uniform(2.5, 4.0, n), 1).tolist()
+    tempo = tempo.tolist()
+    return {
+        f'Agente {i:07d}': {
+            'provider': AGENT_PROVIDERS[providers[i]],
+            'category': AGENT_CATEGORIES[categories[i]],
+            'cost': costs[i],
+            'deployment_year': years[i],
+            'deployment_date': f'{years[i]}-01-15',
+            'icon': '🤖',
+            'atendimentos': atendimentos[i],
+            'erros': erros[i],
+            'bugs': bugs[i],
+            'tempo': tempo[i],
+            'tempo_p95': tempo_p95[i],
+            'tempo_p99': tempo_p99[i],
+        }
+        for i in range(n)
+    }
+
+
+def agent_source(n, seed=0):
+    """Agentes sintéticos no formato de origem, com as métricas em texto"""
+    # Como nos dados iniciais, custo e ano ficam também fora das especificações
+    text_only = {column for _, column, *_ in AGENT_METRICS} - {'cost', 'deployment_year'}
+    source = {}
+    for name, record in agent_records(n, seed).items():
+        source[name] = {key: value for key, value in record.items() if key not in text_only}
+        source[name]['specifications'] = {
+            label: record[column] if unit is None else format_metric(record[column], unit)
+            for label, column, _, unit, _ in AGENT_METRICS
+        }
+    return source
+
+
+def agent_event_log(n, agents=1_000, seed=0):
+    """Log JSON lines com `n` eventos sintéticos de `agents` agentes, gravado só na primeira vez"""
+    path = os.path.join(BENCH_DATA_DIR, f'events-{n}.jsonl')
+    if os.path.exists(path):
+        return path
+    rng = np.random.default_rng(seed)
+    agent_idx = rng.integers(0, agents, n).tolist()
+    days = rng.integers(1, 29, n).tolist()
+    kinds = rng.choice(['atendimento', 'erro', 'bug'], n, p=[0.95, 0.04, 0.01]).tolist()
+    minutes = np.round(rng.uniform(1.0, 5.0, n), 2).tolist()
+    os.makedirs(BENCH_DATA_DIR, exist_ok=True)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        for i in range(n):
+            event = {'agent': f'Agente {agent_idx[i]:07d}', 'ts': f'2024-05-{days[i]:02d}T12:00:00Z', 'type': kinds[i]}
+            if kinds[i] == 'atendimento':
+                event['minutes'] = minutes[i]
+            f.write(json.dumps(event) + '\n')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def ensure_catalog(kind, n):
+    """Diretório de um catálogo sintético de `n` itens, gravado só na primeira vez"""
+    directory = os.path.join(BENCH_DATA_DIR, f'{kind}-{n}')
+    if current_version(directory) is None:
+        if kind == 'products':
+            write_catalog(directory, product_source_records(product_records(n)), PRODUCT_SCHEMA)
+        else:
+            write_catalog(directory, agent_records(n), AGENT_SCHEMA)
+    return directory
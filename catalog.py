@@ -0,0 +1,633 @@
+import csv
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+# Diretório padrão onde os catálogos colunares ficam gravados
+DATA_DIR = os.environ.get(
+    'CATALOG_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+
+# Backend de leitura dos catálogos: 'columnar' (colunas .npy mapeadas em
+# memória) ou 'sqlite' (consultas indexadas, ver sqlstore.py)
+CATALOG_BACKEND = os.environ.get('CATALOG_BACKEND', 'columnar')
+
+# Versões antigas só são apagadas depois deste tempo sem ser ativadas nem
+# usadas, para não apagar uma que outro processo acabou de gravar e ainda vai
+# ativar, ou que ainda lê (e em que monta catalog.sqlite ou similarity/)
+PRUNE_GRACE_SECONDS = 60
+
+# Tipos de coluna suportados:
+#   category -> códigos int32 + vocabulário (marca, categoria, ...)
+#   int/float -> arrays numéricos
+#   str -> texto de tamanho variável (bytes UTF-8 + início de cada linha)
+#   json -> texto JSON decodificado por registro (especificações), guardado como str
+# Cada entrada do esquema é (coluna, tipo) ou (coluna, tipo, unidade)
+COLUMN_KINDS = ('category', 'int', 'float', 'str', 'json')
+
+# Tipos de coluna guardados como texto de tamanho variável
+TEXT_KINDS = ('str', 'json')
+
+
+def encode_text(values):
+    """Textos como (bytes UTF-8 concatenados, posição inicial de cada texto mais o fim)"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def _encode_column(values, kind):
+    """Converte uma lista de valores Python nos arrays da coluna
+
+    Devolve o array principal e os auxiliares por sufixo do arquivo
+    ('.vocab' das categorias, '.offsets' dos textos).
+    """
+    if kind == 'category':
+        vocab, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+        return codes.astype(np.int32), {'.vocab': vocab}
+    if kind == 'int':
+        return np.array(values, dtype=np.int64), {}
+    if kind == 'float':
+        return np.array(values, dtype=np.float64), {}
+    if kind == 'str':
+        data, offsets = encode_text(values)
+        return data, {'.offsets': offsets}
+    if kind == 'json':
+        data, offsets = encode_text([json.dumps(v, ensure_ascii=False) for v in values])
+        return data, {'.offsets': offsets}
+    raise ValueError(f"Tipo de coluna desconhecido: {kind}")
+
+
+class TextColumn:
+    """Coluna de texto de tamanho variável, com a interface de array usada pelos apps
+
+    Os textos ficam concatenados em UTF-8 e `offsets` guarda onde cada um
+    começa (mais o fim do último), então cada linha ocupa só os próprios
+    bytes, em vez da largura do maior texto em UTF-32 de um array '<U'.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _texts(self, start, stop):
+        """Textos das linhas start..stop-1, lidos numa única fatia dos bytes"""
+        offsets = np.asarray(self.offsets[start:stop + 1]).tolist()
+        if not offsets:
+            return []
+        base = offsets[0]
+        data = bytes(self.data[base:offsets[-1]])
+        return [data[a - base:b - base].decode('utf-8') for a, b in zip(offsets, offsets[1:])]
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            index = int(key) + len(self) if key < 0 else int(key)
+            if not 0 <= index < len(self):
+                raise IndexError(key)
+            return self._texts(index, index + 1)[0]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return np.array(self._texts(start, max(start, stop)), dtype=str)
+            key = np.arange(start, stop, step)
+        key = np.asarray(key)
+        if key.dtype == bool:
+            key = np.flatnonzero(key)
+        return np.array([self[i] for i in key.ravel().tolist()], dtype=str)
+
+    def __array__(self, dtype=None, copy=None):
+        values = self[:]
+        return values if dtype is None else values.astype(dtype)
+
+
+def row_hash(record):
+    """Hash de 64 bits do conteúdo de um registro"""
+    data = json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def row_hashes(records):
+    """Hash de cada registro, na ordem do dicionário"""
+    return np.array([row_hash(record) for record in records.values()], dtype=np.uint64)
+
+
+def catalog_version(arrays, schema, block_rows=1 << 16):
+    """Versão de um conjunto de colunas: hash do conteúdo, lido em blocos
+
+    Os blocos permitem calcular a versão de colunas mapeadas do disco sem
+    carregá-las inteiras; o resultado é o mesmo de um único tobytes().
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps(schema).encode('utf-8'))
+    for key in sorted(arrays):
+        digest.update(key.encode('utf-8'))
+        array = arrays[key]
+        for start in range(0, max(len(array), 1), block_rows):
+            digest.update(np.ascontiguousarray(array[start:start + block_rows]).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def publish_catalog(directory, staging, version, rows, schema):
+    """Transforma um diretório de preparação com as colunas na versão indicada e a ativa"""
+    target = os.path.join(directory, version)
+    if os.path.isdir(target):
+        shutil.rmtree(staging, ignore_errors=True)
+    else:
+        manifest = {
+            'version': version,
+            'rows': int(rows),
+            'columns': [
+                {'name': column, 'kind': kind, 'unit': unit[0] if unit else None}
+                for column, kind, *unit in schema
+            ],
+        }
+        with open(os.path.join(staging, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        try:
+            os.rename(staging, target)
+        except OSError:
+            # Outro processo gravou a mesma versão primeiro
+            shutil.rmtree(staging, ignore_errors=True)
+    _write_current(directory, version)
+
+
+def write_catalog(directory, records, schema):
+    """Grava um dicionário nome -> registro como colunas .npy em uma nova versão"""
+    names = np.array(list(records), dtype=str)
+    arrays = {'names': names}
+    # Hash por linha: permite saber quais registros mudaram entre duas versões
+    arrays['row_hash'] = row_hashes(records)
+    order = np.argsort(names, kind='stable')
+    arrays['names_order'] = order.astype(np.int64)
+    arrays['names_sorted'] = names[order]
+
+    for column, kind, *_ in schema:
+        values, extra = _encode_column([r[column] for r in records.values()], kind)
+        arrays[column] = values
+        for suffix, array in extra.items():
+            arrays[column + suffix] = array
+
+    # A versão é o hash do conteúdo, então regravar os mesmos dados é idempotente
+    version = catalog_version(arrays, schema)
+
+    os.makedirs(directory, exist_ok=True)
+    if not os.path.isdir(os.path.join(directory, version)):
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=directory)
+        for key, array in arrays.items():
+            np.save(os.path.join(staging, key + '.npy'), array)
+        publish_catalog(directory, staging, version, len(names), schema)
+    else:
+        _write_current(directory, version)
+    return version
+
+
+def update_catalog(catalog, indices, columns, schema):
+    """Grava uma nova versão do catálogo trocando algumas células de colunas numéricas
+
+    `columns` mapeia coluna -> valores novos das linhas `indices`; as colunas
+    são abertas mapeadas do disco, só as alteradas são copiadas para a
+    memória e só os hashes das linhas tocadas são refeitos, então é barato
+    atualizar poucas linhas de um catálogo grande. Colunas float do esquema
+    que a versão ainda não tem entram com NaN, o que muda o registro (e o
+    hash) de todas as linhas.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    keys = [os.path.splitext(f)[0] for f in os.listdir(catalog.path) if f.endswith('.npy')]
+    arrays = {key: np.load(os.path.join(catalog.path, key + '.npy'), mmap_mode='r') for key in keys}
+    added = []
+    for column, kind, *_ in schema:
+        if column not in arrays:
+            # Coluna nova no esquema, ausente nesta versão: começa sem valores
+            if kind != 'float':
+                raise ValueError(f"Coluna {column!r} ausente no catálogo")
+            arrays[column] = np.full(len(arrays['names']), np.nan)
+            added.append(column)
+    columns = {column: np.asarray(values, dtype=arrays[column].dtype) for column, values in columns.items()}
+    for column, values in columns.items():
+        if column not in added:
+            arrays[column] = np.array(arrays[column])
+        arrays[column][indices] = values
+    if 'row_hash' in arrays:
+        arrays['row_hash'] = np.array(arrays['row_hash'])
+        positions = {index: position for position, index in enumerate(indices.tolist())}
+        rows = range(len(arrays['names'])) if added else positions
+        for index in rows:
+            record = ColumnarCatalog.record(catalog, index)
+            for column in added:
+                record[column] = math.nan
+            position = positions.get(index)
+            if position is not None:
+                for column, values in columns.items():
+                    record[column] = values[position].item()
+            arrays['row_hash'][index] = row_hash(record)
+
+    version = catalog_version(arrays, schema)
+    if not os.path.isdir(os.path.join(catalog.directory, version)):
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=catalog.directory)
+        for key, array in arrays.items():
+            np.save(os.path.join(staging, key + '.npy'), array)
+        publish_catalog(catalog.directory, staging, version, len(arrays['names']), schema)
+    else:
+        _write_current(catalog.directory, version)
+    return version
+
+
+def _write_current(directory, version):
+    """Aponta o catálogo para a versão indicada de forma atômica e apaga as versões antigas
+
+    Ficam a versão nova e a anterior (das sessões que ainda a leem); a data
+    de modificação do diretório marca quando cada versão foi ativada ou
+    usada pela última vez (veja touch_version).
+    """
+    previous = current_version(directory)
+    touch_version(os.path.join(directory, version))
+    fd, tmp_path = tempfile.mkstemp(prefix='.current-', dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(directory, 'CURRENT'))
+    if previous is not None and previous != version:
+        prune_versions(directory, (version, previous))
+
+
+def touch_version(path):
+    """Marca o diretório de uma versão como usado agora, adiando sua remoção
+
+    Quem abre uma versão e o CatalogSource a cada rerun (com intervalo) a
+    marcam, então uma versão que algum processo ainda lê não é apagada.
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        # Versão já apagada ou diretório de outro usuário: nada a adiar
+        pass
+
+
+def prune_versions(directory, keep):
+    """Apaga as versões do catálogo fora de `keep` sem uso há mais de PRUNE_GRACE_SECONDS
+
+    Só diretórios com manifest.json contam como versões; os de preparação
+    (com ponto no início) ficam com quem os criou. Devolve as versões apagadas.
+    """
+    cutoff = time.time() - PRUNE_GRACE_SECONDS
+    removed = []
+    for entry in os.scandir(directory):
+        if entry.name in keep or entry.name.startswith('.') or not entry.is_dir():
+            continue
+        if not os.path.exists(os.path.join(entry.path, 'manifest.json')):
+            continue
+        if entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.name)
+    return removed
+
+
+def current_version(directory):
+    """Retorna a versão ativa do catálogo ou None se ele ainda não existe"""
+    try:
+        with open(os.path.join(directory, 'CURRENT')) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+class ColumnarCatalog(Mapping):
+    """Catálogo somente leitura com colunas mapeadas em memória a partir do disco
+
+    Expõe a mesma interface nome -> registro do antigo dict de dicts, mas os
+    dados ficam nas páginas do arquivo e são compartilhados por todas as
+    sessões do processo (e pelo cache de páginas do sistema operacional).
+    """
+
+    def __init__(self, directory, version=None):
+        version = version or current_version(directory)
+        if version is None:
+            raise FileNotFoundError(f"Nenhum catálogo encontrado em {directory}")
+        self.directory = directory
+        self.path = os.path.join(directory, version)
+        with open(os.path.join(self.path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.version = manifest['version']
+        self.schema = [(c['name'], c['kind']) for c in manifest['columns']]
+        self.units = {c['name']: c.get('unit') for c in manifest['columns']}
+        touch_version(self.path)
+        self.names = self._load('names')
+        self._names_sorted = self._load('names_sorted')
+        self._names_order = self._load('names_order')
+        # Catálogos gravados antes do hash por linha não têm esta coluna
+        has_hashes = os.path.exists(os.path.join(self.path, 'row_hash.npy'))
+        self.row_hashes = self._load('row_hash') if has_hashes else None
+        self._columns = {}
+        self._vocabs = {}
+        for column, kind in self.schema:
+            self._columns[column] = self._load(column)
+            if kind == 'category':
+                self._vocabs[column] = self._load(column + '.vocab')
+            elif kind in TEXT_KINDS and os.path.exists(os.path.join(self.path, column + '.offsets.npy')):
+                # Versões gravadas antes dos textos de tamanho variável têm arrays '<U'
+                self._columns[column] = TextColumn(self._columns[column], self._load(column + '.offsets'))
+        self._kinds = dict(self.schema)
+
+    def _load(self, key):
+        return np.load(os.path.join(self.path, key + '.npy'), mmap_mode='r')
+
+    def column(self, column):
+        """Array bruto da coluna (códigos no caso de colunas categóricas, TextColumn nas de texto)"""
+        return self._columns[column]
+
+    def unit(self, column):
+        """Unidade declarada da coluna numérica (None se não houver)"""
+        return self.units.get(column)
+
+    def vocabulary(self, column):
+        """Valores distintos de uma coluna categórica, na ordem dos códigos"""
+        return self._vocabs[column]
+
+    def index_of(self, name):
+        """Posição de um produto nas colunas, via busca binária nos nomes ordenados"""
+        pos = int(np.searchsorted(self._names_sorted, name))
+        if pos >= len(self._names_sorted) or self._names_sorted[pos] != name:
+            raise KeyError(name)
+        return int(self._names_order[pos])
+
+    def name_order(self):
+        """Posições dos itens em ordem de nome (a permutação gravada com a versão)"""
+        return np.asarray(self._names_order)
+
+    def indices_of(self, names):
+        """Posições de vários itens de uma vez (-1 para nomes que não existem)"""
+        names = np.asarray(names, dtype=str)
+        pos = np.searchsorted(self._names_sorted, names)
+        pos = np.minimum(pos, len(self._names_sorted) - 1)
+        found = np.asarray(self._names_sorted)[pos] == names if len(self._names_sorted) else np.zeros(len(names), bool)
+        return np.where(found, np.asarray(self._names_order)[pos], -1)
+
+    def fingerprint(self, names):
+        """Identifica o conteúdo atual de um conjunto de itens (em ordem de nome)
+
+        Muda só quando algum desses itens muda, então caches por seleção
+        continuam válidos entre versões do catálogo que não os tocaram.
+        """
+        names = sorted(names)
+        if self.row_hashes is None:
+            return (self.version, *names)
+        return tuple(int(self.row_hashes[self.index_of(name)]) for name in names)
+
+    def value(self, index, column):
+        """Valor Python de uma célula"""
+        kind = self._kinds[column]
+        raw = self._columns[column][index]
+        if kind == 'category':
+            return str(self._vocabs[column][raw])
+        if kind == 'int':
+            return int(raw)
+        if kind == 'float':
+            return float(raw)
+        if kind == 'json':
+            return json.loads(str(raw))
+        return str(raw)
+
+    def record(self, index):
+        """Monta o registro no mesmo formato do antigo dict de produtos"""
+        return {column: self.value(index, column) for column, _ in self.schema}
+
+    def __getitem__(self, name):
+        return self.record(self.index_of(name))
+
+    def __contains__(self, name):
+        try:
+            self.index_of(name)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for name in self.names:
+            yield str(name)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class MetricColumns:
+    """Valores numéricos das colunas sobre qualquer backend (mixin dos catálogos)
+
+    Versões gravadas antes de uma coluna nova não a têm: os valores saem NaN.
+    """
+
+    def has_column(self, column):
+        """Se a versão tem a coluna (as gravadas antes de uma coluna nova não têm)"""
+        return any(name == column for name, _ in self.schema)
+
+    def metric(self, column, indices=None):
+        """Valores numéricos de uma coluna (opcionalmente só de algumas linhas)"""
+        if not self.has_column(column):
+            return np.full(len(self) if indices is None else len(indices), np.nan)
+        values = self.column(column)
+        return values if indices is None else np.asarray(values[indices])
+
+
+def open_catalog(directory, seed, schema, catalog_class=ColumnarCatalog):
+    """Abre o catálogo do disco, gravando os dados iniciais na primeira execução"""
+    if current_version(directory) is None:
+        # Só gravamos a semente quando não há catálogo; catálogos reais
+        # importados para o diretório nunca são sobrescritos por ela
+        write_catalog(directory, seed(), schema)
+    return catalog_class(directory)
+
+
+def changed_rows(old, new):
+    """Nomes incluídos, removidos ou alterados entre duas versões do catálogo"""
+    if old is None or old.row_hashes is None or new.row_hashes is None:
+        return set(map(str, old.names if old is not None else [])) | set(map(str, new.names))
+    common, old_idx, new_idx = np.intersect1d(
+        np.asarray(old.names), np.asarray(new.names), assume_unique=True, return_indices=True
+    )
+    modified = common[np.asarray(old.row_hashes)[old_idx] != np.asarray(new.row_hashes)[new_idx]]
+    added = np.setdiff1d(np.asarray(new.names), common, assume_unique=True)
+    removed = np.setdiff1d(np.asarray(old.names), common, assume_unique=True)
+    return set(map(str, np.concatenate([modified, added, removed])))
+
+
+def _parse_cell(value, kind):
+    """Converte uma célula lida de CSV/Parquet para o tipo da coluna"""
+    if kind == 'int':
+        return int(value)
+    if kind == 'float':
+        return float(value)
+    if kind == 'json':
+        return json.loads(value) if isinstance(value, str) else value
+    return str(value)
+
+
+def read_records(path, schema):
+    """Lê um arquivo de dados (JSON, JSON lines, CSV ou Parquet) como nome -> registro
+
+    JSON pode ser um objeto nome -> registro ou uma lista de registros com
+    a chave 'name'; nos formatos tabulares cada coluna do esquema é uma
+    coluna do arquivo e as colunas JSON vêm como texto.
+    """
+    kinds = {column: kind for column, kind, *_ in schema}
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return data
+        return {row.pop('name'): row for row in data}
+    if extension == '.jsonl':
+        records = {}
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    records[row.pop('name')] = row
+        return records
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+    elif extension == '.parquet':
+        # Parquet depende do pandas com pyarrow (ou fastparquet) instalado
+        import pandas as pd
+        rows = pd.read_parquet(path).to_dict('records')
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: {path}")
+    return {
+        str(row['name']): {
+            column: _parse_cell(row[column], kind)
+            for column, kind in kinds.items() if column in row
+        }
+        for row in rows
+    }
+
+
+def file_digest(path):
+    """Hash do conteúdo de um arquivo, lido em blocos"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CatalogSource:
+    """Catálogo alimentado por um arquivo de dados externo e recarregado a quente
+
+    A cada `current()` o arquivo é verificado por mtime/tamanho (um stat);
+    se mudou e o hash do conteúdo também, os registros são reimportados em uma
+    nova versão do catálogo. Os ouvintes recebem só os nomes das linhas que
+    mudaram, para invalidar apenas os caches que dependem delas. Sem o
+    arquivo, o catálogo é aberto (e semeado) como antes.
+
+    O ponteiro CURRENT também é vigiado (outro stat), então versões
+    publicadas por fora, como as do import_feed.py, entram do mesmo jeito.
+    """
+
+    def __init__(self, directory, path, schema, seed, catalog_class=ColumnarCatalog, convert=None):
+        self.directory = directory
+        self.path = path
+        self.schema = schema
+        self.catalog_class = catalog_class
+        self.convert = convert
+        self.error = None
+        self._listeners = []
+        self._stat = None
+        self._lock = threading.Lock()
+        self.catalog = open_catalog(directory, seed, schema, catalog_class)
+        self._pointer = self._pointer_stat()
+        self._touched = time.monotonic()
+
+    def on_change(self, listener):
+        """Registra uma função chamada com o conjunto de nomes alterados a cada recarga"""
+        self._listeners.append(listener)
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _pointer_stat(self):
+        try:
+            return os.stat(os.path.join(self.directory, 'CURRENT')).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def current(self):
+        """Catálogo atual, reimportando o arquivo de dados se ele mudou"""
+        stat = self._file_stat()
+        pointer = self._pointer_stat()
+        if (stat is None or stat == self._stat) and pointer == self._pointer:
+            self._touch()
+            return self.catalog
+        with self._lock:
+            if stat is not None and stat != self._stat:
+                self._reload(stat)
+            pointer = self._pointer_stat()
+            if pointer != self._pointer:
+                self._pointer = pointer
+                version = current_version(self.directory)
+                if version is not None:
+                    self._switch(version)
+        self._touch()
+        return self.catalog
+
+    def _touch(self):
+        """Renova a marca de uso da versão servida, no máximo algumas vezes por carência"""
+        now = time.monotonic()
+        if now - self._touched >= PRUNE_GRACE_SECONDS / 4:
+            self._touched = now
+            touch_version(self.catalog.path)
+
+    def _reload(self, stat):
+        marker = os.path.join(self.directory, 'SOURCE')
+        try:
+            digest = file_digest(self.path)
+            # O mesmo conteúdo já importado (por este ou outro processo)
+            try:
+                with open(marker, encoding='utf-8') as f:
+                    imported = json.load(f)
+            except FileNotFoundError:
+                imported = {}
+            version = imported.get('version') if imported.get('digest') == digest else None
+            if version is None or not os.path.isdir(os.path.join(self.directory, version)):
+                records = read_records(self.path, self.schema)
+                if self.convert:
+                    records = self.convert(records)
+                version = write_catalog(self.directory, records, self.schema)
+                fd, tmp_path = tempfile.mkstemp(prefix='.source-', dir=self.directory)
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'digest': digest, 'version': version}, f)
+                os.replace(tmp_path, marker)
+            else:
+                _write_current(self.directory, version)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            # Arquivo inválido ou gravado pela metade: continua servindo a
+            # versão anterior e tenta de novo quando o arquivo mudar outra vez
+            self.error = exc
+            self._stat = stat
+            return
+        self.error = None
+        self._stat = stat
+        self._switch(version)
+
+    def _switch(self, version):
+        if version == self.catalog.version:
+            return
+        old, self.catalog = self.catalog, self.catalog_class(self.directory, version)
+        changed = changed_rows(old, self.catalog)
+        for listener in self._listeners:
+            listener(changed)
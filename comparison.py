@@ -0,0 +1,234 @@
+import html
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Limites do cache de comparações compartilhado entre sessões
+COMPARISON_CACHE_ENTRIES = 2048
+COMPARISON_CACHE_BYTES = 64 * 1024 * 1024
+
+# Itens comparados lado a lado e no modo de comparação ampla; acima do
+# primeiro limite a tabela vira um st.dataframe e os históricos, um só gráfico
+COMPARISON_LIMIT = 4
+WIDE_COMPARISON_LIMIT = 50
+
+# Estilo de cada classe de destaque na tabela ampla (as cores do style.css)
+WIDE_CELL_STYLES = {
+    'best-price': 'background-color: #d4edda; color: #155724; font-weight: 600',
+    'most-recent': 'background-color: #cce7ff; color: #004085; font-weight: 600',
+    'premium': 'background-color: #fff3cd; color: #856404; font-weight: 600',
+    'best-performance': 'background-color: #d1ecf1; color: #0c5460; font-weight: 600',
+    'worst-performance': 'background-color: #f8d7da; color: #721c24; font-weight: 600',
+}
+
+# Altura de cada linha do st.dataframe, em pixels
+WIDE_ROW_HEIGHT = 35
+
+
+def highlight_classes(values, direction, best_class, worst_class=None):
+    """Classe de destaque de cada valor conforme a direção de "melhor", em uma passada
+
+    `direction` é 'higher', 'lower' ou 'recent' (maior é melhor, sem pior);
+    valores None (especificação ausente) nunca são destacados. Só há destaque
+    quando mais de um item está sendo comparado.
+    """
+    classes = [None] * len(values)
+    present = [v for v in values if v is not None]
+    if direction is None or len(values) < 2 or not present:
+        return classes
+    if direction == 'lower':
+        best, worst = min(present), max(present)
+    else:
+        best, worst = max(present), min(present)
+    if direction == 'recent':
+        worst_class = None
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        if value == best:
+            classes[i] = best_class
+        elif worst_class and value == worst:
+            classes[i] = worst_class
+    return classes
+
+
+def highlight_rows(values, directions):
+    """Melhor e pior valor de cada linha de uma matriz especificação x item, em uma passada vetorizada
+
+    `values` tem uma linha por especificação e uma coluna por item, com NaN
+    onde falta o valor; `directions` é a direção de cada linha. Devolve duas
+    matrizes booleanas (melhor, pior) com as regras de highlight_classes.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    signs = np.array([-1.0 if d == 'lower' else 0.0 if d is None else 1.0 for d in directions])[:, None]
+    # Com o sinal, "melhor" passa a ser sempre o maior valor da linha
+    scores = values * signs
+    present = ~np.isnan(scores) & (signs != 0) & (values.shape[1] >= 2)
+    best = present & (scores == np.where(present, scores, -np.inf).max(axis=1, keepdims=True))
+    worst = present & (scores == np.where(present, scores, np.inf).min(axis=1, keepdims=True))
+    recent = np.array([d == 'recent' for d in directions])[:, None]
+    return best, worst & ~best & ~recent
+
+
+class ComparisonMatrix:
+    """Tabela item x especificação já resolvida, com o texto e o destaque de cada célula"""
+
+    def __init__(self, label_header, columns):
+        # columns: lista de (ícone, nome, subtítulo) na ordem de exibição
+        self.label_header = label_header
+        self.columns = columns
+        self.rows = []
+
+    def add_row(self, label, texts, classes=None, strong=False):
+        """Acrescenta uma linha; `classes` tem a classe CSS de cada célula (ou None)"""
+        self.rows.append((label, texts, classes or [None] * len(texts), strong))
+
+    def reordered(self, names):
+        """Cópia com as colunas na ordem indicada (o cache guarda a ordem canônica)"""
+        positions = {column[1]: i for i, column in enumerate(self.columns)}
+        order = [positions[name] for name in names]
+        matrix = ComparisonMatrix(self.label_header, [self.columns[i] for i in order])
+        matrix.rows = [
+            (label, [texts[i] for i in order], [classes[i] for i in order], strong)
+            for label, texts, classes, strong in self.rows
+        ]
+        return matrix
+
+    def to_frame(self):
+        """Textos (especificação x item) e o estilo CSS de cada célula, como dois DataFrames"""
+        index = [label for label, _, _, _ in self.rows]
+        columns = [name for _, name, _ in self.columns]
+        texts = pd.DataFrame([texts for _, texts, _, _ in self.rows], index=index, columns=columns)
+        styles = pd.DataFrame([
+            [WIDE_CELL_STYLES.get(css_class, 'font-weight: 600' if strong else '') for css_class in classes]
+            for _, _, classes, strong in self.rows
+        ], index=index, columns=columns)
+        return texts, styles
+
+    def to_html(self):
+        """HTML da tabela inteira, em uma única string"""
+        width = 100 / (2 + len(self.columns))
+        parts = ['<table class="spec-table comparison-table"><thead><tr>']
+        parts.append(f'<th class="spec-label" style="width: {2 * width:.1f}%;">{html.escape(self.label_header)}</th>')
+        for icon, name, subtitle in self.columns:
+            parts.append(
+                f'<th style="width: {width:.1f}%;">'
+                f'<div class="comparison-icon">{html.escape(icon)}</div>'
+                f'<div class="comparison-name">{html.escape(name)}</div>'
+                f'<div class="comparison-subtitle">{html.escape(subtitle)}</div></th>'
+            )
+        parts.append('</tr></thead><tbody>')
+        for label, texts, classes, strong in self.rows:
+            parts.append(f'<tr class="spec-row"><td class="spec-label">{html.escape(label)}</td>')
+            for text, css_class in zip(texts, classes):
+                cell = html.escape(text)
+                if css_class:
+                    cell = f'<div class="{css_class}">{cell}</div>'
+                elif strong:
+                    cell = f'<strong>{cell}</strong>'
+                parts.append(f'<td>{cell}</td>')
+            parts.append('</tr>')
+        parts.append('</tbody></table>')
+        return ''.join(parts)
+
+
+def render_comparison_table(matrix):
+    """Envia a tabela de comparação inteira como um único elemento"""
+    st.markdown(matrix.to_html(), unsafe_allow_html=True)
+
+
+def render_wide_comparison_table(matrix):
+    """Envia a tabela inteira como um único st.dataframe
+
+    A grade do st.dataframe só desenha as células visíveis e rola na
+    horizontal, com os rótulos das especificações fixos à esquerda, então o
+    custo de renderizar quase não muda com a quantidade de itens.
+    """
+    texts, styles = matrix.to_frame()
+    st.dataframe(
+        texts.style.apply(lambda _: styles, axis=None),
+        height=WIDE_ROW_HEIGHT * (len(texts) + 1) + 3,
+        column_config={'_index': st.column_config.Column(matrix.label_header, pinned=True)},
+    )
+
+
+def first_selected(selection, winners):
+    """Primeiro item, na ordem de seleção, entre os empatados numa recomendação"""
+    winners = set(winners)
+    for name in selection:
+        if name in winners:
+            return name
+    return None
+
+
+class ComparisonCache:
+    """Cache LRU de modelos de comparação compartilhado por todas as sessões
+
+    A chave é a seleção canônica (ordenada, então a ordem em que os itens
+    foram adicionados não importa) mais a versão dos dados desses itens (veja
+    ColumnarCatalog.fingerprint), então recarregar o catálogo só afeta as
+    seleções que contêm linhas alteradas. O modelo é
+    calculado na ordem canônica; quem renderiza reordena as colunas e desempata
+    as recomendações pela ordem de seleção. O tamanho de cada entrada é estimado
+    pelo pickle e as mais antigas são despejadas ao passar dos limites.
+
+    Como um modelo é reaproveitado entre versões, ele guarda só nomes e
+    valores, nunca posições no catálogo.
+    """
+
+    def __init__(self, max_entries=COMPARISON_CACHE_ENTRIES, max_bytes=COMPARISON_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, selection, version, compute):
+        """Modelo da seleção; `compute` recebe a seleção canônica em caso de falta"""
+        canonical = tuple(sorted(selection))
+        key = (version, canonical)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Calcula fora do lock; duas sessões podem calcular a mesma chave, sem prejuízo
+        model = compute(list(canonical))
+        size = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (model, size)
+                self._bytes += size
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+        return model
+
+    def invalidate(self, names):
+        """Remove as entradas de seleções que contêm algum dos nomes"""
+        names = set(names)
+        with self._lock:
+            stale = [key for key in self._entries if names.intersection(key[1])]
+            for key in stale:
+                _, size = self._entries.pop(key)
+                self._bytes -= size
+        return len(stale)
+
+    def stats(self):
+        """Contadores de acertos/faltas e ocupação atual"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
@@ -0,0 +1,95 @@
+import functools
+
+import numpy as np
+
+# Pontos enviados ao navegador por gráfico (cerca de um por pixel de largura)
+CHART_POINTS = 400
+
+# Quantidade máxima de séries reduzidas mantidas em memória
+DOWNSAMPLE_CACHE_SIZE = 512
+
+
+def lttb(x, y, threshold):
+    """Índices escolhidos pelo Largest-Triangle-Three-Buckets
+
+    Mantém o primeiro e o último ponto e, em cada balde intermediário, o ponto
+    que forma o maior triângulo com o ponto escolhido antes e a média do balde
+    seguinte. Cada balde é resolvido de forma vetorizada.
+    """
+    n = len(y)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        # Sem baldes intermediários: só as pontas
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_lo, next_hi = hi, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[lo:hi] - y[previous])
+            - (x[previous] - x[lo:hi]) * (avg_y - y[previous])
+        )
+        previous = lo + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax(y, buckets):
+    """Índices do mínimo e do máximo de cada balde, mais o primeiro e o último ponto
+
+    Preserva todos os extremos locais; são no máximo 2 * buckets + 2 pontos.
+    """
+    n = len(y)
+    if 2 * buckets + 2 >= n:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    size = int(np.diff(edges).max())
+    # Preenche cada balde até o mesmo tamanho para resolver todos de uma vez
+    positions = edges[:-1, None] + np.arange(size)[None, :]
+    valid = positions < edges[1:, None]
+    positions = np.minimum(positions, n - 1)
+    values = y[positions]
+    lows = np.where(valid, values, np.inf).argmin(axis=1)
+    highs = np.where(valid, values, -np.inf).argmax(axis=1)
+    rows = np.arange(buckets)
+    return np.unique(np.concatenate([[0, n - 1], positions[rows, lows], positions[rows, highs]]))
+
+
+def downsample(x, y, max_points=CHART_POINTS, method='lttb'):
+    """Reduz a série a no máximo `max_points` pontos, sem perder as pontas, o pico e o vale globais
+
+    `max_points` precisa comportar esses quatro pontos.
+    """
+    if max_points < 4:
+        raise ValueError("max_points precisa ser pelo menos 4")
+    if len(y) <= max_points:
+        return np.arange(len(y))
+    if method == 'minmax':
+        return minmax(y, (max_points - 2) // 2)
+    selected = lttb(x, y, max_points - 2)
+    extremes = [int(np.argmin(y)), int(np.argmax(y))]
+    return np.unique(np.concatenate([selected, extremes]))
+
+
+@functools.lru_cache(maxsize=DOWNSAMPLE_CACHE_SIZE)
+def downsampled_window(store, key, start, end, max_points, version):
+    """Leitura de uma janela do armazenamento já reduzida para o gráfico
+
+    Memorizada por (chave, janela, resolução); `version` muda a cada nova
+    gravação no armazenamento, o que invalida as entradas antigas.
+    """
+    timestamps, values = store.read(key, start, end)
+    keep = downsample(timestamps.astype(np.int64), values, max_points)
+    timestamps, values = timestamps[keep], values[keep]
+    values.flags.writeable = False
+    return timestamps, values
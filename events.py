@@ -0,0 +1,312 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from catalog import DATA_DIR, update_catalog
+from metrics import AGENT_CATALOG_DIR, AGENT_SCHEMA, AgentCatalog
+from sketches import QuantileSketch
+
+# Diretório padrão do estado da ingestão (rollups e posição lida de cada log)
+EVENTS_DIR = os.environ.get('AGENT_EVENTS_DIR', os.path.join(DATA_DIR, 'events'))
+
+# No modo contínuo: intervalo mínimo entre checkpoints/publicações e entre leituras dos logs
+CHECKPOINT_SECONDS = 30
+POLL_SECONDS = 1.0
+
+# Eventos lidos de um log antes de passar para o próximo
+READ_EVENTS = 100_000
+
+# Tipo de evento -> posição do contador no rollup; depois dos contadores vêm
+# a soma dos minutos dos atendimentos (tempo médio) e o sketch das durações
+# (percentis)
+EVENT_TYPES = {'atendimento': 0, 'erro': 1, 'bug': 2}
+_MINUTES = 3
+_DURATIONS = 4
+
+# Percentis de duração publicados no catálogo: coluna -> quantil
+LATENCY_QUANTILES = {'tempo_p95': 0.95, 'tempo_p99': 0.99}
+
+
+def previous_month(month):
+    """Mês anterior a um 'AAAA-MM'"""
+    year, number = int(month[:4]), int(month[5:7])
+    return f'{year - 1}-12' if number == 1 else f'{year}-{number - 1:02d}'
+
+
+class EventRollups:
+    """Rollups por agente e mês, mantidos a partir de logs JSON lines de eventos
+
+    Cada linha é um evento como {"agent": "Agente Alpha", "ts":
+    "2024-05-01T12:00:00Z", "type": "atendimento", "minutes": 2.1}, com os
+    tipos atendimento, erro e bug. Um evento custa uma atualização de
+    dicionário (mais um bucket do sketch de durações, nos atendimentos): o
+    mês é o prefixo AAAA-MM do instante. Os rollups e a posição lida de cada
+    log são gravados juntos, de forma atômica, então um reinício continua de
+    onde parou sem contar nenhum evento duas vezes.
+
+    Supõe um único processo de ingestão por diretório; vários processos
+    (cada um com seus logs e seu diretório) se combinam com `merge`.
+    """
+
+    def __init__(self, directory=EVENTS_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, 'rollups.json') if directory else None
+        # agente -> {mês: [atendimentos, erros, bugs, minutos, sketch das durações]}
+        self.rollups = {}
+        # log -> [inode, bytes já consumidos]
+        self.offsets = {}
+        self.latest_month = None
+        self.invalid = 0
+        if directory is None:
+            # Só em memória (por exemplo, a soma dos rollups de vários processos)
+            return
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        self.rollups = {
+            agent: {month: _load_counts(counts) for month, counts in months.items()}
+            for agent, months in state['rollups'].items()
+        }
+        self.offsets = state['offsets']
+        self.latest_month = state['latest_month']
+        self.invalid = state['invalid']
+
+    def add(self, event):
+        """Soma um evento ao rollup do agente no mês (O(1))"""
+        agent, ts = event['agent'], event['ts']
+        position = EVENT_TYPES[event['type']]
+        if not isinstance(agent, str) or not isinstance(ts, str):
+            raise TypeError("agente e instante devem ser texto")
+        month = ts[:7]
+        if not (month[:4].isdigit() and month[4:5] == '-' and month[5:7].isdigit()):
+            raise ValueError(f"instante inválido: {ts!r}")
+        minutes = float(event['minutes']) if position == 0 else 0.0
+
+        months = self.rollups.get(agent)
+        if months is None:
+            months = self.rollups[agent] = {}
+        counts = months.get(month)
+        if counts is None:
+            counts = months[month] = [0, 0, 0, 0.0, QuantileSketch()]
+        counts[position] += 1
+        if position == 0:
+            counts[_MINUTES] += minutes
+            counts[_DURATIONS].add(minutes)
+        if self.latest_month is None or month > self.latest_month:
+            self.latest_month = month
+
+    def tail(self, path, max_events=READ_EVENTS):
+        """Consome os eventos novos de um log a partir da última posição lida
+
+        Só linhas completas são consumidas (a última pode estar sendo escrita);
+        um log trocado (rotação) ou truncado é lido de novo desde o início.
+        Linhas inválidas são contadas e puladas. Devolve quantos eventos entraram.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return 0
+        inode, offset = self.offsets.get(path, (stat.st_ino, 0))
+        if inode != stat.st_ino or stat.st_size < offset:
+            inode, offset = stat.st_ino, 0
+        if stat.st_size == offset:
+            return 0
+
+        count = 0
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    self.add(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    self.invalid += 1
+                    continue
+                count += 1
+                if count >= max_events:
+                    break
+        self.offsets[path] = [inode, offset]
+        return count
+
+    def merge(self, other):
+        """Soma os rollups de outro processo de ingestão (contadores e sketches) a estes"""
+        for agent, months in other.rollups.items():
+            mine = self.rollups.setdefault(agent, {})
+            for month, counts in months.items():
+                if month not in mine:
+                    mine[month] = [0, 0, 0, 0.0, QuantileSketch()]
+                target = mine[month]
+                for position in range(_DURATIONS):
+                    target[position] += counts[position]
+                target[_DURATIONS].merge(counts[_DURATIONS])
+        if other.latest_month and (self.latest_month is None or other.latest_month > self.latest_month):
+            self.latest_month = other.latest_month
+        self.invalid += other.invalid
+        return self
+
+    def durations(self, agent, months):
+        """Sketch das durações de um agente somando vários meses"""
+        sketch = QuantileSketch()
+        for month in months:
+            counts = self.rollups.get(agent, {}).get(month)
+            if counts is not None:
+                sketch.merge(counts[_DURATIONS])
+        return sketch
+
+    def checkpoint(self):
+        """Grava rollups e posições dos logs de forma atômica"""
+        state = {
+            'rollups': {
+                agent: {month: counts[:_DURATIONS] + [counts[_DURATIONS].to_dict()] for month, counts in months.items()}
+                for agent, months in self.rollups.items()
+            },
+            'offsets': self.offsets,
+            'latest_month': self.latest_month,
+            'invalid': self.invalid,
+        }
+        fd, tmp_path = tempfile.mkstemp(prefix='.rollups-', dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def month_metrics(self, month):
+        """Métricas de cada agente com eventos no mês, nas colunas do catálogo"""
+        names = []
+        columns = {'atendimentos': [], 'erros': [], 'bugs': [], 'tempo': []}
+        columns.update({column: [] for column in LATENCY_QUANTILES})
+        for agent, months in self.rollups.items():
+            counts = months.get(month)
+            if counts is None:
+                continue
+            atendimentos, erros, bugs, minutes, durations = counts
+            names.append(agent)
+            columns['atendimentos'].append(atendimentos)
+            columns['erros'].append(erros)
+            columns['bugs'].append(bugs)
+            columns['tempo'].append(round(minutes / atendimentos, 1) if atendimentos else 0.0)
+            percentiles = durations.quantiles(list(LATENCY_QUANTILES.values()))
+            for column, value in zip(LATENCY_QUANTILES, percentiles):
+                columns[column].append(round(value, 1))
+        return names, {column: np.array(values) for column, values in columns.items()}
+
+    def publish(self, directory=AGENT_CATALOG_DIR, month=None):
+        """Grava as métricas de um mês no catálogo de agentes, se alguma mudou
+
+        O padrão é o último mês fechado (o anterior ao do evento mais
+        recente). Agentes sem eventos no mês mantêm os valores atuais e
+        eventos de agentes fora do catálogo são ignorados. Devolve
+        (mês, nova versão ou None, agentes alterados).
+        """
+        if month is None:
+            if self.latest_month is None:
+                return None, None, 0
+            month = previous_month(self.latest_month)
+        names, columns = self.month_metrics(month)
+        if not names:
+            return month, None, 0
+
+        catalog = AgentCatalog(directory)
+        indices = catalog.indices_of(names)
+        known = indices >= 0
+        indices = indices[known]
+        columns = {column: values[known] for column, values in columns.items()}
+        changed = np.zeros(len(indices), dtype=bool)
+        for column, values in columns.items():
+            current = catalog.metric(column, indices)
+            # NaN (percentil ainda desconhecido) conta como igual a NaN
+            changed |= (current != values) & ~(np.isnan(current) & np.isnan(values))
+        if not changed.any():
+            return month, None, 0
+        columns = {column: values[changed] for column, values in columns.items()}
+        version = update_catalog(catalog, indices[changed], columns, AGENT_SCHEMA)
+        return month, version, int(changed.sum())
+
+
+def _load_counts(counts):
+    """Contadores de um checkpoint (os gravados antes dos sketches não têm durações)"""
+    sketch = QuantileSketch.from_dict(counts[_DURATIONS]) if len(counts) > _DURATIONS else QuantileSketch()
+    return counts[:_DURATIONS] + [sketch]
+
+
+def ingest(rollups, paths, follow=False, catalog_dir=AGENT_CATALOG_DIR, month=None,
+           checkpoint_seconds=CHECKPOINT_SECONDS, merge_dirs=(), publish=True, report=print):
+    """Lê os logs até o fim (ou indefinidamente, com `follow`), com checkpoints e publicação
+
+    O app só enxerga versões completas do catálogo (seguindo o ponteiro
+    CURRENT), então os dashboards continuam respondendo durante a ingestão.
+    `merge_dirs` são diretórios de estado de outros processos de ingestão,
+    somados a estes rollups (a partir do último checkpoint deles) antes de
+    cada publicação.
+    """
+    pending = 0
+    start = last_checkpoint = time.monotonic()
+    while True:
+        read = sum(rollups.tail(path) for path in paths)
+        pending += read
+        now = time.monotonic()
+        done = not follow and read == 0
+        if done or pending and now - last_checkpoint >= checkpoint_seconds:
+            if pending:
+                rollups.checkpoint()
+            status = "sem publicação"
+            if publish:
+                combined = rollups
+                if merge_dirs:
+                    combined = EventRollups(None).merge(rollups)
+                    for directory in merge_dirs:
+                        combined.merge(EventRollups(directory))
+                month_published, version, changed = combined.publish(catalog_dir, month)
+                status = f"mês {month_published}: " + (
+                    f"{changed:,} agentes atualizados (versão {version})" if version else "sem mudanças"
+                )
+            rate = pending / max(now - last_checkpoint, 1e-9)
+            report(f"{pending:,} eventos ({rate:,.0f}/s), {rollups.invalid:,} inválidos no total; "
+                   f"{status} [{now - start:.0f} s]")
+            pending, last_checkpoint = 0, now
+        if done:
+            return
+        if read == 0:
+            time.sleep(POLL_SECONDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingere logs de eventos dos agentes em rollups mensais e publica as métricas")
+    parser.add_argument('logs', nargs='+', help="Logs JSON lines de eventos (um evento por linha)")
+    parser.add_argument('--follow', action='store_true', help="Continua acompanhando os logs (como tail -f)")
+    parser.add_argument('--month', help="Mês publicado (AAAA-MM); padrão: o último mês fechado")
+    parser.add_argument('--catalog-dir', default=AGENT_CATALOG_DIR, help="Diretório do catálogo de agentes")
+    parser.add_argument('--events-dir', default=EVENTS_DIR, help="Diretório do estado da ingestão")
+    parser.add_argument('--checkpoint-seconds', type=float, default=CHECKPOINT_SECONDS,
+                        help="Intervalo entre checkpoints no modo contínuo")
+    parser.add_argument('--merge', nargs='+', default=[], metavar='EVENTS_DIR',
+                        help="Estado de outros processos de ingestão, somado antes de publicar")
+    parser.add_argument('--no-publish', action='store_true',
+                        help="Só mantém os rollups (um processo com --merge publica a soma)")
+    args = parser.parse_args()
+
+    rollups = EventRollups(args.events_dir)
+    paths = [os.path.abspath(path) for path in args.logs]
+    try:
+        ingest(rollups, paths, args.follow, args.catalog_dir, args.month, args.checkpoint_seconds,
+               args.merge, not args.no_publish)
+    except FileNotFoundError as exc:
+        raise SystemExit(str(exc))
+    except KeyboardInterrupt:
+        # Sem checkpoint aqui: o último gravado é consistente e a próxima
+        # execução relê dos logs só o que veio depois dele
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import numpy as np
+
+# Tabela de contagem de bits para versões do NumPy sem bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+# Acima desta quantidade de valores as contagens usam bincount em vez de popcount
+_POPCOUNT_MAX_VALUES = 16
+
+# Bitmaps de faixas guardados por índice (as faixas atuais dos sliders)
+_RANGE_CACHE_ENTRIES = 16
+
+
+def popcount(words, axis=None):
+    """Conta os bits ligados de um bitmap em palavras de 64 bits"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=axis, dtype=np.int64)
+    bits = _POPCOUNT_TABLE[words.view(np.uint8)]
+    if axis is None:
+        return bits.sum(dtype=np.int64)
+    return bits.reshape(words.shape[0], -1).sum(axis=1, dtype=np.int64)
+
+
+class FacetIndex:
+    """Índice de bitmaps (um bitset por valor de cada faceta)
+
+    Os bitmaps ficam em palavras de 64 bits, então um filtro vira um AND
+    entre arrays de n/64 palavras e as contagens de cada opção são popcounts.
+    Colunas numéricas filtradas por faixa guardam os valores ordenados (e a
+    permutação que os ordena): uma faixa são duas buscas binárias, e só as
+    linhas dentro dela viram bits do bitmap que entra no AND.
+    """
+
+    def __init__(self, size, facets, ranges=None):
+        self.size = size
+        self.nwords = (size + 63) // 64
+        self.vocabs = {}
+        self.codes = {}
+        self.bitmaps = {}
+        rows = np.arange(size)
+        byte_index = rows >> 3
+        bit_value = (0x80 >> (rows & 7)).astype(np.uint8)
+        for facet, (codes, vocab) in facets.items():
+            bitmaps = np.zeros((len(vocab), self.nwords), dtype=np.uint64)
+            # Cada linha liga exatamente um bit, na linha do seu valor (ordem do packbits)
+            np.bitwise_or.at(bitmaps.view(np.uint8), (np.asarray(codes), byte_index), bit_value)
+            self.vocabs[facet] = [str(v) for v in vocab]
+            self.codes[facet] = codes
+            self.bitmaps[facet] = bitmaps
+        self._positions = {
+            facet: {value: i for i, value in enumerate(vocab)}
+            for facet, vocab in self.vocabs.items()
+        }
+        self.all = np.zeros(self.nwords, dtype=np.uint64)
+        packed = np.packbits(np.ones(size, dtype=bool))
+        self.all.view(np.uint8)[:len(packed)] = packed
+        self.orders = {}
+        self.sorted_values = {}
+        for column, values in (ranges or {}).items():
+            values = np.asarray(values)
+            order = np.argsort(values, kind='stable')
+            self.orders[column] = order
+            self.sorted_values[column] = values[order]
+        self._empty = np.zeros(self.nwords, dtype=np.uint64)
+        self._totals = {}
+        self._ranges = {}
+
+    @classmethod
+    def from_catalog(cls, catalog, facets, ranges=()):
+        """Constrói o índice a partir das colunas categóricas (e das numéricas, para faixas) de um catálogo"""
+        return cls(len(catalog), {
+            facet: (catalog.column(facet), catalog.vocabulary(facet))
+            for facet in facets
+        }, {column: catalog.column(column) for column in ranges})
+
+    @classmethod
+    def from_values(cls, columns):
+        """Constrói o índice a partir de listas de valores por faceta"""
+        encoded = {}
+        size = 0
+        for facet, values in columns.items():
+            vocab, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+            encoded[facet] = (codes, vocab)
+            size = len(codes)
+        return cls(size, encoded)
+
+    def from_rows(self, rows):
+        """Bitmap com os bits das posições indicadas ligados (custo proporcional às posições)"""
+        rows = np.asarray(rows)
+        words = np.zeros(self.nwords, dtype=np.uint64)
+        # Mesma ordem de bits do packbits: o bit mais alto de cada byte é a primeira linha
+        np.bitwise_or.at(words.view(np.uint8), rows >> 3, (0x80 >> (rows & 7)).astype(np.uint8))
+        return words
+
+    def options(self, facet):
+        """Valores distintos da faceta, em ordem alfabética"""
+        return self.vocabs[facet]
+
+    def bitmap(self, facet, value):
+        """Bitmap das linhas com o valor indicado (vazio se o valor não existe)"""
+        position = self._positions[facet].get(value)
+        if position is None:
+            return self._empty
+        return self.bitmaps[facet][position]
+
+    def bounds(self, column):
+        """Menor e maior valor de uma coluna numérica ((0, 0) num catálogo vazio)"""
+        values = self.sorted_values[column]
+        if not len(values):
+            return 0, 0
+        return values[0].item(), values[-1].item()
+
+    def range_bitmap(self, column, low, high):
+        """Bitmap das linhas com low <= valor <= high (duas buscas binárias nos valores ordenados)
+
+        Só as linhas dentro da faixa viram bits; numa faixa que cobre mais da
+        metade do catálogo, são as de fora que viram bits, e o bitmap é o
+        complemento delas. Os bitmaps das faixas recentes ficam guardados,
+        então um rerun com os mesmos sliders não refaz nenhum.
+        """
+        values = self.sorted_values[column]
+        start = int(np.searchsorted(values, low, side='left'))
+        stop = int(np.searchsorted(values, high, side='right'))
+        if stop - start == self.size:
+            return self.all
+        key = (column, start, stop)
+        bitmap = self._ranges.get(key)
+        if bitmap is None:
+            order = self.orders[column]
+            if 2 * (stop - start) <= self.size:
+                bitmap = self.from_rows(order[start:stop])
+            else:
+                bitmap = self.all & ~(self.from_rows(order[:start]) | self.from_rows(order[stop:]))
+            if len(self._ranges) >= _RANGE_CACHE_ENTRIES:
+                self._ranges.clear()
+            self._ranges[key] = bitmap
+        return bitmap
+
+    def cache_clear(self):
+        """Descarta os bitmaps de faixas guardados"""
+        self._ranges.clear()
+
+    def mask(self, selections, exclude=None):
+        """AND dos bitmaps das facetas selecionadas (None significa sem filtro)
+
+        Uma tupla (mínimo, máximo) como valor é uma faixa da coluna numérica.
+        """
+        mask = self.all
+        for facet, value in selections.items():
+            if value is None or facet == exclude:
+                continue
+            if isinstance(value, tuple):
+                mask = mask & self.range_bitmap(facet, *value)
+            else:
+                mask = mask & self.bitmap(facet, value)
+        return mask
+
+    def count(self, mask):
+        """Quantidade de linhas presentes no bitmap"""
+        return int(popcount(mask))
+
+    def facet_counts(self, facet, selections):
+        """Quantos resultados cada valor da faceta deixa sob os demais filtros ativos"""
+        other = self.mask(selections, exclude=facet)
+        bitmaps = self.bitmaps[facet]
+        if other is self.all:
+            # Sem outros filtros as contagens são fixas por versão do catálogo
+            if facet not in self._totals:
+                self._totals[facet] = popcount(bitmaps, axis=1)
+            counts = self._totals[facet]
+        elif len(bitmaps) <= _POPCOUNT_MAX_VALUES:
+            counts = popcount(bitmaps & other, axis=1)
+        else:
+            # Com muitos valores é mais barato contar os códigos das linhas restantes
+            codes = np.asarray(self.codes[facet])
+            counts = np.bincount(codes[self.indices(other)], minlength=len(bitmaps))
+        return dict(zip(self.vocabs[facet], counts.tolist())), self.count(other)
+
+    def indices(self, mask):
+        """Posições (em ordem do catálogo) das linhas presentes no bitmap"""
+        return np.flatnonzero(np.unpackbits(mask.view(np.uint8), count=self.size))
+
+    def sorted_indices(self, mask, order):
+        """Posições das linhas presentes no bitmap, na ordem da permutação `order`"""
+        if mask is self.all:
+            return order
+        selected = np.unpackbits(mask.view(np.uint8), count=self.size).view(bool)
+        return order[selected[order]]
+
+
+def facet_label(all_label, counts, total):
+    """format_func de selectbox que mostra quantos resultados cada opção deixa"""
+    def label(value):
+        count = total if value == all_label else counts.get(value, 0)
+        return f"{value} ({count:,})"
+    return label
+
+
+def range_selection(state, key, bounds):
+    """Faixa guardada por um slider em `state` como filtro (None quando cobre todos os valores)
+
+    Uma faixa fora dos limites da versão atual do catálogo é descartada, e o
+    slider volta a cobrir todos os valores.
+    """
+    value = state.get(key)
+    if value is None:
+        return None
+    low, high = bounds
+    if value[0] < low or value[1] > high:
+        del state[key]
+        return None
+    return None if tuple(value) == (low, high) else tuple(value)
@@ -0,0 +1,95 @@
+import functools
+import zlib
+from collections import namedtuple
+from datetime import date, timedelta
+
+import numpy as np
+
+# Semente padrão dos históricos simulados
+HISTORY_SEED = 0
+
+# Quantidade máxima de séries simuladas mantidas em memória
+HISTORY_CACHE_SIZE = 256
+
+# Parâmetros do passeio aleatório, em frações do valor atual:
+#   start -> valor inicial; low/high -> variação por semana;
+#   floor/ceiling -> faixa permitida (fora dela o valor reinicia em reset);
+#   minimum -> piso do valor exibido
+WalkProfile = namedtuple('WalkProfile', 'start low high floor ceiling reset minimum')
+
+# Preços começam mais altos e tendem a cair
+PRICE_WALK = WalkProfile(1.15, -0.08, 0.03, 0.85, None, (0.9, 1.1), 0.8)
+
+# Custos oscilam em torno do valor atual
+COST_WALK = WalkProfile(1.05, -0.05, 0.08, 0.7, 1.3, (0.85, 1.15), 0.5)
+
+
+def clamped_walk(rng, start, steps, low, high, floor, ceiling, reset_low, reset_high):
+    """Passeio aleatório multiplicativo que reinicia dentro da faixa ao sair dela
+
+    Cada trecho entre reinícios é um único produto cumulativo das variações;
+    só é preciso recalcular a partir de cada reinício, que são poucos.
+    """
+    factors = 1 + rng.uniform(low, high, steps)
+    resets = rng.uniform(reset_low, reset_high, steps)
+    ceiling = np.inf if ceiling is None else ceiling
+    values = np.empty(steps)
+    position = 0
+    level = start
+    while position < steps:
+        walk = level * np.cumprod(factors[position:])
+        outside = (walk < floor) | (walk > ceiling)
+        if not outside.any():
+            values[position:] = walk
+            break
+        hit = int(np.argmax(outside))
+        values[position:position + hit] = walk[:hit]
+        level = resets[position + hit]
+        values[position + hit] = level
+        position += hit + 1
+    return values
+
+
+def history_dates(months, end):
+    """Datas semanais (datetime64) cobrindo os últimos meses até a data final
+
+    São datas de verdade, como as do armazenamento de observações, então as
+    duas fontes se misturam no mesmo eixo e ordenam pela data.
+    """
+    start = np.datetime64(end - timedelta(days=months * 30), 'D')
+    dates = start + np.arange(months * 4) * np.timedelta64(7, 'D')
+    dates.flags.writeable = False
+    return dates
+
+
+@functools.lru_cache(maxsize=HISTORY_CACHE_SIZE)
+def simulated_history(name, current, months, seed, profile, end):
+    """Série simulada determinística por item, memorizada com despejo LRU
+
+    A semente combina `seed` com um hash estável do nome, então o mesmo item
+    gera sempre o mesmo gráfico (o hash() do Python muda a cada processo).
+    """
+    rng = np.random.default_rng([seed, zlib.crc32(name.encode('utf-8'))])
+    reset_low, reset_high = profile.reset
+    values = clamped_walk(
+        rng,
+        current * profile.start,
+        months * 4,
+        profile.low,
+        profile.high,
+        current * profile.floor,
+        None if profile.ceiling is None else current * profile.ceiling,
+        current * reset_low,
+        current * reset_high,
+    )
+    values = np.maximum(values, current * profile.minimum)
+
+    # Garantir que o último valor seja o atual
+    values[-1] = current
+    values.flags.writeable = False
+    return history_dates(months, end), values
+
+
+def today():
+    """Data de referência dos históricos (faz parte da chave do cache)"""
+    return date.today()
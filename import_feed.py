@@ -0,0 +1,291 @@
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from catalog import TEXT_KINDS, catalog_version, encode_text, publish_catalog, row_hash
+from products import PRODUCT_CATALOG_DIR, PRODUCT_SCHEMA, validate_product
+
+# Linhas validadas acumuladas antes de virar um lote colunar no disco
+CHUNK_ROWS = 50_000
+
+# Erros de validação listados no relatório (por arquivo)
+MAX_REPORTED_ERRORS = 20
+
+# Acima desta fração de linhas inválidas a importação é abortada
+MAX_INVALID_RATIO = 0.01
+
+
+def _open_feed(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', newline='', encoding='utf-8')
+    return open(path, newline='', encoding='utf-8')
+
+
+def feed_rows(path):
+    """Linhas de um feed CSV ou JSON lines (opcionalmente .gz), uma de cada vez
+
+    Produz (número da linha, linha); uma linha de JSON inválido vem como None.
+    """
+    extension = os.path.splitext(path[:-3] if path.endswith('.gz') else path)[1].lower()
+    if extension not in ('.csv', '.jsonl', '.ndjson'):
+        raise ValueError(f"Formato de feed não suportado: {path}")
+    with _open_feed(path) as f:
+        if extension == '.csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+def name_hash(name):
+    """Hash de 64 bits de um nome, usado para achar os repetidos sem juntar todos os nomes"""
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _save_chunk(path, names, records):
+    """Grava um lote validado como colunas .npy (categorias ainda em texto)"""
+    os.makedirs(path)
+    np.save(os.path.join(path, 'names.npy'), np.array(names, dtype=str))
+    np.save(os.path.join(path, 'name_hash.npy'), np.array([name_hash(n) for n in names], dtype=np.uint64))
+    np.save(os.path.join(path, 'row_hash.npy'), np.array([row_hash(r) for r in records], dtype=np.uint64))
+    for column, kind, *_ in PRODUCT_SCHEMA:
+        values = [r[column] for r in records]
+        if kind == 'json':
+            values = [json.dumps(v, ensure_ascii=False) for v in values]
+        dtype = {'int': np.int64, 'float': np.float64}.get(kind, str)
+        np.save(os.path.join(path, column + '.npy'), np.array(values, dtype=dtype))
+
+
+def import_file(path, staging, file_index, chunk_rows=CHUNK_ROWS):
+    """Valida um feed em lotes de tamanho fixo, gravando cada lote no diretório de preparação
+
+    Roda em um processo do pool; só um lote fica em memória por vez.
+    """
+    start = time.perf_counter()
+    rows = invalid = 0
+    errors, parts = [], []
+    names, records = [], []
+    for line_number, row in feed_rows(path):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("linha não é um objeto JSON válido")
+            name, record = validate_product(row)
+        except ValueError as exc:
+            invalid += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(f"{path}:{line_number}: {exc}")
+            continue
+        names.append(name)
+        records.append(record)
+        if len(names) >= chunk_rows:
+            parts.append(os.path.join(staging, f'{file_index:04d}-{len(parts):06d}'))
+            _save_chunk(parts[-1], names, records)
+            rows += len(names)
+            names, records = [], []
+    if names:
+        parts.append(os.path.join(staging, f'{file_index:04d}-{len(parts):06d}'))
+        _save_chunk(parts[-1], names, records)
+        rows += len(names)
+    return {
+        'path': path,
+        'rows': rows,
+        'invalid': invalid,
+        'errors': errors,
+        'parts': parts,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def _fixed_width(values):
+    """Texto com a largura exata do maior valor (como um np.array(lista, dtype=str))"""
+    width = int(np.char.str_len(values).max()) if len(values) else 1
+    return values.astype(f'<U{max(width, 1)}')
+
+
+def build_catalog(directory, parts, schema=PRODUCT_SCHEMA):
+    """Funde os lotes em uma nova versão do catálogo, coluna por coluna
+
+    Nomes repetidos seguem o dicionário do write_catalog: o item fica na
+    posição da primeira ocorrência com os valores da última (feeds
+    posteriores sobrescrevem os anteriores). Os repetidos são achados pelos
+    hashes de 64 bits dos nomes (8 bytes por linha), e só os nomes das linhas
+    repetidas são comparados, para descartar colisões; todas as colunas,
+    inclusive os nomes, são copiadas lote a lote para arrays mapeados do
+    disco. A versão resultante é a mesma que write_catalog daria para esses
+    registros.
+    """
+    def load(part, key):
+        return np.load(os.path.join(part, key + '.npy'), mmap_mode='r')
+
+    lengths = [len(load(part, 'names')) for part in parts]
+    starts = np.concatenate([[0], np.cumsum(lengths)])
+    hashes = np.concatenate([load(part, 'name_hash') for part in parts])
+    _, first, inverse, counts = np.unique(hashes, return_index=True, return_inverse=True, return_counts=True)
+    _, last = np.unique(hashes[::-1], return_index=True)
+    # Linha de origem (a última ocorrência) de cada item, na ordem das primeiras ocorrências
+    source = (len(hashes) - 1 - last)[np.argsort(first)]
+    total = len(source)
+
+    # Linhas com hash repetido precisam ter o mesmo nome (senão é colisão)
+    repeated = np.flatnonzero(counts[inverse] > 1)
+    owners = np.searchsorted(starts, repeated, side='right') - 1
+    seen = {}
+    for part in np.unique(owners).tolist():
+        rows = repeated[owners == part]
+        chunk_names = np.asarray(load(parts[part], 'names'))[rows - starts[part]]
+        for group, name in zip(inverse[rows].tolist(), chunk_names.tolist()):
+            if seen.setdefault(group, name) != name:
+                raise ValueError(f"Colisão de hash entre os nomes {seen[group]!r} e {name!r}")
+    del hashes, inverse, seen
+
+    # Por lote: as linhas dele que entram e as posições delas no catálogo
+    by_source = np.argsort(source)
+    sorted_source = source[by_source]
+    bounds = np.searchsorted(sorted_source, starts)
+    selected = [
+        (part, sorted_source[lo:hi] - start, by_source[lo:hi])
+        for part, start, lo, hi in zip(parts, starts, bounds, bounds[1:])
+    ]
+
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=directory)
+    arrays = {}
+
+    def fill(key, dtype, convert):
+        target = np.lib.format.open_memmap(os.path.join(staging, key + '.npy'), mode='w+', dtype=dtype, shape=(total,))
+        for part, rows, positions in selected:
+            target[positions] = convert(np.asarray(load(part, key))[rows])
+        target.flush()
+        arrays[key] = target
+
+    def fill_text(column):
+        # Textos de tamanho variável: uma passada monta as posições, a outra copia os bytes
+        offsets = np.lib.format.open_memmap(
+            os.path.join(staging, column + '.offsets.npy'), mode='w+', dtype=np.int64, shape=(total + 1,)
+        )
+        offsets[0] = 0
+        for part, rows, positions in selected:
+            _, chunk_offsets = encode_text(np.asarray(load(part, column))[rows].tolist())
+            offsets[positions + 1] = np.diff(chunk_offsets)
+        np.cumsum(offsets, out=offsets)
+        offsets.flush()
+        size = int(offsets[-1])
+        path = os.path.join(staging, column + '.npy')
+        if not size:
+            np.save(path, np.zeros(0, dtype=np.uint8))
+            data = np.load(path)
+        else:
+            data = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(size,))
+            for part, rows, positions in selected:
+                chunk, chunk_offsets = encode_text(np.asarray(load(part, column))[rows].tolist())
+                # Cada byte vai para o início do seu texto no catálogo mais o deslocamento dentro dele
+                shift = np.repeat(np.asarray(offsets[positions]) - chunk_offsets[:-1], np.diff(chunk_offsets))
+                data[np.arange(len(chunk)) + shift] = chunk
+            data.flush()
+        arrays[column] = data
+        arrays[column + '.offsets'] = offsets
+
+    # Largura do maior nome, como num np.array(nomes, dtype=str); cada lote
+    # já tem a largura do seu maior nome, e os repetidos têm o mesmo tamanho
+    width = max(load(part, 'names').dtype.itemsize // 4 for part in parts)
+    fill('names', f'<U{width}', lambda values: values)
+    names = arrays['names']
+    # A ordenação por nome lê os nomes pelo mapeamento do arquivo
+    order = np.argsort(names, kind='stable').astype(np.int64)
+    np.save(os.path.join(staging, 'names_order.npy'), order)
+    arrays['names_order'] = order
+    names_sorted = np.lib.format.open_memmap(
+        os.path.join(staging, 'names_sorted.npy'), mode='w+', dtype=names.dtype, shape=(total,)
+    )
+    for start in range(0, total, CHUNK_ROWS):
+        names_sorted[start:start + CHUNK_ROWS] = names[order[start:start + CHUNK_ROWS]]
+    names_sorted.flush()
+    arrays['names_sorted'] = names_sorted
+
+    fill('row_hash', np.uint64, lambda values: values)
+    kinds = {column: kind for column, kind, *_ in schema}
+    for column, kind in kinds.items():
+        if kind == 'category':
+            vocab = np.unique(np.concatenate([np.unique(np.asarray(load(p, column))[rows]) for p, rows, _ in selected]))
+            vocab = _fixed_width(vocab)
+            np.save(os.path.join(staging, column + '.vocab.npy'), vocab)
+            arrays[column + '.vocab'] = vocab
+            fill(column, np.int32, lambda values: np.searchsorted(vocab, values))
+        elif kind in TEXT_KINDS:
+            fill_text(column)
+        else:
+            fill(column, np.int64 if kind == 'int' else np.float64, lambda values: values)
+
+    version = catalog_version(arrays, schema)
+    del arrays
+    publish_catalog(directory, staging, version, total, schema)
+    return version, total
+
+
+def import_feeds(paths, directory=PRODUCT_CATALOG_DIR, workers=None, chunk_rows=CHUNK_ROWS,
+                 max_invalid_ratio=MAX_INVALID_RATIO, report=print):
+    """Importa feeds de produtos em paralelo (um arquivo por processo) e publica o catálogo"""
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.import-', dir=directory)
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                import_file, paths, [staging] * len(paths), range(len(paths)), [chunk_rows] * len(paths)
+            ))
+        for result in results:
+            rate = result['rows'] / result['seconds'] if result['seconds'] else 0
+            report(f"{result['path']}: {result['rows']:,} linhas válidas, {result['invalid']:,} inválidas "
+                   f"em {result['seconds']:.1f} s ({rate:,.0f} linhas/s)")
+            for error in result['errors']:
+                report(f"  {error}")
+
+        rows = sum(r['rows'] for r in results)
+        invalid = sum(r['invalid'] for r in results)
+        if not rows:
+            raise ValueError("Nenhuma linha válida nos feeds; catálogo mantido")
+        if invalid / (rows + invalid) > max_invalid_ratio:
+            raise ValueError(f"{invalid:,} linhas inválidas ({invalid / (rows + invalid):.1%}); catálogo mantido")
+
+        parts = [part for result in results for part in result['parts']]
+        version, total = build_catalog(directory, parts)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    elapsed = time.perf_counter() - start
+    report(f"Catálogo {version}: {total:,} produtos ({rows - total:,} nomes repetidos) "
+           f"em {elapsed:.1f} s ({rows / elapsed:,.0f} linhas/s)")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa feeds de produtos (CSV/JSON lines, opcionalmente .gz) para o catálogo")
+    parser.add_argument('feeds', nargs='+', help="Arquivos de feed; em nomes repetidos vale o último arquivo")
+    parser.add_argument('--catalog-dir', default=PRODUCT_CATALOG_DIR, help="Diretório do catálogo de produtos")
+    parser.add_argument('--workers', type=int, default=None, help="Processos em paralelo (padrão: um por CPU)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Linhas por lote em memória")
+    parser.add_argument('--max-invalid-ratio', type=float, default=MAX_INVALID_RATIO,
+                        help="Fração de linhas inválidas acima da qual nada é publicado")
+    args = parser.parse_args()
+    try:
+        import_feeds(args.feeds, args.catalog_dir, args.workers, args.chunk_rows, args.max_invalid_ratio)
+    except ValueError as exc:
+        raise SystemExit(str(exc))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import math
+import os
+import re
+
+import numpy as np
+
+from catalog import DATA_DIR, ColumnarCatalog, MetricColumns
+from skyline import skyline
+from sqlstore import SqliteCatalog
+
+# Métricas exibidas na comparação de agentes:
+#   (rótulo, coluna tipada, tipo, unidade, direção de "melhor")
+# A direção 'higher'/'lower' define o destaque de melhor/pior valor; 'recent'
+# destaca o ano mais recente e None não destaca nada.
+AGENT_METRICS = [
+    ('Ano de Implantação', 'deployment_year', 'int', None, 'recent'),
+    ('Quantidade de Atendimentos', 'atendimentos', 'int', '/mês', 'higher'),
+    ('Custo Total', 'cost', 'int', 'R$/mês', None),
+    ('Total de Erros', 'erros', 'int', '/mês', 'lower'),
+    ('Total de Bugs', 'bugs', 'int', '/mês', 'lower'),
+    ('Tempo Médio de Atendimento', 'tempo', 'float', 'min', 'lower'),
+    ('Tempo de Atendimento p95', 'tempo_p95', 'float', 'min', 'lower'),
+    ('Tempo de Atendimento p99', 'tempo_p99', 'float', 'min', 'lower'),
+]
+
+# Métricas que podem faltar nos dados: ficam NaN (sem texto e sem destaque)
+# até os sketches de duração dos eventos publicarem um valor
+OPTIONAL_METRICS = {'tempo_p95', 'tempo_p99'}
+
+# Coluna de latência usada no score -> rótulo da opção
+SCORE_LATENCIES = {'tempo': 'Média', 'tempo_p95': 'p95', 'tempo_p99': 'p99'}
+
+# Ordenações da lista de agentes: (chave, decrescente) -> rótulo da opção;
+# o score segue a latência escolhida
+AGENT_SORTS = {
+    None: 'Ordem do catálogo',
+    ('cost', False): 'Menor custo',
+    ('cost', True): 'Maior custo',
+    ('deployment_year', True): 'Implantação mais recente',
+    ('deployment_year', False): 'Implantação mais antiga',
+    ('score', True): 'Maior score de performance',
+    ('score', False): 'Menor score de performance',
+    ('name', False): 'Nome (A–Z)',
+    ('name', True): 'Nome (Z–A)',
+}
+
+# Métricas da fronteira de Pareto da frota: (coluna, direção de "melhor");
+# o tempo segue a latência escolhida para o score
+FRONTIER_METRICS = [
+    ('cost', 'lower'),
+    ('atendimentos', 'higher'),
+    ('erros', 'lower'),
+    ('bugs', 'lower'),
+    ('tempo', 'lower'),
+]
+
+AGENT_CATALOG_DIR = os.environ.get('AGENT_CATALOG_DIR', os.path.join(DATA_DIR, 'agents'))
+
+# Esquema das colunas do catálogo de agentes (na ordem dos registros)
+AGENT_SCHEMA = [
+    ('provider', 'category'),
+    ('category', 'category'),
+    ('cost', 'int', 'R$/mês'),
+    ('deployment_year', 'int'),
+    ('deployment_date', 'str'),
+    ('icon', 'category'),
+    ('atendimentos', 'int', '/mês'),
+    ('erros', 'int', '/mês'),
+    ('bugs', 'int', '/mês'),
+    ('tempo', 'float', 'min'),
+    ('tempo_p95', 'float', 'min'),
+    ('tempo_p99', 'float', 'min'),
+]
+
+_METRIC_PATTERN = re.compile(r'^\s*(R\$)?\s*([\d.,]+)\s*(.*?)\s*$')
+
+
+def parse_metric(text):
+    """Converte um texto como '15,000/mês', 'R$ 2,500/mês' ou '2.3 min' em (valor, unidade)"""
+    if isinstance(text, (int, float)):
+        return text, None
+    match = _METRIC_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Métrica em formato desconhecido: {text!r}")
+    currency, number, unit = match.groups()
+    number = number.replace(',', '')
+    value = float(number) if '.' in number else int(number)
+    if currency:
+        unit = 'R$' + unit
+    return value, unit or None
+
+
+def format_metric(value, unit):
+    """Texto de exibição de um valor tipado, no formato original do catálogo"""
+    if unit == 'R$/mês':
+        return f"R$ {value:,}/mês"
+    if unit == '/mês':
+        return f"{value:,}/mês"
+    if unit == 'min':
+        return f"{value:g} min"
+    return f"{value}"
+
+
+def agent_record_from_source(record):
+    """Achata um registro de agente com métricas em texto em colunas tipadas"""
+    typed = {key: value for key, value in record.items() if key != 'specifications'}
+    specs = record.get('specifications', {})
+    for label, column, kind, unit, _ in AGENT_METRICS:
+        if column in typed:
+            continue
+        if label not in specs:
+            if column in OPTIONAL_METRICS:
+                typed[column] = math.nan
+            continue
+        value, parsed_unit = parse_metric(specs[label])
+        if unit is not None and parsed_unit != unit:
+            raise ValueError(f"Unidade inesperada para {label}: {parsed_unit!r}")
+        typed[column] = float(value) if kind == 'float' else int(value)
+    return typed
+
+
+def agent_source_records(source):
+    """Converte o dicionário de agentes com métricas em texto para registros tipados"""
+    return {name: agent_record_from_source(record) for name, record in source.items()}
+
+
+class AgentRecords(MetricColumns):
+    """Métricas e registros de agentes sobre as colunas de qualquer backend
+
+    As métricas são analisadas uma única vez, quando o catálogo é gravado;
+    o dicionário 'specifications' de cada registro é apenas formatado a
+    partir das colunas quando o registro é pedido.
+    """
+
+    def specifications(self, index):
+        """Textos de exibição das métricas conhecidas de um agente"""
+        specs = {}
+        for label, column, _, unit, _ in AGENT_METRICS:
+            value = self.value(index, column) if self.has_column(column) else math.nan
+            if value != value:
+                continue
+            specs[label] = value if unit is None else format_metric(value, unit)
+        return specs
+
+    def record(self, index):
+        record = super().record(index)
+        record['specifications'] = self.specifications(index)
+        return record
+
+
+class AgentCatalog(AgentRecords, ColumnarCatalog):
+    """Catálogo de agentes com métricas em colunas numéricas"""
+
+
+class AgentSqliteCatalog(AgentRecords, SqliteCatalog):
+    """Catálogo de agentes no SQLite, indexado pelos filtros e ordenações da lista"""
+
+    # Os pares de facetas tornam contagens e páginas filtradas consultas só no índice
+    indexed = (('category', 'provider'), ('provider', 'category'), 'cost', 'deployment_year')
+
+
+def latency_values(catalog, latency='tempo'):
+    """Tempo de atendimento de toda a frota: a média ou um percentil (p95/p99)
+
+    Sem o percentil de um agente, vale a média dele.
+    """
+    tempo = np.asarray(catalog.column('tempo'), dtype=np.float64)
+    if latency != 'tempo':
+        percentile = np.asarray(catalog.metric(latency), dtype=np.float64)
+        tempo = np.where(np.isnan(percentile), tempo, percentile)
+    return tempo
+
+
+def performance_scores(catalog, latency='tempo'):
+    """Score de performance de toda a frota em uma única expressão vetorizada
+
+    Fórmula: (atendimentos * 100) / (custo + erros*10 + bugs*15 + tempo*100),
+    com `latency` escolhendo o tempo (veja latency_values).
+    """
+    atendimentos = np.asarray(catalog.column('atendimentos'), dtype=np.float64)
+    cost = np.asarray(catalog.column('cost'), dtype=np.float64)
+    erros = np.asarray(catalog.column('erros'), dtype=np.float64)
+    bugs = np.asarray(catalog.column('bugs'), dtype=np.float64)
+    tempo = latency_values(catalog, latency)
+    scores = (atendimentos * 100) / (cost + erros * 10 + bugs * 15 + tempo * 100)
+    scores.flags.writeable = False
+    return scores
+
+
+def pareto_frontier(catalog, latency='tempo'):
+    """Índices dos agentes que nenhum outro supera em todas as FRONTIER_METRICS ao mesmo tempo"""
+    columns = [
+        latency_values(catalog, latency) if column == 'tempo' else catalog.column(column)
+        for column, _ in FRONTIER_METRICS
+    ]
+    frontier = skyline(columns, [direction for _, direction in FRONTIER_METRICS])
+    frontier.flags.writeable = False
+    return frontier
+
+
+def top_k(scores, k):
+    """Índices dos k maiores scores, do maior para o menor (argpartition + sort de k)
+
+    O resultado é o de uma ordenação estável completa: empates, inclusive no
+    corte do k, ficam na ordem do catálogo, e scores NaN vêm por último.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    # Menor é melhor em `ranked`; o argpartition e o argsort põem NaN no fim
+    ranked = -scores
+    candidates = np.argpartition(ranked, k - 1)[:k]
+    # k-ésimo valor (NaN se algum dos k escolhidos for NaN)
+    threshold = ranked[candidates].max()
+    if np.isnan(threshold):
+        # Menos de k scores definidos: todos eles e os primeiros NaN
+        defined = np.flatnonzero(~np.isnan(ranked))
+        candidates = np.concatenate([defined, np.flatnonzero(np.isnan(ranked))[:k - len(defined)]])
+    elif np.count_nonzero(ranked == threshold) > np.count_nonzero(ranked[candidates] == threshold):
+        # O argpartition escolhe qualquer um dos empatados no corte: entram
+        # os melhores que o k-ésimo valor mais os primeiros empatados com ele
+        better = candidates[ranked[candidates] < threshold]
+        candidates = np.concatenate([better, np.flatnonzero(ranked == threshold)[:k - len(better)]])
+    candidates = np.sort(candidates)
+    return candidates[np.argsort(ranked[candidates], kind='stable')]
@@ -0,0 +1,50 @@
+import math
+
+import streamlit as st
+
+# Quantidade de cartões exibidos por página na lista de itens disponíveis
+PAGE_SIZE = 10
+
+
+def _change_page(state_key, delta):
+    st.session_state[state_key] += delta
+
+
+def paginate(total, key, page_size=PAGE_SIZE, reset_on=None):
+    """Guarda a página atual em st.session_state e devolve o intervalo visível
+
+    A página volta para a primeira sempre que `reset_on` muda (por exemplo,
+    quando os filtros mudam), e é limitada ao número de páginas existentes.
+    """
+    state_key = f"{key}_page"
+    filters_key = f"{key}_filters"
+    pages = max(1, math.ceil(total / page_size))
+
+    if st.session_state.get(filters_key) != reset_on:
+        st.session_state[filters_key] = reset_on
+        st.session_state[state_key] = 1
+    page = min(max(st.session_state.get(state_key, 1), 1), pages)
+    st.session_state[state_key] = page
+
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total), page, pages
+
+
+def page_controls(key, page, pages, total, start, end):
+    """Mostra o intervalo exibido e os botões de navegação entre páginas"""
+    if total == 0:
+        return
+    state_key = f"{key}_page"
+    st.caption(f"Mostrando {start + 1}–{end} de {total:,}")
+    if pages <= 1:
+        return
+    nav_cols = st.columns([1, 2, 1])
+    with nav_cols[0]:
+        st.button("◀", key=f"{key}_prev", disabled=page <= 1,
+                  on_click=_change_page, args=(state_key, -1))
+    with nav_cols[1]:
+        st.markdown(f"<div style='text-align: center;'>Página {page} de {pages}</div>",
+                    unsafe_allow_html=True)
+    with nav_cols[2]:
+        st.button("▶", key=f"{key}_next", disabled=page >= pages,
+                  on_click=_change_page, args=(state_key, 1))
@@ -0,0 +1,228 @@
+import functools
+import json
+import math
+import os
+import re
+from datetime import date
+
+import numpy as np
+
+from catalog import DATA_DIR, ColumnarCatalog, MetricColumns
+from sqlstore import SqliteCatalog
+
+# Especificações numéricas dos produtos:
+#   (rótulo, coluna tipada, unidade, direção de "melhor")
+# A direção 'higher'/'lower' define o destaque de melhor/pior valor e
+# 'recent' destaca o ano mais recente. O texto original continua nas
+# especificações (é ele que aparece na tabela); a coluna guarda o número.
+PRODUCT_SPECS = [
+    ('Ano de Lançamento', 'year', None, 'recent'),
+    ('Memória RAM', 'ram', 'GB', 'higher'),
+    ('Armazenamento', 'storage', 'GB', 'higher'),
+    ('Bateria', 'battery', 'mAh', 'higher'),
+    ('Tela', 'screen', 'pol', 'higher'),
+    ('Câmera', 'camera', 'MP', 'higher'),
+    ('Peso', 'weight', 'g', 'lower'),
+]
+
+# Unidades aceitas nos textos -> (unidade da coluna, fator de conversão)
+SPEC_UNITS = {
+    'mb': ('GB', 1 / 1024),
+    'gb': ('GB', 1),
+    'tb': ('GB', 1024),
+    'mah': ('mAh', 1),
+    '"': ('pol', 1),
+    'pol': ('pol', 1),
+    'polegadas': ('pol', 1),
+    'mp': ('MP', 1),
+    'g': ('g', 1),
+    'grama': ('g', 1),
+    'gramas': ('g', 1),
+    'kg': ('g', 1000),
+}
+
+# Esquema das colunas do catálogo de produtos (na ordem dos registros)
+PRODUCT_SCHEMA = [
+    ('brand', 'category'),
+    ('category', 'category'),
+    ('price', 'int'),
+    ('year', 'int'),
+    ('launch_date', 'str'),
+    ('specifications', 'json'),
+    ('icon', 'category'),
+    ('ram', 'float', 'GB'),
+    ('storage', 'float', 'GB'),
+    ('battery', 'float', 'mAh'),
+    ('screen', 'float', 'pol'),
+    ('camera', 'float', 'MP'),
+    ('weight', 'float', 'g'),
+]
+
+# Ordenações da lista de produtos: (chave, decrescente) -> rótulo da opção
+PRODUCT_SORTS = {
+    None: 'Ordem do catálogo',
+    ('price', False): 'Menor preço',
+    ('price', True): 'Maior preço',
+    ('year', True): 'Mais recentes',
+    ('year', False): 'Mais antigos',
+    ('value', True): 'Melhor custo-benefício',
+    ('value', False): 'Pior custo-benefício',
+    ('name', False): 'Nome (A–Z)',
+    ('name', True): 'Nome (Z–A)',
+}
+
+PRODUCT_CATALOG_DIR = os.environ.get('PRODUCT_CATALOG_DIR', os.path.join(DATA_DIR, 'products'))
+
+_SPEC_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)\s*("|[^\W\d_]+)?')
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_spec(text):
+    """Converte um texto como '8GB', '1TB', '5000 mAh', '6.7" OLED' ou '48MP + 12MP' em (valor, unidade)
+
+    Vale o primeiro número (a câmera principal, em '48MP + 12MP + 12MP'),
+    já convertido para a unidade da coluna; num número sem unidade, a
+    unidade é None. Sem número, ou com uma unidade fora de SPEC_UNITS
+    ('72 Wh', '20 horas'), o valor é NaN: ele não é lido na unidade da
+    coluna, mas também não invalida o produto.
+    """
+    if isinstance(text, (int, float)):
+        return float(text), None
+    match = _SPEC_PATTERN.search(text)
+    if not match:
+        return math.nan, None
+    number, unit = match.groups()
+    value = float(number.replace(',', '.'))
+    if unit is None:
+        return value, None
+    if unit.lower() not in SPEC_UNITS:
+        return math.nan, None
+    unit, factor = SPEC_UNITS[unit.lower()]
+    return value * factor, unit
+
+
+def product_record_from_source(record):
+    """Acrescenta ao registro as colunas tipadas das especificações (NaN onde faltam)
+
+    Só uma unidade conhecida que não é a da coluna ('8GB' na bateria)
+    levanta ValueError; unidades desconhecidas deixam a coluna em NaN.
+    """
+    typed = dict(record)
+    specs = record.get('specifications', {})
+    for label, column, unit, _ in PRODUCT_SPECS:
+        if column in typed:
+            continue
+        if label not in specs:
+            typed[column] = math.nan
+            continue
+        value, parsed_unit = parse_spec(specs[label])
+        if parsed_unit is not None and parsed_unit != unit:
+            raise ValueError(f"Unidade inesperada para {label}: {specs[label]!r}")
+        typed[column] = value
+    return typed
+
+
+def product_source_records(source):
+    """Converte o dicionário de produtos para registros com as especificações tipadas"""
+    return {name: product_record_from_source(record) for name, record in source.items()}
+
+
+class ProductRecords(MetricColumns):
+    """Especificações numéricas dos produtos sobre as colunas de qualquer backend"""
+
+    def metric(self, column, indices=None):
+        if self.has_column(column):
+            return super().metric(column, indices)
+        labels = {column: (label, unit) for label, column, unit, _ in PRODUCT_SPECS}
+        if column not in labels:
+            return super().metric(column, indices)
+        # Versões gravadas antes das colunas tipadas: converte o texto só das linhas pedidas
+        texts = self.column('specifications')
+        texts = np.asarray(texts if indices is None else texts[indices]).tolist()
+        label, unit = labels[column]
+        values = np.full(len(texts), np.nan)
+        for i, text in enumerate(texts):
+            spec = json.loads(text).get(label)
+            if spec is None:
+                continue
+            value, parsed_unit = parse_spec(spec)
+            # Unidade de outra coluna numa versão antiga: fica sem valor
+            if parsed_unit is None or parsed_unit == unit:
+                values[i] = value
+        return values
+
+
+def value_scores(catalog):
+    """Custo-benefício (ano por mil reais de preço) de todo o catálogo, como na comparação"""
+    year = np.asarray(catalog.column('year'), dtype=np.float64)
+    price = np.asarray(catalog.column('price'), dtype=np.float64)
+    return year / (price / 1000)
+
+
+class ProductCatalog(ProductRecords, ColumnarCatalog):
+    """Catálogo de produtos com as especificações numéricas em colunas"""
+
+
+class ProductSqliteCatalog(ProductRecords, SqliteCatalog):
+    """Catálogo de produtos no SQLite, indexado pelos filtros e ordenações da lista"""
+
+    # Os pares de facetas tornam contagens e páginas filtradas consultas só no índice
+    indexed = (('category', 'brand'), ('brand', 'category'), 'price', 'year')
+
+
+def _text(row, field):
+    value = row.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"campo '{field}' vazio ou ausente")
+    return value.strip()
+
+
+def _integer(row, field, low, high):
+    value = row.get(field)
+    if isinstance(value, str):
+        value = value.strip()
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"campo '{field}' não é um inteiro: {value!r}") from None
+    if isinstance(value, float) and value != number:
+        raise ValueError(f"campo '{field}' não é um inteiro: {value!r}")
+    if not low <= number <= high:
+        raise ValueError(f"campo '{field}' fora da faixa [{low}, {high}]: {number}")
+    return number
+
+
+def validate_product(row):
+    """Valida uma linha de feed e devolve (nome, registro) no formato do catálogo
+
+    Aceita os valores como texto (CSV, com as especificações em JSON) ou já
+    tipados (JSON lines). Levanta ValueError descrevendo o primeiro problema.
+    """
+    name = _text(row, 'name')
+    launch_date = _text(row, 'launch_date')
+    try:
+        date.fromisoformat(launch_date)
+    except ValueError:
+        raise ValueError(f"campo 'launch_date' não é uma data AAAA-MM-DD: {launch_date!r}") from None
+
+    specifications = row.get('specifications')
+    if isinstance(specifications, str):
+        try:
+            specifications = json.loads(specifications)
+        except ValueError:
+            raise ValueError("campo 'specifications' não é JSON válido") from None
+    if not isinstance(specifications, dict):
+        raise ValueError("campo 'specifications' deve ser um objeto")
+    for label, value in specifications.items():
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            raise ValueError(f"especificação '{label}' com valor inválido: {value!r}")
+
+    return name, product_record_from_source({
+        'brand': _text(row, 'brand'),
+        'category': _text(row, 'category'),
+        'price': _integer(row, 'price', 1, 10_000_000),
+        'year': _integer(row, 'year', 1970, 2100),
+        'launch_date': launch_date,
+        'specifications': specifications,
+        'icon': _text(row, 'icon'),
+    })
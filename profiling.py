@@ -0,0 +1,219 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Liga o perfilamento em todas as sessões (APP_PROFILE=1); numa sessão só,
+# basta abrir o app com ?perf=1 na URL
+PROFILE_ENV = os.environ.get('APP_PROFILE') == '1'
+
+# Arquivo opcional onde cada rerun perfilado é acrescentado como uma linha JSON
+PROFILE_LOG = os.environ.get('APP_PROFILE_LOG')
+
+# Quantidade de reruns mantidos no buffer circular do processo
+PROFILE_HISTORY = 200
+
+
+class _EnqueueCounter:
+    """Envolve o envio de mensagens da sessão contando elementos e bytes"""
+
+    def __init__(self, enqueue):
+        self.enqueue = enqueue
+        self.elements = 0
+        self.bytes = 0
+
+    def __call__(self, msg):
+        if msg.WhichOneof('type') == 'delta':
+            self.elements += 1
+        self.bytes += msg.ByteSize()
+        self.enqueue(msg)
+
+
+def _wrap_enqueue(ctx):
+    """Envolve o envio de mensagens do script run atual; None se o Streamlit não o expõe
+
+    `_enqueue` é um atributo privado do ScriptRunContext: sem ele (outra
+    versão do Streamlit) o perfil só perde as contagens de elementos e bytes.
+    """
+    enqueue = getattr(ctx, '_enqueue', None)
+    if enqueue is None:
+        return None
+    if isinstance(enqueue, _EnqueueCounter):
+        # Sobra de um rerun perfilado interrompido (st.rerun ou exceção)
+        enqueue = enqueue.enqueue
+    counter = _EnqueueCounter(enqueue)
+    ctx._enqueue = counter
+    return counter
+
+
+def _unwrap_enqueue(ctx):
+    """Devolve ao script run o envio original, se ele estiver envolvido"""
+    enqueue = getattr(ctx, '_enqueue', None)
+    if isinstance(enqueue, _EnqueueCounter):
+        ctx._enqueue = enqueue.enqueue
+
+
+class _NullRun:
+    """Rerun não perfilado: marcações sem custo"""
+
+    def section(self, name):
+        pass
+
+    def end(self):
+        pass
+
+
+NULL_RUN = _NullRun()
+
+
+class ProfiledRun:
+    """Tempos de um rerun, marcados por seção
+
+    Cada chamada a `section` fecha a seção anterior e abre a próxima, então o
+    código do app só ganha uma linha por seção, sem blocos `with`.
+    """
+
+    def __init__(self, profiler, app):
+        self.profiler = profiler
+        self.app = app
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.sections = []
+        # Só os reruns perfilados passam pelo contador, e só até end()
+        self._ctx = get_script_run_ctx()
+        self._counter = _wrap_enqueue(self._ctx) if self._ctx is not None else None
+        self._start = time.perf_counter()
+        self._current = None
+
+    def _snapshot(self):
+        counter = self._counter
+        return (
+            time.perf_counter(),
+            counter.elements if counter else 0,
+            counter.bytes if counter else 0,
+            self.profiler.cache_hits(),
+        )
+
+    def _close(self, now):
+        if self._current is None:
+            return
+        name, (t0, elements0, bytes0, hits0) = self._current
+        t1, elements1, bytes1, hits1 = now
+        self.sections.append({
+            'name': name,
+            'ms': (t1 - t0) * 1000,
+            'elements': elements1 - elements0,
+            'bytes': bytes1 - bytes0,
+            'cache_hits': {k: hits1[k] - hits0[k] for k in hits1 if hits1[k] != hits0[k]},
+        })
+
+    def section(self, name):
+        """Fecha a seção atual (se houver) e começa a medir a próxima"""
+        now = self._snapshot()
+        self._close(now)
+        self._current = (name, now)
+
+    def end(self):
+        """Fecha a última seção e guarda o rerun no buffer do perfilador"""
+        self._close(self._snapshot())
+        self._current = None
+        if self._ctx is not None:
+            _unwrap_enqueue(self._ctx)
+        self.profiler.record({
+            'app': self.app,
+            'started': self.started,
+            'ms': (time.perf_counter() - self._start) * 1000,
+            'elements': sum(s['elements'] for s in self.sections),
+            'bytes': sum(s['bytes'] for s in self.sections),
+            'sections': self.sections,
+        })
+
+
+class Profiler:
+    """Buffer circular, compartilhado pelo processo, com os tempos de cada rerun"""
+
+    def __init__(self, capacity=PROFILE_HISTORY, log_path=PROFILE_LOG):
+        self.log_path = log_path
+        self._runs = deque(maxlen=capacity)
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def watch(self, name, hits):
+        """Registra um cache cujos acertos entram no perfil (`hits` devolve o total)"""
+        self._caches[name] = hits
+
+    def cache_hits(self):
+        return {name: hits() for name, hits in self._caches.items()}
+
+    def enabled(self):
+        """Perfilamento ligado para o processo ou para a sessão atual"""
+        return PROFILE_ENV or st.query_params.get('perf') == '1'
+
+    def begin(self, app):
+        """Começa a medir um rerun; devolve um marcador nulo quando desligado"""
+        if not self.enabled():
+            ctx = get_script_run_ctx()
+            if ctx is not None:
+                _unwrap_enqueue(ctx)
+            return NULL_RUN
+        return ProfiledRun(self, app)
+
+    def record(self, run):
+        with self._lock:
+            self._runs.append(run)
+            if self.log_path:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(run, ensure_ascii=False) + '\n')
+
+    def runs(self, app=None):
+        """Reruns no buffer, do mais antigo para o mais recente"""
+        with self._lock:
+            return [run for run in self._runs if app is None or run['app'] == app]
+
+    def to_jsonl(self, app=None):
+        """Reruns no buffer como JSON lines"""
+        return ''.join(json.dumps(run, ensure_ascii=False) + '\n' for run in self.runs(app))
+
+
+def render_profiler_panel(profiler, app):
+    """Painel "perf" na barra lateral: último rerun e médias por seção"""
+    if not profiler.enabled():
+        return
+    runs = profiler.runs(app)
+    with st.sidebar.expander("⏱️ Perf", expanded=True):
+        if not runs:
+            st.caption("Nenhum rerun medido ainda")
+            return
+        last = runs[-1]
+        st.caption(f"Último rerun: {last['ms']:.1f} ms, {last['elements']} elementos, {last['bytes']:,} bytes")
+        st.dataframe(pd.DataFrame([
+            {
+                'Seção': s['name'],
+                'ms': round(s['ms'], 2),
+                'Elementos': s['elements'],
+                'Bytes': s['bytes'],
+                'Acertos de cache': sum(s['cache_hits'].values()),
+            }
+            for s in last['sections']
+        ]), hide_index=True)
+
+        sections = pd.DataFrame([s for run in runs for s in run['sections']])
+        summary = sections.groupby('name', sort=False)['ms'].agg(
+            média='mean', p95=lambda ms: ms.quantile(0.95), reruns='count'
+        ).round(2)
+        summary.index.name = 'Seção'
+        st.caption(f"Médias dos últimos {len(runs)} reruns")
+        st.dataframe(summary)
+
+        st.download_button(
+            "Exportar JSON lines",
+            profiler.to_jsonl(app),
+            file_name=f"perf-{app}.jsonl",
+            mime="application/jsonl",
+            key="perf_export"
+        )
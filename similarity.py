@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from catalog import touch_version
+
+# Colunas numéricas dos vetores de semelhança: especificações tipadas
+# (RAM, armazenamento, bateria, tela, câmera principal, peso), preço e ano
+SIMILARITY_COLUMNS = ['ram', 'storage', 'battery', 'screen', 'camera', 'weight', 'price', 'year']
+
+# Produtos semelhantes mostrados por produto selecionado
+SIMILAR_PRODUCTS = 4
+
+
+def spec_vectors(catalog):
+    """Matriz n x d (float64, NaN onde falta a especificação) das características de cada produto"""
+    return np.column_stack([np.asarray(catalog.metric(column), dtype=np.float64) for column in SIMILARITY_COLUMNS])
+
+
+def build_similarity(catalog, path):
+    """Grava o índice de semelhança de uma versão do catálogo em `path` (um diretório)
+
+    As características são padronizadas (z-score; a falta de um valor conta
+    como a média) e as linhas ficam agrupadas por categoria, então a busca
+    por vizinhos de um produto lê só o bloco contíguo da categoria dele. O
+    diretório é montado ao lado e renomeado no fim, então leitores nunca
+    veem um índice pela metade.
+    """
+    features = spec_vectors(catalog)
+    known = ~np.isnan(features)
+    counts = known.sum(axis=0)
+    mean = np.where(counts > 0, np.where(known, features, 0).sum(axis=0) / np.maximum(counts, 1), 0)
+    centered = np.where(known, features - mean, 0)
+    std = np.sqrt((centered ** 2).sum(axis=0) / np.maximum(counts, 1))
+    vectors = (centered / np.where(std > 0, std, 1)).astype(np.float32)
+
+    categories = np.asarray(catalog.column('category'))
+    order = np.argsort(categories, kind='stable')
+    positions = np.empty(len(order), dtype=np.int64)
+    positions[order] = np.arange(len(order))
+    vectors = np.ascontiguousarray(vectors[order])
+    starts = np.searchsorted(categories[order], np.arange(len(catalog.vocabulary('category')) + 1))
+
+    tmp_path = tempfile.mkdtemp(prefix='.similarity-', dir=os.path.dirname(path))
+    np.save(os.path.join(tmp_path, 'vectors.npy'), vectors)
+    np.save(os.path.join(tmp_path, 'norms.npy'), np.einsum('ij,ij->i', vectors, vectors))
+    np.save(os.path.join(tmp_path, 'order.npy'), order)
+    np.save(os.path.join(tmp_path, 'positions.npy'), positions)
+    np.save(os.path.join(tmp_path, 'starts.npy'), starts)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Outro processo gravou o mesmo índice primeiro
+        shutil.rmtree(tmp_path)
+
+
+class SimilarityIndex:
+    """Vizinhos mais próximos (kNN) sobre os vetores de especificações normalizados
+
+    Os vetores são uma única matriz float32 mapeada do disco, derivada de
+    cada versão do catálogo na primeira abertura (como o banco do SQLite).
+    Uma busca é uma distância vetorizada contra o bloco da categoria do
+    produto (|x|² - 2x·q, com |x|² pré-calculado) e um argpartition.
+    """
+
+    def __init__(self, path):
+        self.vectors = np.load(os.path.join(path, 'vectors.npy'), mmap_mode='r')
+        self.norms = np.load(os.path.join(path, 'norms.npy'), mmap_mode='r')
+        self.order = np.load(os.path.join(path, 'order.npy'), mmap_mode='r')
+        self.positions = np.load(os.path.join(path, 'positions.npy'), mmap_mode='r')
+        self.starts = np.load(os.path.join(path, 'starts.npy'))
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        """Índice da versão atual de um catálogo (de qualquer backend), montado se ainda não existe
+
+        Os vetores são lidos pelas colunas do próprio catálogo recebido, então
+        no SQLite eles saem do banco.
+        """
+        path = os.path.join(catalog.directory, catalog.version, 'similarity')
+        if not os.path.exists(path):
+            touch_version(os.path.dirname(path))
+            build_similarity(catalog, path)
+        return cls(path)
+
+    def neighbors(self, index, k=SIMILAR_PRODUCTS, exclude=()):
+        """Índices dos até k produtos da mesma categoria mais próximos de `index`, do mais próximo ao mais distante"""
+        position = int(self.positions[index])
+        category = int(np.searchsorted(self.starts, position, side='right')) - 1
+        lo, hi = int(self.starts[category]), int(self.starts[category + 1])
+        distances = self.norms[lo:hi] - 2 * (self.vectors[lo:hi] @ self.vectors[position])
+        skipped = [position - lo]
+        for other in exclude:
+            other = int(self.positions[other])
+            if lo <= other < hi:
+                skipped.append(other - lo)
+        distances[skipped] = np.inf
+        k = min(k, hi - lo - len(set(skipped)))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(distances, k - 1)[:k]
+        candidates = candidates[np.argsort(distances[candidates], kind='stable')]
+        return np.asarray(self.order[lo + candidates])
@@ -0,0 +1,83 @@
+import math
+
+# Erro relativo máximo dos quantis estimados (1%: p95 de 4.0 min sai entre 3.96 e 4.04)
+RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """Sketch de quantis com erro relativo limitado (buckets logarítmicos, como o DDSketch)
+
+    Cada valor positivo conta no bucket ceil(log_gamma(valor)) e um quantil é
+    o centro do bucket onde a contagem acumulada o alcança, com erro relativo
+    de no máximo `alpha`. Nenhum valor bruto é guardado: são algumas centenas
+    de contadores mesmo para milhões de valores. Fundir dois sketches é somar
+    os contadores bucket a bucket, o que dá exatamente o sketch de todos os
+    valores juntos em qualquer ordem; por isso sketches de meses diferentes
+    e de processos de ingestão diferentes se combinam livremente.
+    """
+
+    def __init__(self, alpha=RELATIVE_ACCURACY):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        # índice do bucket -> quantidade de valores
+        self.buckets = {}
+        # valores <= 0 (não têm bucket logarítmico)
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        """Conta um valor (O(1))"""
+        if value > 0:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        else:
+            self.zeros += 1
+        self.count += 1
+
+    def merge(self, other):
+        """Soma os contadores de outro sketch a este"""
+        if other.alpha != self.alpha:
+            raise ValueError("Só é possível fundir sketches com a mesma precisão")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def quantiles(self, qs):
+        """Estimativas dos quantis pedidos (q entre 0 e 1), NaN se o sketch está vazio"""
+        if not self.count:
+            return [math.nan] * len(qs)
+        results = []
+        ranks = sorted((q * (self.count - 1), i) for i, q in enumerate(qs))
+        indices = iter(sorted(self.buckets))
+        seen, index = self.zeros, None
+        for rank, position in ranks:
+            while seen <= rank:
+                index = next(indices)
+                seen += self.buckets[index]
+            value = 0.0 if index is None else 2 * self.gamma ** index / (self.gamma + 1)
+            results.append((position, value))
+        return [value for _, value in sorted(results)]
+
+    def quantile(self, q):
+        """Estimativa de um quantil (q entre 0 e 1)"""
+        return self.quantiles([q])[0]
+
+    def to_dict(self):
+        """Forma serializável em JSON"""
+        return {
+            'alpha': self.alpha,
+            'zeros': self.zeros,
+            'buckets': {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstrói um sketch salvo por to_dict"""
+        sketch = cls(data['alpha'])
+        sketch.buckets = {int(index): count for index, count in data['buckets'].items()}
+        sketch.zeros = data['zeros']
+        sketch.count = sketch.zeros + sum(sketch.buckets.values())
+        return sketch
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def skyline(columns, directions):
+    """Índices dos pontos não dominados (a fronteira de Pareto), em ordem crescente
+
+    Um ponto domina outro quando é pelo menos tão bom em todas as colunas e
+    melhor em alguma; a direção de cada coluna é 'lower' ou 'higher'.
+    Sort-Filter-Skyline: os pontos são ordenados pela soma das colunas
+    normalizadas, de modo que ninguém vem antes de quem o domina (numa soma
+    empatada, o menor em ordem lexicográfica vai primeiro). O primeiro ponto
+    restante é sempre da fronteira e, de uma vez só (vetorizado), tira dos
+    restantes todos os que ele domina; os primeiros pontos costumam eliminar
+    quase todos os outros. O custo é O(n x tamanho da fronteira): só dados
+    em que as colunas brigam entre si (fronteira com milhares de pontos)
+    saem do caso rápido.
+    """
+    points = np.column_stack([
+        -np.asarray(values, dtype=np.float64) if direction == 'higher' else np.asarray(values, dtype=np.float64)
+        for values, direction in zip(columns, directions)
+    ])
+    if not len(points):
+        return np.empty(0, dtype=np.int64)
+    # Todas as colunas passam a ser "menor é melhor"
+    low, high = points.min(axis=0), points.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    key = ((points - low) / span).sum(axis=1)
+    order = np.argsort(key, kind='stable')
+    remaining, keys, ids = points[order], key[order], order
+    frontier = []
+    while len(remaining):
+        # O arredondamento da soma pode empatar um ponto com quem o domina:
+        # entre os empatados no início, o menor em ordem lexicográfica
+        tied = int(np.searchsorted(keys, keys[0], side='right'))
+        first = 0 if tied == 1 else int(np.lexsort(remaining[:tied].T[::-1])[0])
+        best = remaining[first]
+        frontier.append(ids[first])
+        # Empates em todas as colunas não se dominam: ficam todos na fronteira
+        keep = ~(np.all(remaining >= best, axis=1) & np.any(remaining > best, axis=1))
+        keep[first] = False
+        remaining, keys, ids = remaining[keep], keys[keep], ids[keep]
+    return np.sort(np.array(frontier, dtype=np.int64))
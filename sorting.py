@@ -0,0 +1,30 @@
+import numpy as np
+
+
+class SortOrders:
+    """Permutações que ordenam o catálogo por cada chave, calculadas uma vez por versão
+
+    `keys` mapeia cada chave numérica para uma função que devolve os valores
+    de todo o catálogo; 'name' usa a ordem dos nomes que a versão já guarda.
+    Cada permutação (por chave e sentido) é montada no primeiro uso e
+    reaproveitada: ordenar a lista vira filtrar a permutação pelo mask.
+    """
+
+    def __init__(self, catalog, keys):
+        self.catalog = catalog
+        self.keys = keys
+        self._orders = {}
+
+    def order(self, key, descending=False):
+        """Posições do catálogo em ordem da chave (estável; NaN sempre no fim)"""
+        if (key, descending) not in self._orders:
+            if key == 'name':
+                # Nomes são únicos: a ordem decrescente é a crescente invertida
+                order = self.catalog.name_order()
+                order = np.ascontiguousarray(order[::-1]) if descending else order
+            else:
+                values = np.asarray(self.keys[key](), dtype=np.float64)
+                order = np.argsort(-values if descending else values, kind='stable')
+            order.flags.writeable = False
+            self._orders[key, descending] = order
+        return self._orders[key, descending]
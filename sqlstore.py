@@ -0,0 +1,409 @@
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Mapping
+from urllib.parse import quote
+
+import numpy as np
+
+from catalog import ColumnarCatalog, current_version, touch_version
+from sorting import SortOrders
+
+# Instruções preparadas mantidas por conexão (o sqlite3 as reaproveita pelo texto do SQL)
+CACHED_STATEMENTS = 256
+
+# Linhas inseridas por executemany ao montar o banco de uma versão
+BUILD_ROWS = 50_000
+
+# Combinações de filtros com contagem guardada por versão do catálogo
+MAX_CACHED_COUNTS = 1024
+
+_SQL_TYPES = {'category': 'TEXT', 'int': 'INTEGER', 'float': 'REAL', 'str': 'TEXT', 'json': 'TEXT'}
+
+
+def _quoted(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _where(selections):
+    """Cláusula WHERE (e parâmetros) para pares (coluna, valor) já normalizados
+
+    Um valor (mínimo, máximo) é uma faixa da coluna, respondida pelo índice dela.
+    """
+    if not selections:
+        return '', ()
+    clauses, parameters = [], []
+    for column, value in selections:
+        if isinstance(value, tuple):
+            clauses.append(f'{_quoted(column)} BETWEEN ? AND ?')
+            parameters.extend(value)
+        else:
+            clauses.append(f'{_quoted(column)} = ?')
+            parameters.append(value)
+    return ' WHERE ' + ' AND '.join(clauses), tuple(parameters)
+
+
+def build_database(catalog, path, indexed=()):
+    """Grava as colunas de uma versão do catálogo em um banco SQLite, em blocos
+
+    O id de cada linha é a sua posição nas colunas, então índices de um
+    backend valem no outro. O banco é montado em um arquivo temporário e
+    renomeado no fim, então leitores nunca veem um banco pela metade.
+    """
+    columns = [column for column, _ in catalog.schema]
+    fd, tmp_path = tempfile.mkstemp(prefix='.sqlite-', dir=os.path.dirname(path))
+    os.close(fd)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        definitions = ', '.join(f'{_quoted(c)} {_SQL_TYPES[kind]}' for c, kind in catalog.schema)
+        connection.execute(
+            f'CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, row_hash INTEGER, {definitions})'
+        )
+        insert = f'INSERT INTO items VALUES (?, ?, ?, {", ".join("?" * len(columns))})'
+        hashes = catalog.row_hashes
+        for start in range(0, len(catalog), BUILD_ROWS):
+            stop = min(start + BUILD_ROWS, len(catalog))
+            values = [
+                range(start, stop),
+                np.asarray(catalog.names[start:stop]).tolist(),
+                # O SQLite guarda inteiros com sinal: o hash vai como int64
+                np.asarray(hashes[start:stop]).view(np.int64).tolist() if hashes is not None else [None] * (stop - start),
+            ]
+            for column, kind in catalog.schema:
+                raw = np.asarray(catalog.column(column)[start:stop])
+                values.append((catalog.vocabulary(column)[raw] if kind == 'category' else raw).tolist())
+            connection.executemany(insert, zip(*values))
+        for columns in indexed:
+            # Uma tupla vira um índice composto, que cobre a combinação de filtros
+            columns = (columns,) if isinstance(columns, str) else tuple(columns)
+            connection.execute(
+                f'CREATE INDEX {_quoted("idx_" + "_".join(columns))} ON items ({", ".join(map(_quoted, columns))})'
+            )
+        connection.execute('ANALYZE')
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+
+
+class SqliteColumn:
+    """Coluna do banco com a interface de array usada pelos apps
+
+    Um índice ou uma lista pequena de posições vira uma consulta pela chave
+    primária; converter a coluna inteira em array (np.asarray) lê todas as
+    linhas, o que só acontece em cálculos da frota toda.
+    """
+
+    def __init__(self, catalog, column, kind):
+        self.catalog = catalog
+        self.column = column
+        self.kind = kind
+
+    def __len__(self):
+        return len(self.catalog)
+
+    def _convert(self, values):
+        if self.kind == 'category':
+            return np.searchsorted(self.catalog.vocabulary(self.column), np.array(values, dtype=str)).astype(np.int32)
+        if self.kind == 'row_hash':
+            return np.array(values, dtype=np.int64).view(np.uint64)
+        if self.kind == 'int':
+            return np.array(values, dtype=np.int64)
+        if self.kind == 'float':
+            return np.array(values, dtype=np.float64)
+        return np.array(values, dtype=str)
+
+    def __getitem__(self, key):
+        sql = f'SELECT {_quoted(self.column)} FROM items'
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            rows = self.catalog.execute(sql + ' WHERE id >= ? AND id < ? ORDER BY id', (start, stop)).fetchall()
+            return self._convert([value for value, in rows])[::step]
+        if isinstance(key, (int, np.integer)):
+            row = self.catalog.execute(sql + ' WHERE id = ?', (int(key),)).fetchone()
+            if row is None:
+                raise IndexError(key)
+            return self._convert([row[0]])[0]
+        indices = [int(i) for i in np.asarray(key).ravel()]
+        values = {}
+        for i in indices:
+            if i not in values:
+                values[i] = self.catalog.execute(sql + ' WHERE id = ?', (i,)).fetchone()[0]
+        return self._convert([values[i] for i in indices])
+
+    def __array__(self, dtype=None, copy=None):
+        rows = self.catalog.execute(f'SELECT {_quoted(self.column)} FROM items ORDER BY id')
+        values = self._convert([value for value, in rows])
+        return values if dtype is None else values.astype(dtype)
+
+
+class SqliteCatalog(Mapping):
+    """Catálogo servido por um banco SQLite, com a interface do ColumnarCatalog
+
+    O banco de cada versão é derivado das colunas .npy na primeira abertura
+    (então a carga do arquivo de dados e o import_feed.py não mudam) e fica
+    ao lado delas. Depois disso só o SQLite é lido: a memória do processo
+    não cresce com o catálogo. Cada thread do Streamlit usa a sua própria
+    conexão somente leitura, reaproveitada entre consultas junto com o cache
+    de instruções preparadas. As subclasses indicam as colunas indexadas
+    (tuplas para índices compostos).
+    """
+
+    indexed = ()
+
+    def __init__(self, directory, version=None):
+        version = version or current_version(directory)
+        if version is None:
+            raise FileNotFoundError(f"Nenhum catálogo encontrado em {directory}")
+        self.directory = directory
+        self.path = os.path.join(directory, version)
+        with open(os.path.join(self.path, 'manifest.json'), encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.version = manifest['version']
+        self.schema = [(c['name'], c['kind']) for c in manifest['columns']]
+        self.units = {c['name']: c.get('unit') for c in manifest['columns']}
+        self.rows = manifest['rows']
+        self._kinds = dict(self.schema)
+        touch_version(self.path)
+        self.database = os.path.join(self.path, 'catalog.sqlite')
+        if not os.path.exists(self.database):
+            build_database(ColumnarCatalog(directory, version), self.database, self.indexed)
+        self._local = threading.local()
+        self._vocabs = {}
+        self.names = SqliteColumn(self, 'name', 'str')
+        # Catálogos gravados antes do hash por linha não têm esta coluna
+        has_hashes = os.path.exists(os.path.join(self.path, 'row_hash.npy'))
+        self.row_hashes = SqliteColumn(self, 'row_hash', 'row_hash') if has_hashes else None
+        self._columns = {column: SqliteColumn(self, column, kind) for column, kind in self.schema}
+
+    def connection(self):
+        """Conexão somente leitura da thread atual, aberta na primeira consulta"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                'file:' + quote(self.database) + '?mode=ro',
+                uri=True,
+                cached_statements=CACHED_STATEMENTS,
+            )
+            self._local.connection = connection
+        return connection
+
+    def execute(self, sql, parameters=()):
+        return self.connection().execute(sql, parameters)
+
+    def column(self, column):
+        """Coluna preguiçosa (códigos no caso de colunas categóricas)"""
+        return self._columns[column]
+
+    def unit(self, column):
+        """Unidade declarada da coluna numérica (None se não houver)"""
+        return self.units.get(column)
+
+    def vocabulary(self, column):
+        """Valores distintos de uma coluna categórica, em ordem (lidos uma vez por versão)"""
+        if column not in self._vocabs:
+            rows = self.execute(f'SELECT DISTINCT {_quoted(column)} FROM items ORDER BY 1')
+            self._vocabs[column] = np.array([value for value, in rows], dtype=str)
+        return self._vocabs[column]
+
+    def index_of(self, name):
+        """Posição de um item, pelo índice único dos nomes"""
+        row = self.execute('SELECT id FROM items WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def fingerprint(self, names):
+        """Identifica o conteúdo atual de um conjunto de itens (em ordem de nome)"""
+        fingerprint = []
+        for name in sorted(names):
+            row = self.execute('SELECT row_hash FROM items WHERE name = ?', (name,)).fetchone()
+            if row is None:
+                raise KeyError(name)
+            if row[0] is None:
+                return (self.version, *sorted(names))
+            fingerprint.append(row[0] & 0xFFFFFFFFFFFFFFFF)
+        return tuple(fingerprint)
+
+    def _python_value(self, column, raw):
+        kind = self._kinds[column]
+        if kind == 'json':
+            return json.loads(raw)
+        if kind == 'float' and raw is None:
+            # O SQLite guarda NaN como NULL: volta a ser NaN, como no backend colunar
+            return math.nan
+        return raw
+
+    def value(self, index, column):
+        """Valor Python de uma célula"""
+        row = self.execute(f'SELECT {_quoted(column)} FROM items WHERE id = ?', (int(index),)).fetchone()
+        if row is None:
+            raise IndexError(index)
+        return self._python_value(column, row[0])
+
+    def record(self, index):
+        """Monta o registro no mesmo formato do antigo dict de produtos"""
+        columns = [column for column, _ in self.schema]
+        row = self.execute(
+            f'SELECT {", ".join(map(_quoted, columns))} FROM items WHERE id = ?', (int(index),)
+        ).fetchone()
+        if row is None:
+            raise IndexError(index)
+        return {column: self._python_value(column, raw) for column, raw in zip(columns, row)}
+
+    def __getitem__(self, name):
+        return self.record(self.index_of(name))
+
+    def __contains__(self, name):
+        return self.execute('SELECT 1 FROM items WHERE name = ?', (name,)).fetchone() is not None
+
+    def __iter__(self):
+        for name, in self.execute('SELECT name FROM items ORDER BY id'):
+            yield name
+
+    def __len__(self):
+        return self.rows
+
+
+class QueryRows:
+    """Posições das linhas que passam nos filtros, buscadas sob demanda
+
+    len() é um COUNT e uma fatia é uma consulta com LIMIT/OFFSET, então só
+    a página exibida sai do banco. Com `order` (coluna, decrescente) as
+    linhas vêm na ordem da coluna, pelo índice dela; empates ficam na ordem
+    do catálogo, como nas permutações do SortOrders.
+    """
+
+    def __init__(self, index, selections, order=None):
+        self.index = index
+        self.selections = selections
+        self.order = order
+
+    def __len__(self):
+        return self.index.count(self.selections)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("QueryRows só aceita fatias contínuas")
+        start, stop, _ = key.indices(len(self))
+        where, parameters = _where(self.selections)
+        order_by = 'id'
+        if self.order is not None:
+            column, descending = self.order
+            order_by = f'{_quoted(column)}{" DESC" if descending else ""}, id'
+        rows = self.index.catalog.execute(
+            f'SELECT id FROM items{where} ORDER BY {order_by} LIMIT ? OFFSET ?',
+            parameters + (max(stop - start, 0), start)
+        )
+        return np.array([i for i, in rows], dtype=np.int64)
+
+
+class SqlSortOrders(SortOrders):
+    """Ordenações da lista sobre o SQLite, com a interface do SortOrders
+
+    Os nomes e as colunas com índice próprio no banco não viram permutação:
+    a ordem é um par (coluna, decrescente) respondido por ORDER BY na
+    consulta da página. Só chaves calculadas (como o score) ainda montam a
+    permutação em memória.
+    """
+
+    def order(self, key, descending=False):
+        """Par (coluna, decrescente) para colunas indexadas; permutação para as demais chaves"""
+        if key == 'name' or key in self.catalog.indexed:
+            return key, descending
+        return super().order(key, descending)
+
+
+class SqlFacetIndex:
+    """Facetas respondidas por consultas indexadas, com a interface do FacetIndex
+
+    Um "mask" aqui é a lista de filtros ativos; as contagens de cada
+    combinação de filtros são guardadas, já que a versão é imutável.
+    """
+
+    def __init__(self, catalog, facets, ranges=()):
+        self.catalog = catalog
+        self.facets = list(facets)
+        self.ranges = list(ranges)
+        self.size = len(catalog)
+        self._counts = {}
+        self._bounds = {}
+
+    @classmethod
+    def from_catalog(cls, catalog, facets, ranges=()):
+        """Índice sobre as colunas categóricas (e numéricas, para faixas) de um SqliteCatalog"""
+        return cls(catalog, facets, ranges)
+
+    def bounds(self, column):
+        """Menor e maior valor de uma coluna numérica (pelas pontas do índice dela; (0, 0) num catálogo vazio)"""
+        if column not in self._bounds:
+            low, high = self.catalog.execute(
+                f'SELECT MIN({_quoted(column)}), MAX({_quoted(column)}) FROM items'
+            ).fetchone()
+            self._bounds[column] = (0, 0) if low is None else (low, high)
+        return self._bounds[column]
+
+    def options(self, facet):
+        """Valores distintos da faceta, em ordem alfabética"""
+        return [str(v) for v in self.catalog.vocabulary(facet)]
+
+    def mask(self, selections, exclude=None):
+        """Filtros ativos como pares (faceta, valor) em ordem (None significa sem filtro)
+
+        Uma tupla (mínimo, máximo) como valor é uma faixa da coluna numérica.
+        """
+        return tuple(sorted(
+            (facet, value) for facet, value in selections.items()
+            if value is not None and facet != exclude
+        ))
+
+    def _cached(self, key, compute):
+        if key not in self._counts:
+            if len(self._counts) >= MAX_CACHED_COUNTS:
+                self._counts.clear()
+            self._counts[key] = compute()
+        return self._counts[key]
+
+    def count(self, mask):
+        """Quantidade de linhas que passam nos filtros"""
+        where, parameters = _where(mask)
+        return self._cached(
+            ('count', mask),
+            lambda: self.catalog.execute(f'SELECT COUNT(*) FROM items{where}', parameters).fetchone()[0]
+        )
+
+    def facet_counts(self, facet, selections):
+        """Quantos resultados cada valor da faceta deixa sob os demais filtros ativos"""
+        other = self.mask(selections, exclude=facet)
+        where, parameters = _where(other)
+
+        def compute():
+            rows = self.catalog.execute(
+                f'SELECT {_quoted(facet)}, COUNT(*) FROM items{where} GROUP BY 1', parameters
+            )
+            found = dict(rows.fetchall())
+            return {value: found.get(value, 0) for value in self.options(facet)}
+
+        return self._cached(('facet', facet, other), compute), self.count(other)
+
+    def indices(self, mask):
+        """Posições (em ordem do catálogo) das linhas que passam nos filtros"""
+        return QueryRows(self, mask)
+
+    def sorted_indices(self, mask, order):
+        """Posições das linhas que passam nos filtros, na ordem indicada
+
+        `order` vem do SqlSortOrders: um par (coluna, decrescente) vira um
+        ORDER BY na consulta da página; uma permutação é filtrada em memória.
+        """
+        if isinstance(order, tuple):
+            return QueryRows(self, mask, order)
+        if not mask:
+            return order
+        where, parameters = _where(mask)
+        selected = np.zeros(self.size, dtype=bool)
+        selected[[i for i, in self.catalog.execute(f'SELECT id FROM items{where}', parameters)]] = True
+        return order[selected[order]]
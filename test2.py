@@ -1,7 +1,46 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
-import random
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from catalog import CATALOG_BACKEND, DATA_DIR, CatalogSource
+from comparison import (
+    COMPARISON_LIMIT,
+    WIDE_COMPARISON_LIMIT,
+    ComparisonCache,
+    ComparisonMatrix,
+    first_selected,
+    highlight_classes,
+    render_comparison_table,
+    render_wide_comparison_table,
+)
+from downsample import CHART_POINTS, downsampled_window
+from facets import FacetIndex, facet_label, range_selection
+from history import COST_WALK, HISTORY_SEED, simulated_history, today
+from metrics import (
+    AGENT_CATALOG_DIR,
+    AGENT_METRICS,
+    AGENT_SCHEMA,
+    AGENT_SORTS,
+    AgentCatalog,
+    AgentSqliteCatalog,
+    OPTIONAL_METRICS,
+    SCORE_LATENCIES,
+    agent_source_records,
+    format_metric,
+    latency_values,
+    pareto_frontier,
+    performance_scores,
+    top_k,
+)
+from pagination import page_controls, paginate
+from profiling import Profiler, render_profiler_panel
+from sorting import SortOrders
+from sqlstore import SqlFacetIndex, SqlSortOrders, SqliteCatalog
+from theme import apply_theme
+from timeseries import COST_STORE_DIR, TimeSeriesStore
 
 # Configuração da página
 st.set_page_config(
@@ -11,280 +50,57 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS customizado para um design mais limpo
-st.markdown("""
-<style>
-/* Reset e base */
-.main > div {
-    padding-top: 2rem;
-}
-
-/* Header */
-.header-container {
-    background: white;
-    padding: 2rem 0 1rem 0;
-    border-bottom: 1px solid #e0e0e0;
-    margin-bottom: 2rem;
-}
-
-.header-title {
-    font-size: 2rem;
-    font-weight: 700;
-    color: #1a1a1a;
-    margin: 0;
-    text-align: center;
-}
-
-.header-subtitle {
-    font-size: 1rem;
-    color: #666;
-    text-align: center;
-    margin-top: 0.5rem;
-}
-
-/* Sidebar styling */
-.sidebar-header {
-    background: #f8f9fa;
-    padding: 1rem;
-    border-radius: 8px;
-    margin-bottom: 1rem;
-    border-left: 4px solid #007bff;
-}
-
-/* Product cards */
-.product-card {
-    background: white;
-    border: 1px solid #e0e0e0;
-    border-radius: 12px;
-    padding: 1.5rem;
-    margin-bottom: 1rem;
-    transition: all 0.3s ease;
-    box-shadow: 0 2px 4px rgba(0,0,0,0.08);
-}
-
-.product-card:hover {
-    box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-    transform: translateY(-2px);
-}
-
-.product-image {
-    width: 60px;
-    height: 60px;
-    background: #f8f9fa;
-    border-radius: 8px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 2rem;
-    margin-bottom: 1rem;
-}
-
-.product-name {
-    font-size: 1.1rem;
-    font-weight: 600;
-    color: #1a1a1a;
-    margin: 0.5rem 0;
-}
-
-.product-price {
-    font-size: 1.5rem;
-    font-weight: 700;
-    color: #007bff;
-    margin: 0.8rem 0;
-}
-
-.product-year {
-    font-size: 0.9rem;
-    color: #666;
-    margin-bottom: 1rem;
-}
-
-.add-button {
-    background: #007bff;
-    color: white;
-    border: none;
-    padding: 0.7rem 1rem;
-    border-radius: 6px;
-    width: 100%;
-    font-weight: 600;
-    cursor: pointer;
-    transition: background 0.3s ease;
-}
-
-.add-button:hover {
-    background: #0056b3;
-}
-
-.remove-button {
-    background: #dc3545;
-    color: white;
-    border: none;
-    padding: 0.7rem 1rem;
-    border-radius: 6px;
-    width: 100%;
-    font-weight: 600;
-    cursor: pointer;
-}
-
-/* Comparison section */
-.comparison-header {
-    background: #f8f9fa;
-    padding: 1.5rem;
-    border-radius: 8px;
-    margin-bottom: 2rem;
-    text-align: center;
-}
-
-.comparison-title {
-    font-size: 1.5rem;
-    font-weight: 600;
-    color: #1a1a1a;
-    margin: 0;
-}
-
-.spec-table {
-    background: white;
-    border-radius: 8px;
-    overflow: hidden;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-}
-
-.spec-row {
-    border-bottom: 1px solid #f0f0f0;
-    padding: 1rem;
-}
-
-.spec-row:last-child {
-    border-bottom: none;
-}
-
-.spec-label {
-    font-weight: 600;
-    color: #333;
-    padding: 0.5rem 0;
-}
-
-.best-price {
-    background: #d4edda;
-    color: #155724;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-.most-recent {
-    background: #cce7ff;
-    color: #004085;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-.premium {
-    background: #fff3cd;
-    color: #856404;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-.best-performance {
-    background: #d1ecf1;
-    color: #0c5460;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-.worst-performance {
-    background: #f8d7da;
-    color: #721c24;
-    padding: 0.2rem 0.5rem;
-    border-radius: 4px;
-    font-weight: 600;
-}
-
-/* Clear button */
-.clear-button {
-    background: #6c757d;
-    color: white;
-    border: none;
-    padding: 0.5rem 1rem;
-    border-radius: 4px;
-    font-size: 0.9rem;
-    cursor: pointer;
-    margin-top: 1rem;
-}
-
-/* Price history charts */
-.chart-container {
-    background: white;
-    padding: 1.5rem;
-    border-radius: 8px;
-    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-    margin-bottom: 1rem;
-}
-
-.chart-title {
-    font-size: 1.1rem;
-    font-weight: 600;
-    margin-bottom: 1rem;
-    text-align: center;
-}
-
-.current-price {
-    font-size: 1.2rem;
-    font-weight: 700;
-    color: #007bff;
-    text-align: center;
-    margin-bottom: 0.5rem;
-}
-
-.price-trend {
-    font-size: 0.9rem;
-    text-align: center;
-    margin-bottom: 1rem;
-}
-
-.price-down {
-    color: #28a745;
-}
+# CSS customizado para um design mais limpo (static/style.css)
+apply_theme()
 
-.price-up {
-    color: #dc3545;
-}
+# Quantidade de agentes exibidos no ranking da frota
+LEADERBOARD_SIZE = 10
 
-/* Recommendation cards */
-.recommendation-card {
-    padding: 1rem;
-    border-radius: 8px;
-    text-align: center;
-    margin-bottom: 1rem;
-}
-
-.rec-success {
-    background-color: #d4edda;
-    border: 1px solid #c3e6cb;
-    color: #155724;
-}
-
-.rec-info {
-    background-color: #d1ecf1;
-    border: 1px solid #bee5eb;
-    color: #0c5460;
-}
-
-.rec-warning {
-    background-color: #fff3cd;
-    border: 1px solid #ffeaa7;
-    color: #856404;
-}
-</style>
-""", unsafe_allow_html=True)
+# Arquivo de dados dos agentes (JSON, JSON lines, CSV ou Parquet), com as
+# métricas em texto ou já tipadas; recarregado a quente sempre que muda
+AGENT_SOURCE = os.environ.get('AGENT_SOURCE', os.path.join(DATA_DIR, 'agents.json'))
 
 # Base de dados dos agentes LLM
-@st.cache_data
+@st.cache_resource
+def load_agent_source():
+    """Catálogo de agentes ligado ao arquivo de dados, compartilhado por todas as sessões"""
+    source = CatalogSource(
+        AGENT_CATALOG_DIR,
+        AGENT_SOURCE,
+        AGENT_SCHEMA,
+        lambda: agent_source_records(agent_seed_data()),
+        AgentSqliteCatalog if CATALOG_BACKEND == 'sqlite' else AgentCatalog,
+        convert=agent_source_records
+    )
+    # Numa recarga, só as comparações com agentes alterados saem do cache
+    source.on_change(load_comparison_cache().invalidate)
+    return source
+
 def load_agent_data():
+    """Catálogo de agentes atual (um stat do arquivo de dados e um do ponteiro CURRENT por rerun)
+
+    As métricas mensais vêm dos rollups de eventos publicados pelo events.py;
+    os valores dos dados iniciais só valem até a primeira publicação.
+    """
+    return load_agent_source().current()
+
+@st.cache_resource
+def load_comparison_cache():
+    """Cache de comparações compartilhado por todas as sessões do processo"""
+    return ComparisonCache()
+
+@st.cache_resource
+def load_profiler():
+    """Perfilador de reruns compartilhado por todas as sessões do processo"""
+    comparisons = load_comparison_cache()
+    profiler = Profiler()
+    profiler.watch('históricos', lambda: simulated_history.cache_info().hits)
+    profiler.watch('janelas', lambda: downsampled_window.cache_info().hits)
+    profiler.watch('comparações', lambda: comparisons.stats()['hits'])
+    return profiler
+
+def agent_seed_data():
+    """Dados iniciais (métricas em texto) gravados no catálogo quando ele ainda não existe"""
     return {
         'Agente Alpha': {
             'provider': 'TechCorp',
@@ -384,40 +200,64 @@ def load_agent_data():
         }
     }
 
-def generate_cost_history(current_cost, months=6):
-    """Gera histórico de custos simulado"""
-    dates = []
-    costs = []
-    
-    start_date = datetime.now() - timedelta(days=months*30)
-    
-    # Começar com um custo um pouco diferente
-    base_cost = current_cost * 1.05
-    
-    for i in range(months * 4):  # 4 pontos por mês
-        date = start_date + timedelta(days=i*7)  # A cada semana
-        
-        # Simular flutuação de custos
-        variation = random.uniform(-0.05, 0.08)  # Variação nos custos
-        base_cost = base_cost * (1 + variation)
-        
-        # Garantir que não fique muito diferente do custo atual
-        if base_cost < current_cost * 0.7:
-            base_cost = current_cost * random.uniform(0.85, 1.15)
-        elif base_cost > current_cost * 1.3:
-            base_cost = current_cost * random.uniform(0.85, 1.15)
-            
-        dates.append(date.strftime('%d/%m'))
-        costs.append(max(base_cost, current_cost * 0.5))
-    
-    # Garantir que o último custo seja próximo ao atual
-    costs[-1] = current_cost
-    
-    return dates, costs
+@st.cache_resource(max_entries=2)
+def load_agent_facets(_agent_data, version):
+    """Índice de categoria/provedor e das faixas de custo/ano (bitmaps e valores ordenados, ou consultas SQL), construído uma vez por versão do catálogo"""
+    index_class = SqlFacetIndex if isinstance(_agent_data, SqliteCatalog) else FacetIndex
+    return index_class.from_catalog(_agent_data, ['category', 'provider'], ['cost', 'deployment_year'])
+
+@st.cache_resource(max_entries=2 * len(SCORE_LATENCIES))
+def load_agent_scores(_agent_data, version, latency='tempo'):
+    """Scores de performance de toda a frota, calculados uma vez por versão do catálogo e latência"""
+    return performance_scores(_agent_data, latency)
+
+@st.cache_resource(max_entries=2 * len(SCORE_LATENCIES))
+def load_agent_orders(_agent_data, version, latency='tempo'):
+    """Ordenações da lista de agentes, cada permutação montada uma vez por versão do catálogo e latência (no SQLite, só as de chaves calculadas)"""
+    orders_class = SqlSortOrders if isinstance(_agent_data, SqliteCatalog) else SortOrders
+    return orders_class(_agent_data, {
+        'cost': lambda: _agent_data.column('cost'),
+        'deployment_year': lambda: _agent_data.column('deployment_year'),
+        'score': lambda: load_agent_scores(_agent_data, version, latency),
+    })
+
+@st.cache_resource(max_entries=2 * len(SCORE_LATENCIES))
+def load_agent_frontier(_agent_data, version, latency='tempo'):
+    """Tabela da fronteira de Pareto da frota, calculada uma vez por versão do catálogo e latência"""
+    frontier = pareto_frontier(_agent_data, latency)
+    providers = _agent_data.vocabulary('provider')[np.asarray(_agent_data.column('provider')[frontier.tolist()])]
+    table = pd.DataFrame({
+        'Agente': [str(name) for name in _agent_data.names[frontier.tolist()]],
+        'Provedor': providers,
+        'Custo (R$/mês)': _agent_data.metric('cost', frontier),
+        'Atendimentos/mês': _agent_data.metric('atendimentos', frontier),
+        'Erros/mês': _agent_data.metric('erros', frontier),
+        'Bugs/mês': _agent_data.metric('bugs', frontier),
+        f'Tempo {SCORE_LATENCIES[latency]} (min)': latency_values(_agent_data, latency)[frontier],
+    })
+    return table.sort_values('Custo (R$/mês)', kind='stable', ignore_index=True)
+
+def generate_cost_history(agent_name, current_cost, months=6, seed=HISTORY_SEED):
+    """Gera histórico de custos simulado (determinístico e memorizado por agente)"""
+    return simulated_history(agent_name, current_cost, months, seed, COST_WALK, today())
 
-def create_cost_chart_data(agent_name, current_cost):
+@st.cache_resource
+def load_cost_store():
+    """Armazenamento de observações reais de custos, compartilhado por todas as sessões"""
+    return TimeSeriesStore(COST_STORE_DIR)
+
+def create_cost_chart_data(agent_name, current_cost, months=6, max_points=CHART_POINTS):
     """Cria dados para gráfico de histórico de custos usando Streamlit nativo"""
-    dates, costs = generate_cost_history(current_cost)
+    # Observações reais do agente têm prioridade sobre o histórico simulado
+    # (reduzidas a no máximo max_points pontos antes de chegar ao navegador)
+    store = load_cost_store()
+    end = today() + timedelta(days=1)
+    start = end - timedelta(days=months * 30)
+    timestamps, costs = downsampled_window(store, agent_name, start, end, max_points, store.version())
+    if len(costs):
+        dates = pd.to_datetime(timestamps)
+    else:
+        dates, costs = generate_cost_history(agent_name, current_cost, months)
     
     # Calcular tendência
     cost_change = (costs[-1] - costs[0]) / costs[0] * 100
@@ -432,7 +272,107 @@ def create_cost_chart_data(agent_name, current_cost):
     
     return chart_data, trend_text, trend_class
 
+def compute_agent_comparison(agent_data, agents):
+    """Tabela, recomendações e métricas de uma seleção de agentes
+
+    Os vencedores de cada recomendação são guardados com empates, para que
+    quem renderiza escolha o primeiro na ordem de seleção.
+    """
+    # Posições dos agentes nas colunas tipadas do catálogo
+    selected_idx = [agent_data.index_of(agent) for agent in agents]
+    matrix = ComparisonMatrix(
+        "Métrica",
+        [(agent_data.value(index, 'icon'), agent, agent_data.value(index, 'provider'))
+         for agent, index in zip(agents, selected_idx)]
+    )
+    
+    # Custo (linha especial)
+    costs = agent_data.metric('cost', selected_idx).tolist()
+    matrix.add_row(
+        "Custo Mensal",
+        [f"R$ {cost:,}/mês" for cost in costs],
+        highlight_classes(costs, 'lower', 'best-price', 'premium'),
+        strong=True
+    )
+    
+    # Outras métricas, a partir das colunas tipadas
+    for label, column, _, unit, direction in sorted(AGENT_METRICS):
+        values = agent_data.metric(column, selected_idx).tolist()
+        # Métricas ainda sem valor (NaN) ficam sem texto e sem destaque
+        values = [None if value != value else value for value in values]
+        if column in OPTIONAL_METRICS and all(value is None for value in values):
+            # Percentis que nenhum dos agentes tem ainda (antes da ingestão de eventos) não viram linha
+            continue
+        best_class = 'most-recent' if direction == 'recent' else 'best-performance'
+        matrix.add_row(
+            label,
+            ["-" if value is None else format_metric(value, unit) for value in values],
+            highlight_classes(values, direction, best_class, 'worst-performance')
+        )
+    
+    # Melhor custo-benefício: atendimentos por real de custo
+    atendimentos = agent_data.metric('atendimentos', selected_idx)
+    value_scores = (atendimentos / np.asarray(costs)).tolist()
+    years = agent_data.metric('deployment_year', selected_idx).tolist()
+    
+    return {
+        'matrix': matrix,
+        'items': {
+            agent: {'cost': cost, 'deployment_year': year}
+            for agent, cost, year in zip(agents, costs, years)
+        },
+        'best_value': [a for a, score in zip(agents, value_scores) if score == max(value_scores)],
+        'newest': [a for a, year in zip(agents, years) if year == max(years)],
+        'cheapest': [a for a, cost in zip(agents, costs) if cost == min(costs)],
+        'avg_cost': sum(costs) / len(costs),
+        'cost_range': max(costs) - min(costs),
+        'total_atendimentos': int(atendimentos.sum()),
+        'avg_erros': float(agent_data.metric('erros', selected_idx).mean()),
+    }
+
+def render_performance_ranking(agent_data, scores, ranking):
+    """Mostra os agentes na ordem do ranking com seus scores e métricas principais (num único elemento)"""
+    cards = []
+    for i, index in enumerate(ranking):
+        color = "#d4edda" if i == 0 else "#f8f9fa"
+        border_color = "#c3e6cb" if i == 0 else "#dee2e6"
+        icon = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else "🔹"
+        
+        cards.append(f"""
+        <div style="background: {color}; border: 1px solid {border_color}; padding: 1rem; margin: 0.5rem 0; border-radius: 8px;">
+            <div style="display: flex; align-items: center; justify-content: space-between;">
+                <div style="display: flex; align-items: center;">
+                    <span style="font-size: 1.2rem; margin-right: 0.5rem;">{icon}</span>
+                    <strong>{agent_data.names[index]}</strong>
+                </div>
+                <div style="text-align: right;">
+                    <div style="font-size: 1.1rem; font-weight: 600; color: #007bff;">
+                        Score: {scores[index]:.2f}
+                    </div>
+                    <div style="font-size: 0.9rem; color: #666;">
+                        {agent_data.value(index, 'atendimentos'):,} atend. | R$ {agent_data.value(index, 'cost'):,} | {agent_data.value(index, 'erros')} erros
+                    </div>
+                </div>
+            </div>
+        </div>
+        """)
+    st.markdown("".join(cards), unsafe_allow_html=True)
+
+def render_pareto_frontier(agent_data, frontier):
+    """Mostra os agentes não dominados: um gráfico de custo x atendimentos e a tabela completa"""
+    st.caption(
+        f"{len(frontier):,} de {len(agent_data):,} agentes não são superados por nenhum outro "
+        "em custo, atendimentos, erros, bugs e tempo ao mesmo tempo"
+    )
+    st.scatter_chart(frontier, x='Custo (R$/mês)', y='Atendimentos/mês', height=300)
+    st.dataframe(frontier, hide_index=True, height=300)
+
 def main():
+    # Marcações de tempo por seção (sem custo quando o perfilamento está desligado)
+    profiler = load_profiler()
+    perf = profiler.begin('agentes')
+    perf.section('cabeçalho')
+    
     # Header
     st.markdown("""
     <div class="header-container">
@@ -448,29 +388,43 @@ def main():
     if 'selected_agents' not in st.session_state:
         st.session_state.selected_agents = []
     
+    # Agentes removidos do catálogo numa recarga saem da seleção
+    st.session_state.selected_agents = [
+        agent for agent in st.session_state.selected_agents if agent in agent_data
+    ]
+    
+    # Limite da seleção: o modo de comparação ampla troca os cartões lado a
+    # lado por uma tabela rolável e um gráfico com todas as séries
+    limit = WIDE_COMPARISON_LIMIT if st.session_state.get('wide_comparison') else COMPARISON_LIMIT
+    
     # Layout principal
     col1, col2 = st.columns([1, 2])
     
     with col1:
+        perf.section('selecionados')
+        
         # Seção de seleção de agentes
-        st.markdown("""
+        st.markdown(f"""
         <div class="sidebar-header">
             <h3>Agentes Selecionados</h3>
-            <p>Até 4 agentes selecionados</p>
+            <p>Até {limit} agentes selecionados</p>
         </div>
         """, unsafe_allow_html=True)
         
-        # Mostrar agentes selecionados
+        st.toggle(
+            f"Comparação ampla (até {WIDE_COMPARISON_LIMIT})",
+            key="wide_comparison",
+            help=f"Compara mais de {COMPARISON_LIMIT} agentes numa tabela com rolagem horizontal"
+        )
+        
+        # Mostrar agentes selecionados (um único elemento, qualquer que seja a seleção)
         if st.session_state.selected_agents:
-            for agent in st.session_state.selected_agents:
-                data = agent_data[agent]
-                
-                st.markdown(f"""
+            st.markdown("".join(f"""
                 <div style="display: flex; align-items: center; padding: 0.5rem; background: #f8f9fa; border-radius: 6px; margin-bottom: 0.5rem;">
-                    <span style="margin-right: 0.5rem;">{data['icon']}</span>
+                    <span style="margin-right: 0.5rem;">{agent_data.value(agent_data.index_of(agent), 'icon')}</span>
                     <span style="flex: 1; font-weight: 500;">{agent}</span>
                 </div>
-                """, unsafe_allow_html=True)
+                """ for agent in st.session_state.selected_agents), unsafe_allow_html=True)
             
             if st.button("🗑️ Limpar", key="clear_all", help="Remove todos os agentes"):
                 st.session_state.selected_agents = []
@@ -481,31 +435,86 @@ def main():
         st.markdown("---")
         
         # Seção de seleção de agentes
-        st.markdown("""
+        st.markdown(f"""
         <h4>Selecionar Agentes</h4>
-        <p>Escolha até 4 agentes para comparar</p>
+        <p>Escolha até {limit} agentes para comparar</p>
         """, unsafe_allow_html=True)
         
-        # Filtros
-        categories = ['Todos'] + list(set([data['category'] for data in agent_data.values()]))
-        selected_category = st.selectbox("Categoria", categories)
+        perf.section('filtros')
+        
+        # Filtros (cada opção mostra quantos agentes restam com os demais filtros)
+        facet_index = load_agent_facets(agent_data, agent_data.version)
+        selected_category = st.session_state.get('filter_category', 'Todos')
+        selected_provider = st.session_state.get('filter_provider', 'Todos')
+        cost_bounds = facet_index.bounds('cost')
+        deployment_year_bounds = facet_index.bounds('deployment_year')
+        selections = {
+            'category': None if selected_category == 'Todos' else selected_category,
+            'provider': None if selected_provider == 'Todos' else selected_provider,
+            'cost': range_selection(st.session_state, 'filter_cost', cost_bounds),
+            'deployment_year': range_selection(st.session_state, 'filter_deployment_year', deployment_year_bounds),
+        }
+        
+        category_counts, category_total = facet_index.facet_counts('category', selections)
+        st.selectbox(
+            "Categoria",
+            ['Todos'] + facet_index.options('category'),
+            format_func=facet_label('Todos', category_counts, category_total),
+            key="filter_category"
+        )
+        
+        provider_counts, provider_total = facet_index.facet_counts('provider', selections)
+        st.selectbox(
+            "Provedor",
+            ['Todos'] + facet_index.options('provider'),
+            format_func=facet_label('Todos', provider_counts, provider_total),
+            key="filter_provider"
+        )
         
-        providers = ['Todos'] + list(set([data['provider'] for data in agent_data.values()]))
-        selected_provider = st.selectbox("Provedor", providers)
+        # Faixas numéricas: cada uma são duas buscas binárias nos valores ordenados
+        # (no SQLite, um BETWEEN sobre o índice da coluna)
+        for column, label, bounds in (('cost', "Custo Total (R$/mês)", cost_bounds), ('deployment_year', "Ano de Implantação", deployment_year_bounds)):
+            if bounds[0] < bounds[1]:
+                st.slider(label, bounds[0], bounds[1], bounds, key=f"filter_{column}")
         
-        # Filtrar agentes
-        filtered_agents = {}
-        for name, data in agent_data.items():
-            if selected_category != 'Todos' and data['category'] != selected_category:
-                continue
-            if selected_provider != 'Todos' and data['provider'] != selected_provider:
-                continue
-            filtered_agents[name] = data
+        # Tempo usado no score de performance: a média ou um percentil das durações
+        score_latency = st.selectbox(
+            "Latência no score",
+            list(SCORE_LATENCIES),
+            format_func=SCORE_LATENCIES.get,
+            key="score_latency"
+        )
+        
+        sort = st.selectbox(
+            "Ordenar por",
+            list(AGENT_SORTS),
+            format_func=AGENT_SORTS.get,
+            key="agent_sort"
+        )
+        
+        # Filtrar agentes com um AND entre os bitmaps das facetas (no SQLite,
+        # uma consulta indexada da qual só a página atual é lida, via LIMIT/OFFSET);
+        # uma ordenação só filtra a permutação já montada para a versão (no SQLite,
+        # um ORDER BY pelo índice da coluna na mesma consulta)
+        mask = facet_index.mask(selections)
+        if sort is None:
+            matches = facet_index.indices(mask)
+        else:
+            orders = load_agent_orders(agent_data, agent_data.version, score_latency)
+            matches = facet_index.sorted_indices(mask, orders.order(*sort))
+        
+        perf.section('cartões')
+        
+        # Paginar: só os agentes da página atual são materializados e renderizados
+        start, end, page, pages = paginate(len(matches), key="agent_list", reset_on=(selected_category, selected_provider, selections['cost'], selections['deployment_year'], sort))
+        page_agents = {}
+        for i in matches[start:end]:
+            page_agents[str(agent_data.names[i])] = agent_data.record(i)
         
         # Exibir agentes disponíveis
-        for agent_name, data in filtered_agents.items():
+        for agent_name, data in page_agents.items():
             is_selected = agent_name in st.session_state.selected_agents
-            can_add = len(st.session_state.selected_agents) < 4
+            can_add = len(st.session_state.selected_agents) < limit
             
             st.markdown(f"""
             <div class="product-card">
@@ -526,17 +535,35 @@ def main():
                         st.session_state.selected_agents.append(agent_name)
                         st.rerun()
                 else:
-                    st.button("Limite atingido (4 agentes)", disabled=True, key=f"disabled_{agent_name}")
+                    st.button(f"Limite atingido ({limit} agentes)", disabled=True, key=f"disabled_{agent_name}")
+        
+        page_controls("agent_list", page, pages, len(matches), start, end)
     
     with col2:
         if not st.session_state.selected_agents:
-            st.markdown("""
+            st.markdown(f"""
             <div style="text-align: center; padding: 4rem 2rem; color: #666;">
                 <h3>👈 Selecione agentes para comparar</h3>
-                <p>Escolha até 4 agentes na barra lateral para ver a comparação detalhada</p>
+                <p>Escolha até {limit} agentes na barra lateral para ver a comparação detalhada</p>
             </div>
             """, unsafe_allow_html=True)
+            
+            perf.section('ranking da frota')
+            
+            # Ranking da frota inteira, disponível sem selecionar nenhum agente
+            st.markdown("### 🏆 Ranking da Frota")
+            scores = load_agent_scores(agent_data, agent_data.version, score_latency)
+            render_performance_ranking(agent_data, scores, top_k(scores, LEADERBOARD_SIZE))
+            
+            perf.section('fronteira')
+            
+            # Fronteira de Pareto: os trade-offs que nenhum outro agente supera
+            st.markdown("### 🧭 Fronteira de Pareto")
+            frontier = load_agent_frontier(agent_data, agent_data.version, score_latency)
+            render_pareto_frontier(agent_data, frontier)
         else:
+            perf.section('tabela')
+            
             # Header da comparação
             st.markdown("""
             <div class="comparison-header">
@@ -547,181 +574,37 @@ def main():
             # Tabela de especificações
             st.markdown("### 📊 Métricas de Performance")
             
-            # Criar tabela de comparação
-            all_specs = set()
-            for agent in st.session_state.selected_agents:
-                all_specs.update(agent_data[agent]['specifications'].keys())
-            
-            # Cabeçalho da tabela
-            cols = st.columns([2] + [1] * len(st.session_state.selected_agents))
-            with cols[0]:
-                st.markdown("**Métrica**")
-            
-            for i, agent in enumerate(st.session_state.selected_agents):
-                with cols[i + 1]:
-                    data = agent_data[agent]
-                    st.markdown(f"""
-                    <div style="text-align: center;">
-                        <div style="font-size: 1.5rem; margin-bottom: 0.5rem;">{data['icon']}</div>
-                        <div style="font-weight: 600; font-size: 0.9rem;">{agent}</div>
-                        <div style="color: #666; font-size: 0.8rem;">{data['provider']}</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-            
-            st.markdown("---")
-            
-            # Custo (linha especial)
-            cols = st.columns([2] + [1] * len(st.session_state.selected_agents))
-            with cols[0]:
-                st.markdown("**Custo Mensal**")
-            
-            costs = [agent_data[agent]['cost'] for agent in st.session_state.selected_agents]
-            min_cost = min(costs)
-            max_cost = max(costs)
-            
-            for i, agent in enumerate(st.session_state.selected_agents):
-                with cols[i + 1]:
-                    cost = agent_data[agent]['cost']
-                    if cost == min_cost and len(st.session_state.selected_agents) > 1:
-                        st.markdown(f'<div class="best-price">R$ {cost:,}/mês</div>', unsafe_allow_html=True)
-                    elif cost == max_cost and len(st.session_state.selected_agents) > 1:
-                        st.markdown(f'<div class="premium">R$ {cost:,}/mês</div>', unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"**R$ {cost:,}/mês**")
+            # Modelo da comparação (tabela, recomendações e métricas), compartilhado
+            # entre sessões e calculado só na primeira vez que esta seleção aparece
+            selected = st.session_state.selected_agents
+            model = load_comparison_cache().get_or_compute(
+                selected,
+                agent_data.fingerprint(selected),
+                lambda agents: compute_agent_comparison(agent_data, agents)
+            )
+            items = model['items']
+            if len(selected) > COMPARISON_LIMIT:
+                render_wide_comparison_table(model['matrix'].reordered(selected))
+            else:
+                render_comparison_table(model['matrix'].reordered(selected))
             
-            # Outras especificações com destaque para melhores/piores valores
-            for spec in sorted(all_specs):
-                cols = st.columns([2] + [1] * len(st.session_state.selected_agents))
-                with cols[0]:
-                    st.markdown(f"**{spec}**")
-                
-                # Para ano de implantação, destacar o mais recente
-                if spec == "Ano de Implantação":
-                    years = []
-                    for agent in st.session_state.selected_agents:
-                        specs = agent_data[agent]['specifications']
-                        if spec in specs:
-                            years.append(specs[spec])
-                    
-                    max_year = max(years) if years else 0
-                    
-                    for i, agent in enumerate(st.session_state.selected_agents):
-                        with cols[i + 1]:
-                            specs = agent_data[agent]['specifications']
-                            if spec in specs:
-                                value = specs[spec]
-                                if value == max_year and len(st.session_state.selected_agents) > 1:
-                                    st.markdown(f'<div class="most-recent">{value}</div>', unsafe_allow_html=True)
-                                else:
-                                    st.markdown(f"{value}")
-                            else:
-                                st.markdown("-")
-                
-                # Para erros e bugs, destacar menor valor (melhor performance)
-                elif "Erros" in spec or "Bugs" in spec:
-                    values = []
-                    for agent in st.session_state.selected_agents:
-                        specs = agent_data[agent]['specifications']
-                        if spec in specs:
-                            # Extrair número da string "45/mês"
-                            num_value = int(specs[spec].split('/')[0])
-                            values.append(num_value)
-                    
-                    if values:
-                        min_value = min(values)
-                        max_value = max(values)
-                        
-                        for i, agent in enumerate(st.session_state.selected_agents):
-                            with cols[i + 1]:
-                                specs = agent_data[agent]['specifications']
-                                if spec in specs:
-                                    value = specs[spec]
-                                    num_value = int(value.split('/')[0])
-                                    if num_value == min_value and len(st.session_state.selected_agents) > 1:
-                                        st.markdown(f'<div class="best-performance">{value}</div>', unsafe_allow_html=True)
-                                    elif num_value == max_value and len(st.session_state.selected_agents) > 1:
-                                        st.markdown(f'<div class="worst-performance">{value}</div>', unsafe_allow_html=True)
-                                    else:
-                                        st.markdown(f"{value}")
-                                else:
-                                    st.markdown("-")
-                
-                # Para tempo de atendimento, destacar menor valor (melhor performance)
-                elif "Tempo Médio" in spec:
-                    values = []
-                    for agent in st.session_state.selected_agents:
-                        specs = agent_data[agent]['specifications']
-                        if spec in specs:
-                            # Extrair número da string "2.3 min"
-                            num_value = float(specs[spec].split(' ')[0])
-                            values.append(num_value)
-                    
-                    if values:
-                        min_value = min(values)
-                        max_value = max(values)
-                        
-                        for i, agent in enumerate(st.session_state.selected_agents):
-                            with cols[i + 1]:
-                                specs = agent_data[agent]['specifications']
-                                if spec in specs:
-                                    value = specs[spec]
-                                    num_value = float(value.split(' ')[0])
-                                    if num_value == min_value and len(st.session_state.selected_agents) > 1:
-                                        st.markdown(f'<div class="best-performance">{value}</div>', unsafe_allow_html=True)
-                                    elif num_value == max_value and len(st.session_state.selected_agents) > 1:
-                                        st.markdown(f'<div class="worst-performance">{value}</div>', unsafe_allow_html=True)
-                                    else:
-                                        st.markdown(f"{value}")
-                                else:
-                                    st.markdown("-")
-                
-                # Para quantidade de atendimentos, destacar maior valor (melhor performance)
-                elif "Quantidade de Atendimentos" in spec:
-                    values = []
-                    for agent in st.session_state.selected_agents:
-                        specs = agent_data[agent]['specifications']
-                        if spec in specs:
-                            # Extrair número da string "15,000/mês"
-                            num_value = int(specs[spec].replace(',', '').split('/')[0])
-                            values.append(num_value)
-                    
-                    if values:
-                        min_value = min(values)
-                        max_value = max(values)
-                        
-                        for i, agent in enumerate(st.session_state.selected_agents):
-                            with cols[i + 1]:
-                                specs = agent_data[agent]['specifications']
-                                if spec in specs:
-                                    value = specs[spec]
-                                    num_value = int(value.replace(',', '').split('/')[0])
-                                    if num_value == max_value and len(st.session_state.selected_agents) > 1:
-                                        st.markdown(f'<div class="best-performance">{value}</div>', unsafe_allow_html=True)
-                                    elif num_value == min_value and len(st.session_state.selected_agents) > 1:
-                                        st.markdown(f'<div class="worst-performance">{value}</div>', unsafe_allow_html=True)
-                                    else:
-                                        st.markdown(f"{value}")
-                                else:
-                                    st.markdown("-")
-                
-                else:
-                    for i, agent in enumerate(st.session_state.selected_agents):
-                        with cols[i + 1]:
-                            specs = agent_data[agent]['specifications']
-                            if spec in specs:
-                                st.markdown(f"{specs[spec]}")
-                            else:
-                                st.markdown("-")
+            perf.section('históricos')
             
             # Histórico de custos usando gráficos nativos do Streamlit
-            if len(st.session_state.selected_agents) <= 2:
-                st.markdown("### 📈 Histórico de Custos")
-                
-                chart_cols = st.columns(len(st.session_state.selected_agents))
+            st.markdown("### 📈 Histórico de Custos")
+            if len(selected) > 2:
+                # Um único gráfico com uma série por agente
+                histories = pd.concat([
+                    create_cost_chart_data(agent, items[agent]['cost'])[0].assign(Agente=agent)
+                    for agent in selected
+                ], ignore_index=True)
+                st.line_chart(histories, x='Data', y='Custo', color='Agente', height=300)
+            else:
+                chart_cols = st.columns(len(selected))
                 
-                for i, agent in enumerate(st.session_state.selected_agents):
+                for i, agent in enumerate(selected):
                     with chart_cols[i]:
-                        data = agent_data[agent]
+                        data = items[agent]
                         chart_data, trend_text, trend_class = create_cost_chart_data(agent, data['cost'])
                         
                         st.markdown(f"""
@@ -733,32 +616,26 @@ def main():
                         # Usar line_chart nativo do Streamlit
                         st.line_chart(chart_data.set_index('Data')['Custo'], height=200)
             
+            perf.section('gráfico de custos')
+            
             # Gráfico de comparação de custos
             st.markdown("### 💰 Comparação de Custos")
             
             cost_comparison = pd.DataFrame({
-                'Agente': st.session_state.selected_agents,
-                'Custo Mensal (R$)': [agent_data[agent]['cost'] for agent in st.session_state.selected_agents]
+                'Agente': selected,
+                'Custo Mensal (R$)': [items[agent]['cost'] for agent in selected]
             })
             
             st.bar_chart(cost_comparison.set_index('Agente')['Custo Mensal (R$)'])
             
-            # Recomendações
-            st.markdown("### 💡 Recomendações")
+            perf.section('recomendações')
             
-            # Melhor custo-benefício (baseado em atendimentos/custo)
-            best_value = None
-            best_score = 0
+            # Recomendações (empates resolvidos pela ordem de seleção)
+            st.markdown("### 💡 Recomendações")
             
-            for agent in st.session_state.selected_agents:
-                data = agent_data[agent]
-                # Extrair número de atendimentos
-                atendimentos = int(data['specifications']['Quantidade de Atendimentos'].replace(',', '').split('/')[0])
-                # Score baseado em atendimentos/custo
-                score = atendimentos / data['cost']
-                if score > best_score:
-                    best_score = score
-                    best_value = agent
+            best_value = first_selected(selected, model['best_value'])
+            newest = first_selected(selected, model['newest'])
+            cheapest = first_selected(selected, model['cheapest'])
             
             rec_cols = st.columns(3)
             
@@ -768,126 +645,66 @@ def main():
                     <div class="recommendation-card rec-success">
                         <h4>🏆 Melhor Custo-Benefício</h4>
                         <h3>{best_value}</h3>
-                        <p>R$ {agent_data[best_value]['cost']:,}/mês</p>
+                        <p>R$ {items[best_value]['cost']:,}/mês</p>
                     </div>
                     """, unsafe_allow_html=True)
             
             with rec_cols[1]:
                 # Mais recente
-                newest = max(st.session_state.selected_agents, 
-                           key=lambda x: agent_data[x]['deployment_year'])
                 st.markdown(f"""
                 <div class="recommendation-card rec-info">
                     <h4>🆕 Mais Recente</h4>
                     <h3>{newest}</h3>
-                    <p>{agent_data[newest]['deployment_year']}</p>
+                    <p>{items[newest]['deployment_year']}</p>
                 </div>
                 """, unsafe_allow_html=True)
             
             with rec_cols[2]:
                 # Mais econômico
-                cheapest = min(st.session_state.selected_agents, 
-                             key=lambda x: agent_data[x]['cost'])
                 st.markdown(f"""
                 <div class="recommendation-card rec-warning">
                     <h4>💰 Mais Econômico</h4>
                     <h3>{cheapest}</h3>
-                    <p>R$ {agent_data[cheapest]['cost']:,}/mês</p>
+                    <p>R$ {items[cheapest]['cost']:,}/mês</p>
                 </div>
                 """, unsafe_allow_html=True)
             
+            perf.section('análise')
+            
             # Análise adicional
-            if len(st.session_state.selected_agents) > 1:
+            if len(selected) > 1:
                 st.markdown("### 📊 Análise Comparativa")
                 
-                # Criar métricas comparativas
-                avg_cost = sum(costs) / len(costs)
-                cost_range = max_cost - min_cost
-                
-                # Calcular total de atendimentos
-                total_atendimentos = 0
-                for agent in st.session_state.selected_agents:
-                    atendimentos_str = agent_data[agent]['specifications']['Quantidade de Atendimentos']
-                    atendimentos = int(atendimentos_str.replace(',', '').split('/')[0])
-                    total_atendimentos += atendimentos
-                
-                # Calcular média de erros
-                total_erros = 0
-                for agent in st.session_state.selected_agents:
-                    erros_str = agent_data[agent]['specifications']['Total de Erros']
-                    erros = int(erros_str.split('/')[0])
-                    total_erros += erros
-                avg_erros = total_erros / len(st.session_state.selected_agents)
-                
                 metric_cols = st.columns(4)
                 
                 with metric_cols[0]:
-                    st.metric("Custo Médio", f"R$ {avg_cost:,.0f}/mês")
+                    st.metric("Custo Médio", f"R$ {model['avg_cost']:,.0f}/mês")
                 
                 with metric_cols[1]:
-                    st.metric("Diferença de Custo", f"R$ {cost_range:,.0f}/mês")
+                    st.metric("Diferença de Custo", f"R$ {model['cost_range']:,.0f}/mês")
                 
                 with metric_cols[2]:
-                    st.metric("Total Atendimentos", f"{total_atendimentos:,}/mês")
+                    st.metric("Total Atendimentos", f"{model['total_atendimentos']:,}/mês")
                 
                 with metric_cols[3]:
-                    st.metric("Média de Erros", f"{avg_erros:.0f}/mês")
+                    st.metric("Média de Erros", f"{model['avg_erros']:.0f}/mês")
+                
+                perf.section('score')
                 
                 # Performance Score
                 st.markdown("### 🎯 Score de Performance")
                 
-                performance_data = []
-                for agent in st.session_state.selected_agents:
-                    data = agent_data[agent]
-                    specs = data['specifications']
-                    
-                    # Extrair métricas
-                    atendimentos = int(specs['Quantidade de Atendimentos'].replace(',', '').split('/')[0])
-                    erros = int(specs['Total de Erros'].split('/')[0])
-                    bugs = int(specs['Total de Bugs'].split('/')[0])
-                    tempo = float(specs['Tempo Médio de Atendimento'].split(' ')[0])
-                    
-                    # Calcular score (maior é melhor)
-                    # Fórmula: (atendimentos * 100) / (custo + erros*10 + bugs*15 + tempo*100)
-                    score = (atendimentos * 100) / (data['cost'] + erros*10 + bugs*15 + tempo*100)
-                    
-                    performance_data.append({
-                        'Agente': agent,
-                        'Score': score,
-                        'Atendimentos': atendimentos,
-                        'Custo': data['cost'],
-                        'Erros': erros,
-                        'Bugs': bugs,
-                        'Tempo (min)': tempo
-                    })
-                
-                # Ordenar por score
-                performance_data.sort(key=lambda x: x['Score'], reverse=True)
-                
-                # Mostrar ranking
-                for i, perf in enumerate(performance_data):
-                    color = "#d4edda" if i == 0 else "#f8f9fa"
-                    border_color = "#c3e6cb" if i == 0 else "#dee2e6"
-                    icon = "🥇" if i == 0 else "🥈" if i == 1 else "🥉" if i == 2 else "🔹"
-                    
-                    st.markdown(f"""
-                    <div style="background: {color}; border: 1px solid {border_color}; padding: 1rem; margin: 0.5rem 0; border-radius: 8px;">
-                        <div style="display: flex; align-items: center; justify-content: space-between;">
-                            <div style="display: flex; align-items: center;">
-                                <span style="font-size: 1.2rem; margin-right: 0.5rem;">{icon}</span>
-                                <strong>{perf['Agente']}</strong>
-                            </div>
-                            <div style="text-align: right;">
-                                <div style="font-size: 1.1rem; font-weight: 600; color: #007bff;">
-                                    Score: {perf['Score']:.2f}
-                                </div>
-                                <div style="font-size: 0.9rem; color: #666;">
-                                    {perf['Atendimentos']:,} atend. | R$ {perf['Custo']:,} | {perf['Erros']} erros
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                # Scores da frota inteira já calculados para esta versão do catálogo
+                scores = load_agent_scores(agent_data, agent_data.version, score_latency)
+                # Posições resolvidas na versão atual: o modelo em cache vale para
+                # outras versões, em que os mesmos agentes podem ter mudado de lugar
+                selected_idx = [agent_data.index_of(agent) for agent in selected]
+                selected_scores = scores[selected_idx]
+                ranking = [selected_idx[i] for i in np.argsort(-selected_scores, kind='stable')]
+                render_performance_ranking(agent_data, scores, ranking)
+    
+    perf.end()
+    render_profiler_panel(profiler, 'agentes')
 
 if __name__ == "__main__":
     main()
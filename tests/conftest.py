@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Os testes importam os módulos do app a partir da raiz do repositório
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# Os módulos leem o diretório dos dados ao serem importados: os catálogos
+# dos testes ficam num diretório temporário, nunca nos dados do app
+os.environ.setdefault('CATALOG_DATA_DIR', tempfile.mkdtemp(prefix='catalog-tests-'))
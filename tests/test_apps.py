@@ -0,0 +1,87 @@
+import json
+import os
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import catalog
+import metrics
+from conftest import REPO_DIR
+
+# app -> chave da seleção, dois itens dos dados iniciais, chave e valor da ordenação
+APPS = {
+    'appTest.py': ('selected_products', ['iPhone 15 Pro Max', 'Galaxy S24 Ultra'], 'product_sort', ('price', True)),
+    'test2.py': ('selected_agents', ['Agente Alpha', 'Agente Beta'], 'agent_sort', ('cost', False)),
+}
+
+
+@pytest.fixture(params=['columnar', 'sqlite'])
+def backend(request, monkeypatch):
+    """Backend de leitura dos catálogos, trocado sem reimportar os módulos"""
+    monkeypatch.setattr(catalog, 'CATALOG_BACKEND', request.param)
+    # Catálogos e índices em cache são do processo: cada backend abre os seus
+    st.cache_resource.clear()
+    yield request.param
+    st.cache_resource.clear()
+
+
+@pytest.mark.parametrize('script', list(APPS))
+def test_app_renders(backend, script):
+    """Cada app renderiza a lista (ordenada) e a comparação com os dados iniciais em ambos os backends"""
+    selection_key, names, sort_key, sort = APPS[script]
+    at = AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=60)
+    at.run()
+    assert not at.exception, at.exception[0].message if at.exception else None
+
+    at.session_state[sort_key] = sort
+    at.session_state[selection_key] = names
+    at.run()
+    assert not at.exception, at.exception[0].message if at.exception else None
+
+
+def test_unknown_percentiles_are_hidden(backend):
+    """Sem eventos ingeridos, as linhas de p95/p99 não aparecem na comparação de agentes"""
+    at = AppTest.from_file(os.path.join(REPO_DIR, 'test2.py'), default_timeout=60)
+    at.session_state['selected_agents'] = ['Agente Alpha', 'Agente Beta']
+    at.run()
+    assert not at.exception, at.exception[0].message if at.exception else None
+    table = next(md.value for md in at.markdown if 'comparison-table' in md.value)
+    assert 'Tempo Médio de Atendimento' in table
+    assert 'Tempo de Atendimento p95' not in table
+    assert 'Tempo de Atendimento p99' not in table
+
+
+def ranking(at):
+    return next(md.value for md in at.markdown if 'Score:' in md.value)
+
+
+def test_reload_with_open_comparison(backend, tmp_path, monkeypatch):
+    """Remover outro agente do arquivo de dados não quebra nem troca o ranking de uma comparação aberta"""
+    directory = str(tmp_path / 'agents')
+    source = str(tmp_path / 'agents.json')
+    monkeypatch.setattr(metrics, 'AGENT_CATALOG_DIR', directory)
+    monkeypatch.setenv('AGENT_SOURCE', source)
+
+    # Os dois últimos agentes do catálogo: com um agente a menos antes deles,
+    # as posições antigas passam do fim das colunas
+    at = AppTest.from_file(os.path.join(REPO_DIR, 'test2.py'), default_timeout=60)
+    at.session_state['selected_agents'] = ['Agente Epsilon', 'Agente Zeta']
+    at.run()
+    assert not at.exception, at.exception[0].message if at.exception else None
+
+    seeded = metrics.AgentCatalog(directory)
+    records = {name: seeded[name] for name in seeded.names.tolist() if name != 'Agente Alpha'}
+    with open(source, 'w', encoding='utf-8') as f:
+        json.dump(records, f, ensure_ascii=False)
+    at.run()
+    assert not at.exception, at.exception[0].message if at.exception else None
+    reloaded = ranking(at)
+
+    # O mesmo ranking que um processo novo calcula sobre os dados recarregados
+    st.cache_resource.clear()
+    fresh = AppTest.from_file(os.path.join(REPO_DIR, 'test2.py'), default_timeout=60)
+    fresh.session_state['selected_agents'] = ['Agente Epsilon', 'Agente Zeta']
+    fresh.run()
+    assert not fresh.exception, fresh.exception[0].message if fresh.exception else None
+    assert reloaded == ranking(fresh)
@@ -0,0 +1,102 @@
+import math
+import os
+import time
+
+import catalog
+from catalog import CatalogSource, ColumnarCatalog, current_version, update_catalog, write_catalog
+
+SCHEMA = [('brand', 'category'), ('price', 'int'), ('launch_date', 'str'), ('specifications', 'json')]
+
+
+def records(price):
+    return {
+        'Produto A': {'brand': 'Apple', 'price': price, 'launch_date': '2024-01-01', 'specifications': {'Tela': '6.1"'}},
+        'Produto B': {'brand': 'Dell', 'price': 2500, 'launch_date': '2023-05-10', 'specifications': {}},
+    }
+
+
+def versions(directory):
+    return {name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)) and not name.startswith('.')}
+
+
+def test_publish_keeps_current_and_previous(tmp_path, monkeypatch):
+    """Cada publicação apaga as versões anteriores à versão que acabou de sair de uso"""
+    monkeypatch.setattr(catalog, 'PRUNE_GRACE_SECONDS', 0)
+    directory = str(tmp_path)
+    published = [write_catalog(directory, records(price), SCHEMA) for price in (1000, 2000, 3000, 4000)]
+    assert versions(directory) == set(published[-2:])
+    assert current_version(directory) == published[-1]
+    assert ColumnarCatalog(directory)['Produto A']['price'] == 4000
+
+    # Reativar a versão atual não apaga a anterior
+    write_catalog(directory, records(4000), SCHEMA)
+    assert versions(directory) == set(published[-2:])
+
+
+def test_recent_versions_survive_pruning(tmp_path):
+    """Versões ativadas há pouco podem ser de outro processo e ficam até passar a carência"""
+    directory = str(tmp_path)
+    published = [write_catalog(directory, records(price), SCHEMA) for price in (1000, 2000, 3000)]
+    assert versions(directory) == set(published)
+
+
+def age(directory, version, seconds=3600):
+    then = time.time() - seconds
+    os.utime(os.path.join(directory, version), (then, then))
+
+
+def test_versions_in_use_survive_pruning(tmp_path):
+    """Uma versão antiga que algum processo ainda abre não é apagada"""
+    directory = str(tmp_path)
+    published = [write_catalog(directory, records(price), SCHEMA) for price in (1000, 2000, 3000)]
+    for version in published:
+        age(directory, version)
+    # Outro processo ainda lê a primeira versão
+    ColumnarCatalog(directory, published[0])
+    latest = write_catalog(directory, records(4000), SCHEMA)
+    assert versions(directory) == {published[0], published[2], latest}
+
+
+def test_source_refreshes_the_version_it_serves(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, 'PRUNE_GRACE_SECONDS', 0)
+    directory = str(tmp_path / 'catalog')
+    source = CatalogSource(directory, str(tmp_path / 'ausente.json'), SCHEMA, lambda: records(1000))
+    served = source.current().version
+    age(directory, served)
+    source.current()
+    assert time.time() - os.stat(os.path.join(directory, served)).st_mtime < 60
+
+
+def test_text_columns_are_variable_length(tmp_path):
+    """Textos e JSON ficam em bytes UTF-8 com posições, sem preencher até o maior valor"""
+    directory = str(tmp_path)
+    data = records(1000)
+    data['Produto A']['specifications'] = {'Descrição': 'ç' * 500}
+    write_catalog(directory, data, SCHEMA)
+    opened = ColumnarCatalog(directory)
+    assert opened['Produto A']['specifications'] == {'Descrição': 'ç' * 500}
+    assert opened['Produto B']['specifications'] == {}
+    dates = opened.column('launch_date')
+    assert dates[1] == '2023-05-10'
+    assert dates[-1] == '2023-05-10'
+    assert dates[:].tolist() == ['2024-01-01', '2023-05-10']
+    assert dates[[1, 0]].tolist() == ['2023-05-10', '2024-01-01']
+    # O JSON curto não ocupa o espaço do longo
+    offsets = opened.column('specifications').offsets
+    assert offsets[2] - offsets[1] == len('{}')
+
+
+def test_update_adds_columns_and_rehashes_rows(tmp_path):
+    """Uma coluna nova muda o hash de todas as linhas, como se a versão fosse gravada do zero"""
+    directory = str(tmp_path)
+    write_catalog(directory, records(1000), SCHEMA)
+    opened = ColumnarCatalog(directory)
+    schema = SCHEMA + [('rating', 'float')]
+    update_catalog(opened, [opened.index_of('Produto B')], {'rating': [4.5]}, schema)
+
+    updated = ColumnarCatalog(directory)
+    assert updated['Produto B']['rating'] == 4.5
+    assert math.isnan(updated['Produto A']['rating'])
+    rewritten = str(tmp_path / 'rewritten')
+    write_catalog(rewritten, {name: updated[name] for name in updated.names.tolist()}, schema)
+    assert updated.version == current_version(rewritten)
@@ -0,0 +1,108 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from comparison import ComparisonCache, highlight_classes, highlight_rows
+
+NAN = float('nan')
+
+
+def model(selection):
+    return {'items': {name: {'cost': 100} for name in selection}}
+
+
+def test_selection_order_does_not_matter():
+    cache = ComparisonCache()
+    first = cache.get_or_compute(['B', 'A'], 1, model)
+    assert cache.get_or_compute(['A', 'B'], 1, model) is first
+    assert cache.stats()['hits'] == 1
+    # O modelo é calculado na ordem canônica
+    assert list(first['items']) == ['A', 'B']
+
+
+def test_version_is_part_of_the_key():
+    cache = ComparisonCache()
+    first = cache.get_or_compute(['A'], 1, model)
+    assert cache.get_or_compute(['A'], 2, model) is not first
+    assert cache.stats()['misses'] == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = ComparisonCache(max_entries=2)
+    a = cache.get_or_compute(['A'], 1, model)
+    cache.get_or_compute(['B'], 1, model)
+    # Usar A de novo faz de B o mais antigo
+    assert cache.get_or_compute(['A'], 1, model) is a
+    cache.get_or_compute(['C'], 1, model)
+    assert cache.stats()['entries'] == 2
+    assert cache.get_or_compute(['A'], 1, model) is a
+    misses = cache.stats()['misses']
+    cache.get_or_compute(['B'], 1, model)
+    assert cache.stats()['misses'] == misses + 1
+
+
+def test_byte_cap():
+    size = len(pickle.dumps(model(['A']), protocol=pickle.HIGHEST_PROTOCOL))
+    cache = ComparisonCache(max_bytes=2 * size)
+    for name in ['A', 'B', 'C']:
+        cache.get_or_compute([name], 1, model)
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['bytes'] == 2 * size
+
+    # Um modelo maior que o limite inteiro é devolvido, mas não guardado
+    large = cache.get_or_compute(['X' * (4 * size)], 1, model)
+    assert list(large['items']) == ['X' * (4 * size)]
+    assert cache.stats()['entries'] == 2
+
+
+def test_invalidate_drops_selections_with_the_names():
+    cache = ComparisonCache()
+    cache.get_or_compute(['A', 'B'], 1, model)
+    cache.get_or_compute(['B', 'C'], 1, model)
+    cache.get_or_compute(['C', 'D'], 1, model)
+    assert cache.invalidate(['A', 'D']) == 2
+    stats = cache.stats()
+    assert stats['entries'] == 1
+    assert stats['bytes'] == len(pickle.dumps(model(['B', 'C']), protocol=pickle.HIGHEST_PROTOCOL))
+    assert cache.invalidate(['Z']) == 0
+
+
+@pytest.mark.parametrize('row, direction, best, worst', [
+    ([1, 2, 3], 'higher', [0, 0, 1], [1, 0, 0]),
+    ([1, 2, 3], 'lower', [1, 0, 0], [0, 0, 1]),
+    # 'recent' destaca o maior, sem pior
+    ([2022, 2024, 2023], 'recent', [0, 1, 0], [0, 0, 0]),
+    ([1, 2, 3], None, [0, 0, 0], [0, 0, 0]),
+    # Empates no melhor e no pior
+    ([3, 1, 3, 1], 'higher', [1, 0, 1, 0], [0, 1, 0, 1]),
+    # Todos iguais: todos são o melhor, nenhum é o pior
+    ([5, 5, 5], 'higher', [1, 1, 1], [0, 0, 0]),
+    # Valores ausentes nunca são destacados
+    ([NAN, 2, 1], 'higher', [0, 1, 0], [0, 0, 1]),
+    ([NAN, 2, NAN], 'lower', [0, 1, 0], [0, 0, 0]),
+    ([NAN, NAN, NAN], 'higher', [0, 0, 0], [0, 0, 0]),
+])
+def test_highlight_rows(row, direction, best, worst):
+    found_best, found_worst = highlight_rows([row], [direction])
+    assert found_best[0].astype(int).tolist() == best
+    assert found_worst[0].astype(int).tolist() == worst
+
+
+def test_single_item_is_not_highlighted():
+    best, worst = highlight_rows([[1], [NAN]], ['higher', 'lower'])
+    assert not best.any() and not worst.any()
+
+
+def test_rows_match_highlight_classes():
+    """A versão vetorizada (tabela ampla) dá os mesmos destaques que a por linha"""
+    rng = np.random.default_rng(5)
+    values = rng.integers(0, 4, (40, 6)).astype(np.float64)
+    values[rng.random(values.shape) < 0.2] = NAN
+    values[7] = NAN
+    directions = [['higher', 'lower', 'recent', None][i % 4] for i in range(len(values))]
+    best, worst = highlight_rows(values, directions)
+    for row, direction, row_best, row_worst in zip(values, directions, best, worst):
+        classes = highlight_classes([None if np.isnan(v) else v for v in row], direction, 'best', 'worst')
+        assert [c == 'best' for c in classes] == row_best.tolist()
+        assert [c == 'worst' for c in classes] == row_worst.tolist()
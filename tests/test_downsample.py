@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from downsample import downsample, lttb, minmax
+
+
+def series(kind, n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.integers(1, 100, n)).astype(np.float64)
+    if kind == 'walk':
+        y = np.cumsum(rng.normal(0, 1, n))
+    elif kind == 'spike':
+        # Um pico isolado no meio de uma série quase constante
+        y = rng.normal(0, 0.01, n)
+        y[n // 3] = 50.0
+        y[2 * n // 3] = -50.0
+    else:
+        y = np.full(n, 7.0)
+    return x, y
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+@pytest.mark.parametrize('kind', ['walk', 'spike', 'flat'])
+@pytest.mark.parametrize('n, max_points', [(10_000, 400), (1_000, 4), (1_000, 5), (401, 400), (50_000, 37)])
+def test_downsample_guarantees(method, kind, n, max_points):
+    x, y = series(kind, n)
+    keep = downsample(x, y, max_points, method)
+    assert len(keep) <= max_points
+    assert np.all(np.diff(keep) > 0)
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert y[keep].min() == y.min()
+    assert y[keep].max() == y.max()
+
+
+@pytest.mark.parametrize('method', ['lttb', 'minmax'])
+@pytest.mark.parametrize('n', [0, 1, 3, 400])
+def test_short_series_unchanged(method, n):
+    x, y = series('walk', n)
+    assert downsample(x, y, 400, method).tolist() == list(range(n))
+
+
+def test_too_few_points():
+    x, y = series('walk', 100)
+    with pytest.raises(ValueError):
+        downsample(x, y, 3)
+
+
+@pytest.mark.parametrize('threshold', [2, 3, 10, 99])
+def test_lttb_picks_one_point_per_bucket(threshold):
+    x, y = series('walk', 100)
+    keep = lttb(x, y, threshold)
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == 99
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    x, y = series('walk', 1_000)
+    keep = set(minmax(y, 10).tolist())
+    for bucket in np.array_split(np.arange(1_000), 10):
+        assert bucket[np.argmin(y[bucket])] in keep
+        assert bucket[np.argmax(y[bucket])] in keep
@@ -0,0 +1,113 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from catalog import current_version, write_catalog
+from events import EventRollups
+from metrics import AGENT_SCHEMA, AgentCatalog
+from test_sqlstore import agent_records
+
+
+def event(agent='Agente 0001', ts='2024-05-10T12:00:00Z', type='atendimento', minutes=2.0):
+    return json.dumps({'agent': agent, 'ts': ts, 'type': type, 'minutes': minutes}) + '\n'
+
+
+def write(path, text, mode='a'):
+    with open(path, mode, encoding='utf-8') as f:
+        f.write(text)
+
+
+def atendimentos(rollups, agent='Agente 0001', month='2024-05'):
+    return rollups.rollups[agent][month][0]
+
+
+def test_tail_consumes_complete_lines_only(tmp_path):
+    log = str(tmp_path / 'events.jsonl')
+    rollups = EventRollups(str(tmp_path / 'state'))
+    complete = event() + event(type='erro') + 'não é json\n'
+    write(log, complete + event()[:10])
+    assert rollups.tail(log) == 2
+    assert rollups.invalid == 1
+    assert rollups.offsets[log][1] == len(complete.encode('utf-8'))
+
+    # A linha pela metade entra quando termina de ser escrita
+    write(log, event()[10:])
+    assert rollups.tail(log) == 1
+    assert rollups.tail(log) == 0
+    assert atendimentos(rollups) == 2
+    assert rollups.rollups['Agente 0001']['2024-05'][1] == 1
+
+
+def test_rotated_and_truncated_logs_are_read_from_the_start(tmp_path):
+    log = str(tmp_path / 'events.jsonl')
+    rollups = EventRollups(str(tmp_path / 'state'))
+    write(log, event() + event())
+    assert rollups.tail(log) == 2
+
+    # Rotação: o log antigo é renomeado e um novo (outro inode) toma o lugar
+    os.rename(log, log + '.1')
+    write(log, event() + event() + event())
+    assert rollups.tail(log) == 3
+    assert atendimentos(rollups) == 5
+
+    # Truncamento: o arquivo encolhe abaixo da posição lida
+    write(log, event(), mode='w')
+    assert rollups.tail(log) == 1
+    assert atendimentos(rollups) == 6
+
+
+def test_restart_from_checkpoint_does_not_double_count(tmp_path):
+    log = str(tmp_path / 'events.jsonl')
+    state = str(tmp_path / 'state')
+    write(log, event() * 3)
+    rollups = EventRollups(state)
+    rollups.tail(log)
+    rollups.checkpoint()
+
+    # Eventos lidos depois do checkpoint se perdem no reinício e são relidos
+    write(log, event() * 2)
+    assert rollups.tail(log) == 2
+
+    restarted = EventRollups(state)
+    assert atendimentos(restarted) == 3
+    write(log, event())
+    assert restarted.tail(log) == 3
+    assert atendimentos(restarted) == 6
+    assert restarted.tail(log) == 0
+    assert restarted.rollups['Agente 0001']['2024-05'][4].count == 6
+
+
+def test_publish_writes_a_catalog_version(tmp_path):
+    directory = str(tmp_path / 'agents')
+    before = write_catalog(directory, agent_records(n=20), AGENT_SCHEMA)
+    old = AgentCatalog(directory)
+    index = old.index_of('Agente 0001')
+
+    log = str(tmp_path / 'events.jsonl')
+    durations = [1.0, 2.0, 3.0, 4.0, 10.0]
+    write(log, ''.join(event(minutes=minutes) for minutes in durations))
+    write(log, event(type='bug') + event(agent='Agente fora do catálogo'))
+    # O evento de junho fecha maio, o mês publicado por padrão
+    write(log, event(ts='2024-06-01T00:00:00Z'))
+    rollups = EventRollups(str(tmp_path / 'state'))
+    rollups.tail(log)
+
+    month, version, changed = rollups.publish(directory)
+    assert (month, changed) == ('2024-05', 1)
+    assert version not in (None, before)
+    assert current_version(directory) == version
+
+    catalog = AgentCatalog(directory)
+    assert catalog.value(index, 'atendimentos') == len(durations)
+    assert catalog.value(index, 'bugs') == 1
+    assert catalog.value(index, 'tempo') == 4.0
+    assert 1.0 <= catalog.value(index, 'tempo_p95') <= catalog.value(index, 'tempo_p99') <= 10.0
+    # Só a linha publicada muda de hash
+    changed_rows = np.flatnonzero(np.asarray(catalog.row_hashes) != np.asarray(old.row_hashes))
+    assert changed_rows.tolist() == [index]
+    assert math.isnan(catalog.value(index + 1, 'tempo_p95'))
+
+    # Publicar o mesmo mês de novo não cria versão
+    assert rollups.publish(directory) == ('2024-05', None, 0)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from facets import FacetIndex
+
+
+@pytest.fixture
+def index():
+    rng = np.random.default_rng(3)
+    size = 1_003
+    codes = rng.integers(0, 3, size)
+    return FacetIndex(size, {'category': (codes, np.array(['A', 'B', 'C']))}, {'price': rng.integers(0, 100, size)})
+
+
+def test_range_bitmap_matches_scan(index):
+    """Faixas estreitas, largas e vazias dão o mesmo bitmap que varrer a coluna"""
+    values = np.asarray(index.sorted_values['price'])[np.argsort(index.orders['price'])]
+    for low, high in [(0, 99), (10, 20), (5, 95), (0, 0), (99, 99), (40, 39), (-5, 200)]:
+        expected = np.flatnonzero((values >= low) & (values <= high))
+        np.testing.assert_array_equal(index.indices(index.range_bitmap('price', low, high)), expected)
+
+
+def test_range_and_facet(index):
+    mask = index.mask({'category': 'B', 'price': (20, 80)})
+    values = np.asarray(index.sorted_values['price'])[np.argsort(index.orders['price'])]
+    codes = np.asarray(index.codes['category'])
+    expected = np.flatnonzero((codes == 1) & (values >= 20) & (values <= 80))
+    np.testing.assert_array_equal(index.indices(mask), expected)
+    assert index.count(mask) == len(expected)
+
+
+def test_empty_catalog():
+    index = FacetIndex(0, {'category': (np.array([], dtype=np.int32), np.array([], dtype=str))},
+                       {'price': np.array([], dtype=np.int64)})
+    assert index.bounds('price') == (0, 0)
+    assert index.count(index.mask({'price': (0, 10)})) == 0
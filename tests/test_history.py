@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import appTest
+import test2
+from history import PRICE_WALK, history_dates, simulated_history, today
+from timeseries import TimeSeriesStore
+
+
+def test_history_dates_are_weekly_datetimes():
+    dates = history_dates(6, date(2024, 7, 1))
+    assert dates.dtype == np.dtype('datetime64[D]')
+    assert len(dates) == 24
+    assert np.all(np.diff(dates) == np.timedelta64(7, 'D'))
+    assert dates[0] == np.datetime64('2024-01-03')
+    assert dates[-1] <= np.datetime64('2024-07-01')
+
+
+def test_simulated_history_is_deterministic():
+    first = simulated_history('Produto', 5000, 6, 0, PRICE_WALK, date(2024, 7, 1))
+    simulated_history.cache_clear()
+    again = simulated_history('Produto', 5000, 6, 0, PRICE_WALK, date(2024, 7, 1))
+    np.testing.assert_array_equal(first[0], again[0])
+    np.testing.assert_array_equal(first[1], again[1])
+    assert first[1][-1] == 5000
+
+
+@pytest.mark.parametrize('module, store_loader, create, value', [
+    (appTest, 'load_price_store', appTest.create_price_chart_data, 'Preço'),
+    (test2, 'load_cost_store', test2.create_cost_chart_data, 'Custo'),
+])
+def test_stored_and_simulated_histories_share_the_date_axis(tmp_path, monkeypatch, module, store_loader, create, value):
+    """Um item com observações reais e outro só com o simulado entram no mesmo gráfico ordenados por data"""
+    store = TimeSeriesStore(str(tmp_path))
+    end = today()
+    stored_dates = [end - timedelta(days=days) for days in (40, 20, 1)]
+    store.append(['real'] * 3, [d.isoformat() for d in stored_dates], [100.0, 110.0, 120.0])
+    store.flush()
+    monkeypatch.setattr(module, store_loader, lambda: store)
+
+    histories = pd.concat([
+        create(name, 1000)[0].assign(Item=name) for name in ['real', 'simulado']
+    ], ignore_index=True)
+    assert pd.api.types.is_datetime64_any_dtype(histories['Data'])
+    real = histories[histories['Item'] == 'real']
+    assert real[value].tolist() == [100.0, 110.0, 120.0]
+    # As duas séries cobrem a mesma janela e se intercalam ao ordenar pela data
+    ordered = histories.sort_values('Data')['Item'].tolist()
+    assert ordered[0] == 'simulado'
+    assert ordered.index('real') < len(ordered) - 1
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from catalog import write_catalog
+from import_feed import build_catalog, import_feeds, import_file
+from products import PRODUCT_SCHEMA, ProductCatalog, validate_product
+
+
+def feed_row(name, price, screen):
+    return {
+        'name': name,
+        'brand': 'Marca',
+        'category': 'Celulares',
+        'price': price,
+        'year': 2024,
+        'launch_date': '2024-02-01',
+        'specifications': {'Tela': screen, 'Descrição': 'ç' * (price % 7)},
+        'icon': '📱',
+    }
+
+
+def write_feed(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+
+@pytest.mark.parametrize('chunk_rows', [2, 1000])
+def test_import_matches_write_catalog_with_duplicates(tmp_path, chunk_rows):
+    """Com nomes repetidos (no mesmo feed e entre feeds), a versão é a do write_catalog dos mesmos registros"""
+    feeds = [
+        [feed_row('A', 1000, '6.1"'), feed_row('B', 2000, '6.7"'), feed_row('A', 1100, '6.2"'), feed_row('C', 3000, '6.4"')],
+        [feed_row('D', 4000, '6.0"'), feed_row('B', 2200, '6.8"'), feed_row('E com um nome bem mais longo', 5000, '6.5"')],
+    ]
+    paths = []
+    records = {}
+    for i, rows in enumerate(feeds):
+        paths.append(str(tmp_path / f'feed-{i}.jsonl'))
+        write_feed(paths[-1], rows)
+        for row in rows:
+            name, record = validate_product(row)
+            records[name] = record
+
+    expected = write_catalog(str(tmp_path / 'expected'), records, PRODUCT_SCHEMA)
+    version = import_feeds(paths, str(tmp_path / 'imported'), workers=1, chunk_rows=chunk_rows, report=lambda line: None)
+    assert version == expected
+
+    imported = ProductCatalog(str(tmp_path / 'imported'))
+    assert list(imported) == ['A', 'B', 'C', 'D', 'E com um nome bem mais longo']
+    assert imported['A']['price'] == 1100
+    assert imported['B']['specifications']['Tela'] == '6.8"'
+
+
+def test_name_hash_collision_is_an_error(tmp_path):
+    """Dois nomes diferentes com o mesmo hash não viram um produto só"""
+    path = str(tmp_path / 'feed.jsonl')
+    write_feed(path, [feed_row('A', 1000, '6.1"'), feed_row('B', 2000, '6.7"')])
+    staging = tmp_path / 'staging'
+    staging.mkdir()
+    parts = import_file(path, str(staging), 0)['parts']
+    np.save(f'{parts[0]}/name_hash.npy', np.zeros(2, dtype=np.uint64))
+    (tmp_path / 'catalog').mkdir()
+    with pytest.raises(ValueError, match='Colisão'):
+        build_catalog(str(tmp_path / 'catalog'), parts)
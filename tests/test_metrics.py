@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from metrics import format_metric, parse_metric, performance_scores, top_k
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('15,000/mês', (15000, '/mês')),
+    ('45/mês', (45, '/mês')),
+    ('R$ 2,500/mês', (2500, 'R$/mês')),
+    ('R$3,000/mês', (3000, 'R$/mês')),
+    ('2.3 min', (2.3, 'min')),
+    ('1,234,567', (1234567, None)),
+    (' 12 ', (12, None)),
+    # Valores já tipados passam direto
+    (7, (7, None)),
+    (2.5, (2.5, None)),
+])
+def test_parse_metric(text, expected):
+    value, unit = parse_metric(text)
+    assert (value, unit) == expected
+    assert type(value) is type(expected[0])
+
+
+@pytest.mark.parametrize('text', ['', 'abc', 'min 2', 'R$'])
+def test_parse_metric_rejects_unknown_format(text):
+    with pytest.raises(ValueError):
+        parse_metric(text)
+
+
+@pytest.mark.parametrize('text', ['15,000/mês', 'R$ 2,500/mês', '2.3 min'])
+def test_format_metric_round_trip(text):
+    assert format_metric(*parse_metric(text)) == text
+
+
+class Fleet:
+    """Catálogo mínimo com as colunas que o score lê"""
+
+    def __init__(self, **columns):
+        self.columns = {name: np.asarray(values, dtype=np.float64) for name, values in columns.items()}
+
+    def column(self, name):
+        return self.columns[name]
+
+    def metric(self, name, indices=None):
+        return self.columns[name]
+
+
+def fleet(tempo_p95=(np.nan, np.nan, np.nan)):
+    return Fleet(
+        atendimentos=[15000, 8000, 15000],
+        cost=[2500, 1500, 2500],
+        erros=[20, 10, 20],
+        bugs=[5, 2, 5],
+        tempo=[2.0, 3.0, 2.0],
+        tempo_p95=tempo_p95,
+    )
+
+
+def test_performance_scores_formula():
+    scores = performance_scores(fleet())
+    expected = 15000 * 100 / (2500 + 20 * 10 + 5 * 15 + 2.0 * 100)
+    assert scores[0] == pytest.approx(expected)
+    assert scores[0] == scores[2]
+    assert not scores.flags.writeable
+
+
+@pytest.mark.parametrize('tempo_p95, expected_tempo', [
+    # Sem nenhum percentil (antes da ingestão de eventos), vale a média
+    ((np.nan, np.nan, np.nan), [2.0, 3.0, 2.0]),
+    ((4.0, np.nan, 1.0), [4.0, 3.0, 1.0]),
+])
+def test_percentile_falls_back_to_mean(tempo_p95, expected_tempo):
+    latency = performance_scores(fleet(tempo_p95), 'tempo_p95')
+    mean = performance_scores(Fleet(**{**fleet().columns, 'tempo': expected_tempo}))
+    np.testing.assert_allclose(latency, mean)
+    assert not np.isnan(latency).any()
+
+
+@pytest.mark.parametrize('scores, k, expected', [
+    ([3.0, 1.0, 2.0], 2, [0, 2]),
+    ([3.0, 1.0, 2.0], 3, [0, 2, 1]),
+    # k maior que a frota, zero ou negativo
+    ([3.0, 1.0, 2.0], 10, [0, 2, 1]),
+    ([3.0, 1.0, 2.0], 0, []),
+    ([3.0, 1.0, 2.0], -1, []),
+    ([], 5, []),
+    # Empates: a menor posição primeiro, também no corte do k
+    ([1.0, 5.0, 5.0, 5.0, 0.0], 2, [1, 2]),
+    ([5.0, 5.0, 5.0, 5.0, 5.0, 5.0, 5.0, 5.0], 3, [0, 1, 2]),
+    ([2.0, 7.0, 2.0, 7.0, 2.0], 4, [1, 3, 0, 2]),
+    # Score indefinido (0/0) fica por último
+    ([np.nan, 1.0, 2.0], 2, [2, 1]),
+    ([np.nan, 1.0, 2.0], 3, [2, 1, 0]),
+])
+def test_top_k(scores, k, expected):
+    assert top_k(np.array(scores, dtype=np.float64), k).tolist() == expected
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(3)
+    scores = rng.integers(0, 50, 5000).astype(np.float64)
+    order = np.argsort(-scores, kind='stable')
+    for k in (1, 10, 100, 4999, 5000):
+        assert top_k(scores, k).tolist() == order[:k].tolist()
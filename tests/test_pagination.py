@@ -0,0 +1,60 @@
+import pytest
+import streamlit as st
+
+from pagination import paginate
+
+
+@pytest.fixture(autouse=True)
+def session():
+    """Sem `streamlit run`, o session_state é do processo: cada teste começa vazio"""
+    for key in list(st.session_state):
+        del st.session_state[key]
+    yield st.session_state
+
+
+@pytest.mark.parametrize('total, page, expected', [
+    # Lista vazia: uma página, intervalo vazio
+    (0, 1, (0, 0, 1, 1)),
+    (0, 5, (0, 0, 1, 1)),
+    # Menos de uma página
+    (3, 1, (0, 3, 1, 1)),
+    # Páginas cheias e a última, parcial
+    (25, 1, (0, 10, 1, 3)),
+    (25, 2, (10, 20, 2, 3)),
+    (25, 3, (20, 25, 3, 3)),
+    # Última página exatamente cheia
+    (30, 3, (20, 30, 3, 3)),
+    # Página fora dos limites fica na primeira ou na última
+    (25, 9, (20, 25, 3, 3)),
+    (25, 0, (0, 10, 1, 3)),
+    (25, -2, (0, 10, 1, 3)),
+])
+def test_paginate(session, total, page, expected):
+    session['lista_filters'] = None
+    session['lista_page'] = page
+    assert paginate(total, 'lista') == expected
+    assert session['lista_page'] == expected[2]
+
+
+def test_page_size(session):
+    session['lista_filters'] = None
+    session['lista_page'] = 4
+    assert paginate(100, 'lista', page_size=25) == (75, 100, 4, 4)
+
+
+def test_first_run_starts_on_first_page(session):
+    assert paginate(25, 'lista', reset_on=('Celulares',)) == (0, 10, 1, 3)
+
+
+def test_filter_change_resets_page(session):
+    paginate(50, 'lista', reset_on=('Celulares',))
+    session['lista_page'] = 4
+    assert paginate(50, 'lista', reset_on=('Celulares',))[2] == 4
+    assert paginate(8, 'lista', reset_on=('Notebooks',)) == (0, 8, 1, 1)
+
+
+def test_shrinking_list_clamps_to_last_page(session):
+    paginate(50, 'lista')
+    session['lista_page'] = 5
+    # Um catálogo recarregado com menos itens, sem mudar os filtros
+    assert paginate(12, 'lista') == (10, 12, 2, 2)
@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+from products import parse_spec, product_record_from_source, validate_product
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('8GB', (8.0, 'GB')),
+    ('1TB', (1024.0, 'GB')),
+    ('5000 mAh', (5000.0, 'mAh')),
+    ('6.7" OLED', (6.7, 'pol')),
+    ('48MP + 12MP + 12MP', (48.0, 'MP')),
+    ('1,2 kg', (1200.0, 'g')),
+    ('187 gramas', (187.0, 'g')),
+    ('5000', (5000.0, None)),
+])
+def test_parse_spec(text, expected):
+    assert parse_spec(text) == expected
+
+
+def test_parse_spec_without_number():
+    value, unit = parse_spec('Não informado')
+    assert math.isnan(value) and unit is None
+
+
+@pytest.mark.parametrize('text', ['72 Wh', 'Até 20 horas'])
+def test_unknown_unit_is_nan(text):
+    """Uma unidade fora de SPEC_UNITS não é lida na unidade da coluna"""
+    value, unit = parse_spec(text)
+    assert math.isnan(value) and unit is None
+
+
+def test_known_unit_of_another_column_is_rejected():
+    with pytest.raises(ValueError, match='Bateria'):
+        product_record_from_source({'specifications': {'Bateria': '8GB'}})
+
+
+def test_bare_number_uses_column_unit():
+    record = product_record_from_source({'specifications': {'Bateria': '4500', 'Memória RAM': '8GB'}})
+    assert record['battery'] == 4500.0
+    assert record['ram'] == 8.0
+    assert math.isnan(record['weight'])
+
+
+def test_feed_row_with_unknown_unit_is_kept():
+    """O importador mantém o produto e deixa só a coluna da unidade desconhecida em NaN"""
+    row = {
+        'name': 'Notebook X',
+        'brand': 'Dell',
+        'category': 'Notebooks',
+        'price': '7999',
+        'year': '2024',
+        'launch_date': '2024-03-01',
+        'specifications': '{"Bateria": "72 Wh", "Peso": "187 gramas", "Memória RAM": "16GB"}',
+        'icon': '💻',
+    }
+    name, record = validate_product(row)
+    assert name == 'Notebook X'
+    assert math.isnan(record['battery'])
+    assert record['weight'] == 187.0
+    assert record['ram'] == 16.0
@@ -0,0 +1,72 @@
+import pytest
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+import profiling
+from profiling import Profiler
+
+
+class FakeContext:
+    """Só o envio de mensagens do ScriptRunContext"""
+
+    def __init__(self):
+        self.sent = []
+        self._enqueue = self.sent.append
+
+
+def markdown(body):
+    msg = ForwardMsg()
+    msg.delta.new_element.markdown.body = body
+    return msg
+
+
+@pytest.fixture
+def ctx(monkeypatch):
+    ctx = FakeContext()
+    monkeypatch.setattr(profiling, 'get_script_run_ctx', lambda: ctx)
+    return ctx
+
+
+def test_enqueue_is_wrapped_only_during_a_profiled_run(ctx, monkeypatch):
+    monkeypatch.setattr(Profiler, 'enabled', lambda self: True)
+    profiler = Profiler(log_path=None)
+    original = ctx._enqueue
+
+    run = profiler.begin('app')
+    assert ctx._enqueue is not original
+    run.section('lista')
+    ctx._enqueue(markdown('a'))
+    ctx._enqueue(markdown('b'))
+    run.end()
+    assert ctx._enqueue == original
+    assert len(ctx.sent) == 2
+
+    [record] = profiler.runs('app')
+    assert record['elements'] == 2
+    assert record['bytes'] == sum(msg.ByteSize() for msg in ctx.sent)
+
+
+def test_interrupted_run_is_unwrapped(ctx, monkeypatch):
+    """Um rerun perfilado que não chegou ao end() não deixa o envio envolvido"""
+    profiler = Profiler(log_path=None)
+    original = ctx._enqueue
+    monkeypatch.setattr(Profiler, 'enabled', lambda self: True)
+    profiler.begin('app')
+    # O próximo rerun perfilado não envolve o envolvido
+    run = profiler.begin('app')
+    assert run._counter.enqueue == original
+    # Sem ?perf=1, o envio original volta
+    monkeypatch.setattr(Profiler, 'enabled', lambda self: False)
+    assert profiler.begin('app') is profiling.NULL_RUN
+    assert ctx._enqueue == original
+
+
+def test_context_without_enqueue(ctx, monkeypatch):
+    """Em outra versão do Streamlit sem o atributo, o perfil só perde as contagens"""
+    monkeypatch.setattr(Profiler, 'enabled', lambda self: True)
+    del ctx._enqueue
+    profiler = Profiler(log_path=None)
+    run = profiler.begin('app')
+    run.section('lista')
+    run.end()
+    assert not hasattr(ctx, '_enqueue')
+    assert profiler.runs('app')[0]['elements'] == 0
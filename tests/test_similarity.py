@@ -0,0 +1,23 @@
+import sys
+
+import numpy as np
+
+from catalog import write_catalog
+from conftest import REPO_DIR
+from products import PRODUCT_SCHEMA, ProductCatalog, ProductSqliteCatalog, product_source_records
+from similarity import SimilarityIndex
+
+sys.path.insert(0, REPO_DIR + '/benchmarks')
+from synthetic import product_records  # noqa: E402
+
+
+def test_sqlite_index_matches_columnar(tmp_path):
+    """O índice montado pelas colunas do SQLite dá os mesmos vizinhos que o do catálogo colunar"""
+    records = product_source_records(product_records(300))
+    write_catalog(str(tmp_path / 'columnar'), records, PRODUCT_SCHEMA)
+    write_catalog(str(tmp_path / 'sqlite'), records, PRODUCT_SCHEMA)
+    columnar = SimilarityIndex.from_catalog(ProductCatalog(str(tmp_path / 'columnar')))
+    sqlite = SimilarityIndex.from_catalog(ProductSqliteCatalog(str(tmp_path / 'sqlite')))
+    np.testing.assert_array_equal(np.asarray(sqlite.vectors), np.asarray(columnar.vectors))
+    for index in (0, 17, 150, 299):
+        np.testing.assert_array_equal(sqlite.neighbors(index), columnar.neighbors(index))
@@ -0,0 +1,93 @@
+import json
+import math
+
+import numpy as np
+import pytest
+
+from events import EventRollups
+from sketches import RELATIVE_ACCURACY, QuantileSketch
+
+QUANTILES = [0.0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999, 1.0]
+
+
+def samples(distribution, n, seed):
+    rng = np.random.default_rng(seed)
+    if distribution == 'lognormal':
+        return rng.lognormal(1.0, 1.5, n)
+    if distribution == 'uniform':
+        return rng.uniform(0.5, 60.0, n)
+    # Durações arredondadas, com muitos empates e alguns zeros
+    return np.round(rng.exponential(3.0, n), 1)
+
+
+def sketch_of(values):
+    sketch = QuantileSketch()
+    for value in values.tolist():
+        sketch.add(value)
+    return sketch
+
+
+@pytest.mark.parametrize('distribution', ['lognormal', 'uniform', 'rounded'])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_relative_error_against_exact_quantiles(distribution, seed):
+    values = samples(distribution, 20_000, seed)
+    estimates = sketch_of(values).quantiles(QUANTILES)
+    ordered = np.sort(values)
+    for q, estimate in zip(QUANTILES, estimates):
+        # O sketch estima o valor de posição piso(q * (n - 1)) na ordem
+        exact = ordered[math.floor(q * (len(values) - 1))]
+        assert abs(estimate - exact) <= RELATIVE_ACCURACY * exact * (1 + 1e-9), (q, estimate, exact)
+
+
+def test_empty_sketch_is_nan():
+    assert all(math.isnan(value) for value in QuantileSketch().quantiles([0.5, 0.99]))
+
+
+def test_merged_daily_sketches_equal_one_sketch():
+    rng = np.random.default_rng(7)
+    days = [samples('lognormal', int(rng.integers(1, 2_000)), seed) for seed in range(30)]
+    merged = QuantileSketch()
+    for day in days:
+        merged.merge(sketch_of(day))
+    whole = sketch_of(np.concatenate(days))
+    assert merged.to_dict() == whole.to_dict()
+    assert merged.count == whole.count
+    assert merged.quantiles(QUANTILES) == whole.quantiles(QUANTILES)
+
+    # O checkpoint em JSON preserva o sketch
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(merged.to_dict())))
+    assert restored.quantiles(QUANTILES) == whole.quantiles(QUANTILES)
+
+
+def test_merge_rejects_other_accuracy():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_merged_rollups_equal_one_rollup():
+    """Processos de ingestão com dias diferentes somam o mesmo que um processo com todos"""
+    rng = np.random.default_rng(11)
+    events = [
+        {'agent': f'Agente {i % 3}', 'ts': f'2024-05-{day:02d}T10:00:00Z', 'type': 'atendimento',
+         'minutes': float(minutes)}
+        for day in range(1, 29)
+        for i, minutes in enumerate(samples('lognormal', 50, day))
+    ]
+    rng.shuffle(events)
+
+    whole = EventRollups(None)
+    parts = [EventRollups(None) for _ in range(4)]
+    for event in events:
+        whole.add(event)
+        parts[int(event['ts'][8:10]) % 4].add(event)
+    merged = EventRollups(None)
+    for part in parts:
+        merged.merge(part)
+
+    for agent in whole.rollups:
+        expected = whole.rollups[agent]['2024-05']
+        counts = merged.rollups[agent]['2024-05']
+        assert counts[:3] == expected[:3]
+        assert counts[3] == pytest.approx(expected[3])
+        assert counts[4].to_dict() == expected[4].to_dict()
+        assert merged.durations(agent, ['2024-05']).quantiles(QUANTILES) == expected[4].quantiles(QUANTILES)
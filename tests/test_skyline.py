@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from skyline import skyline
+
+
+def brute_force(columns, directions):
+    """Fronteira por comparação de todos os pares, O(n²)"""
+    points = np.column_stack([
+        -np.asarray(values, dtype=np.float64) if direction == 'higher' else np.asarray(values, dtype=np.float64)
+        for values, direction in zip(columns, directions)
+    ])
+    return [
+        i for i in range(len(points))
+        if not any(np.all(points[j] <= points[i]) and np.any(points[j] < points[i]) for j in range(len(points)))
+    ]
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('directions', [
+    ['lower', 'higher'],
+    ['lower', 'lower', 'higher'],
+    ['higher', 'lower', 'higher', 'lower'],
+])
+def test_matches_brute_force(seed, directions):
+    rng = np.random.default_rng(seed)
+    n = 300
+    # Poucos valores distintos: muitos empates parciais e pontos repetidos
+    columns = [rng.integers(0, 8, n) for _ in directions]
+    assert skyline(columns, directions).tolist() == brute_force(columns, directions)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_anticorrelated_data(seed):
+    """Colunas que brigam entre si deixam muitos pontos na fronteira"""
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(0, 1, 200)
+    quality = cost + rng.normal(0, 0.05, 200)
+    columns, directions = [cost, quality], ['lower', 'higher']
+    assert skyline(columns, directions).tolist() == brute_force(columns, directions)
+
+
+def test_identical_points_all_stay():
+    columns = [[1, 1, 1, 2], [5, 5, 5, 4]]
+    assert skyline(columns, ['lower', 'higher']).tolist() == [0, 1, 2]
+
+
+def test_empty():
+    assert skyline([[], []], ['lower', 'higher']).tolist() == []
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from catalog import write_catalog
+from facets import FacetIndex
+from metrics import AGENT_SCHEMA, AgentCatalog, AgentSqliteCatalog
+from sorting import SortOrders
+from sqlstore import SqlFacetIndex, SqlSortOrders
+
+
+def agent_records(n=200, seed=1):
+    """Agentes com muitos custos e anos repetidos, para exercitar os empates"""
+    rng = np.random.default_rng(seed)
+    return {
+        f'Agente {i:04d}': {
+            'provider': ['TechCorp', 'AIFlow', 'SmartBot'][i % 3],
+            'category': ['Atendimento', 'Suporte'][i % 2],
+            'cost': int(rng.integers(10, 20)) * 100,
+            'deployment_year': int(rng.integers(2021, 2025)),
+            'deployment_date': '2024-01-15',
+            'icon': '🤖',
+            'atendimentos': int(rng.integers(5000, 30000)),
+            'erros': int(rng.integers(10, 100)),
+            'bugs': int(rng.integers(1, 20)),
+            'tempo': float(rng.integers(10, 50)) / 10,
+            'tempo_p95': float('nan'),
+            'tempo_p99': float('nan'),
+        }
+        # Nomes fora da ordem do catálogo, para a ordenação por nome não ser a identidade
+        for i in rng.permutation(n).tolist()
+    }
+
+
+@pytest.fixture
+def catalogs(tmp_path):
+    directory = str(tmp_path / 'agents')
+    write_catalog(directory, agent_records(), AGENT_SCHEMA)
+    return AgentCatalog(directory), AgentSqliteCatalog(directory)
+
+
+@pytest.mark.parametrize('selections', [{}, {'category': 'Suporte', 'cost': (1200, 1700)}])
+@pytest.mark.parametrize('key', ['cost', 'deployment_year', 'name'])
+@pytest.mark.parametrize('descending', [False, True])
+def test_sql_sort_matches_permutation(catalogs, selections, key, descending):
+    """ORDER BY no SQLite devolve as mesmas páginas que a permutação do backend colunar"""
+    columnar, sqlite = catalogs
+    keys = {column: (lambda column=column: columnar.column(column)) for column in ('cost', 'deployment_year')}
+    index = FacetIndex.from_catalog(columnar, ['category', 'provider'], ['cost', 'deployment_year'])
+    expected = index.sorted_indices(index.mask(selections), SortOrders(columnar, keys).order(key, descending))
+
+    sql_index = SqlFacetIndex.from_catalog(sqlite, ['category', 'provider'], ['cost', 'deployment_year'])
+    order = SqlSortOrders(sqlite, {}).order(key, descending)
+    assert order == (key, descending)
+    rows = sql_index.sorted_indices(sql_index.mask(selections), order)
+    assert len(rows) == len(expected)
+    for start in range(0, len(expected), 30):
+        np.testing.assert_array_equal(rows[start:start + 30], expected[start:start + 30])
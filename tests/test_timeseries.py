@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+
+import timeseries
+from timeseries import TimeSeriesStore
+
+
+def observations(days, keys=('A', 'B')):
+    """Uma observação por chave e dia, com valor dia * 10 + posição da chave"""
+    rows = [(key, f'2024-01-{day:02d}T00:00:00', day * 10 + i) for day in days for i, key in enumerate(keys)]
+    return [list(column) for column in zip(*rows)]
+
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.startswith('seg-'))
+
+
+def test_append_and_read_window(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), flush_rows=4)
+    # Dias fora de ordem e espalhados por vários segmentos
+    for days in ([3, 1], [2, 5], [4]):
+        store.append(*observations(days))
+    store.flush()
+    assert len(segments(str(tmp_path))) == 3
+
+    ts, values = store.read('A', '2024-01-02', '2024-01-04')
+    assert ts.tolist() == np.array(['2024-01-02', '2024-01-03', '2024-01-04'], dtype='datetime64[s]').tolist()
+    assert values.tolist() == [20.0, 30.0, 40.0]
+    ts, values = store.read('B', '2024-01-01', '2024-01-31')
+    assert values.tolist() == [11.0, 21.0, 31.0, 41.0, 51.0]
+
+    # Chave ausente e janela sem observações
+    assert len(store.read('C', '2024-01-01', '2024-01-31')[0]) == 0
+    assert len(store.read('A', '2024-02-01', '2024-02-28')[0]) == 0
+
+
+def test_buffered_rows_are_not_visible_until_flush(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), flush_rows=100)
+    store.append(*observations([1]))
+    assert len(store.read('A', '2024-01-01', '2024-01-31')[0]) == 0
+    version = store.version()
+    store.flush()
+    assert store.version() != version
+    assert store.read('A', '2024-01-01', '2024-01-31')[1].tolist() == [10.0]
+
+
+def test_compaction_keeps_every_observation(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), flush_rows=2)
+    for day in range(1, 8):
+        store.append(*observations([day]))
+    before = store.read_many(['A', 'B'], '2024-01-01', '2024-01-31')
+    version = store.version()
+    store.compact()
+    assert store.version() != version
+    assert len(store._read_manifest()['segments']) == 1
+
+    after = store.read_many(['A', 'B'], '2024-01-01', '2024-01-31')
+    for key in before:
+        np.testing.assert_array_equal(after[key][0], before[key][0])
+        np.testing.assert_array_equal(after[key][1], before[key][1])
+
+    # Outro processo abre o mesmo diretório e lê o manifesto novo
+    reopened = TimeSeriesStore(str(tmp_path))
+    assert reopened.read('B', '2024-01-03', '2024-01-03')[1].tolist() == [31.0]
+
+
+def test_compacted_segments_outlive_older_manifests(tmp_path, monkeypatch):
+    """Um leitor com o manifesto anterior à compactação ainda abre os segmentos fundidos"""
+    writer = TimeSeriesStore(str(tmp_path), flush_rows=2)
+    for day in range(1, 4):
+        writer.append(*observations([day]))
+    reader = TimeSeriesStore(str(tmp_path))
+    old_manifest = reader._read_manifest()
+    writer.compact()
+
+    for entry in old_manifest['segments']:
+        window = reader._segment(entry).range('A', 0, 2 ** 40)
+        assert window.stop - window.start == 1
+    retired = [r['id'] for r in writer._read_manifest()['retired']]
+    assert sorted(retired) == [entry['id'] for entry in old_manifest['segments']]
+
+    # Passada a carência, o próximo flush apaga os segmentos substituídos
+    monkeypatch.setattr(timeseries, 'RETIRED_GRACE_SECONDS', 0)
+    writer.append(*observations([4]))
+    writer.flush()
+    assert not set(retired) & set(segments(str(tmp_path)))
+    assert writer._read_manifest()['retired'] == []
+    assert reader.read('A', '2024-01-01', '2024-01-31')[1].tolist() == [10.0, 20.0, 30.0, 40.0]
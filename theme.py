@@ -0,0 +1,37 @@
+import functools
+import hashlib
+import os
+
+import streamlit as st
+
+# Arquivos servidos pelo Streamlit em app/static/ (server.enableStaticServing)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Folha de estilo compartilhada pelos dois apps
+STYLESHEET = 'style.css'
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet(name=STYLESHEET):
+    """Conteúdo de uma folha de estilo de static/ e um hash curto dele, lidos uma vez por processo"""
+    with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as f:
+        css = f.read()
+    return css, hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]
+
+
+def stylesheet_tag(name=STYLESHEET):
+    """Tag HTML que aplica a folha de estilo
+
+    Com o servidor de arquivos estáticos ligado, é só um <link> com o hash do
+    conteúdo na URL: o navegador baixa o CSS uma vez e o guarda em cache, e
+    cada rerun envia poucas dezenas de bytes. Sem ele, o CSS vai embutido.
+    """
+    css, digest = stylesheet(name)
+    if st.get_option('server.enableStaticServing'):
+        return f'<link rel="stylesheet" href="app/static/{name}?v={digest}">'
+    return f'<style>\n{css}</style>'
+
+
+def apply_theme(name=STYLESHEET):
+    """Aplica a folha de estilo na página"""
+    st.markdown(stylesheet_tag(name), unsafe_allow_html=True)
@@ -0,0 +1,297 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from catalog import DATA_DIR
+
+# Diretórios padrão das séries de preços (produtos) e custos (agentes)
+PRICE_STORE_DIR = os.environ.get('PRICE_STORE_DIR', os.path.join(DATA_DIR, 'timeseries', 'prices'))
+COST_STORE_DIR = os.environ.get('COST_STORE_DIR', os.path.join(DATA_DIR, 'timeseries', 'costs'))
+
+# Observações acumuladas em memória antes de virar um segmento no disco
+FLUSH_ROWS = 100_000
+
+# Segmentos menores que isso são fundidos na compactação
+COMPACT_ROWS = 5_000_000
+
+# Acima desta quantidade de segmentos a compactação roda após cada flush
+MAX_SEGMENTS = 16
+
+# Segmentos substituídos numa compactação ficam no disco por este tempo, para
+# leitores de outros processos que ainda estão com o manifesto anterior
+RETIRED_GRACE_SECONDS = 60
+
+
+def to_seconds(timestamps):
+    """Converte datas (str ISO, datetime ou datetime64) em segundos desde a época"""
+    return np.asarray(timestamps, dtype='datetime64[s]').astype(np.int64)
+
+
+class Segment:
+    """Segmento imutável, ordenado por (chave, instante) e mapeado em memória
+
+    As chaves distintas ficam ordenadas em `keys`, com `offsets` apontando o
+    trecho de cada uma, então uma leitura são duas buscas binárias.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = np.load(os.path.join(path, 'keys.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(path, 'offsets.npy'), mmap_mode='r')
+        self.ts = np.load(os.path.join(path, 'ts.npy'), mmap_mode='r')
+        self.values = np.load(os.path.join(path, 'values.npy'), mmap_mode='r')
+
+    @staticmethod
+    def write(path, keys, ts, values):
+        """Ordena as observações e grava as colunas do segmento"""
+        order = np.lexsort((ts, keys))
+        keys, ts, values = keys[order], ts[order], values[order]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+        os.makedirs(path)
+        np.save(os.path.join(path, 'keys.npy'), unique_keys)
+        np.save(os.path.join(path, 'offsets.npy'), offsets)
+        np.save(os.path.join(path, 'ts.npy'), ts.astype(np.int64))
+        np.save(os.path.join(path, 'values.npy'), values.astype(np.float64))
+        return {
+            'rows': int(len(keys)),
+            'ts_min': int(ts.min()),
+            'ts_max': int(ts.max()),
+        }
+
+    def range(self, key, start, end):
+        """Fatia [início, fim) das observações de uma chave dentro da janela"""
+        pos = int(np.searchsorted(self.keys, key))
+        if pos >= len(self.keys) or self.keys[pos] != key:
+            return slice(0, 0)
+        lo, hi = int(self.offsets[pos]), int(self.offsets[pos + 1])
+        ts = self.ts[lo:hi]
+        return slice(lo + int(np.searchsorted(ts, start, 'left')),
+                     lo + int(np.searchsorted(ts, end, 'right')))
+
+    def columns(self):
+        """Todas as observações do segmento como (chaves, instantes, valores)"""
+        counts = np.diff(self.offsets)
+        return np.repeat(np.asarray(self.keys), counts), np.asarray(self.ts), np.asarray(self.values)
+
+
+class TimeSeriesStore:
+    """Armazenamento local só de acréscimo para observações (chave, instante, valor)
+
+    As observações chegam em lotes, são acumuladas em memória e gravadas como
+    segmentos colunares; o manifesto é trocado de forma atômica, então leitores
+    em outros processos sempre enxergam um conjunto consistente de segmentos.
+    Os segmentos substituídos numa compactação saem do manifesto na hora, mas
+    só são apagados depois de RETIRED_GRACE_SECONDS. Supõe um único processo
+    escritor por diretório.
+    """
+
+    def __init__(self, directory, flush_rows=FLUSH_ROWS):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered = 0
+        self._segments = {}
+        self._manifest = None
+        self._manifest_mtime = None
+        os.makedirs(directory, exist_ok=True)
+
+    # Manifesto
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, 'manifest.json')
+
+    def _read_manifest(self):
+        """Relê o manifesto só quando ele mudou no disco"""
+        try:
+            mtime = os.stat(self._manifest_path()).st_mtime_ns
+        except FileNotFoundError:
+            return {'next_id': 1, 'segments': []}
+        if mtime != self._manifest_mtime:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+            live = {s['id'] for s in self._manifest['segments']}
+            self._segments = {k: v for k, v in self._segments.items() if k in live}
+        return self._manifest
+
+    def _write_manifest(self, manifest):
+        fd, tmp_path = tempfile.mkstemp(prefix='.manifest-', dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+        self._manifest = manifest
+        self._manifest_mtime = os.stat(self._manifest_path()).st_mtime_ns
+
+    def _retire(self, manifest, replaced=()):
+        """Marca segmentos substituídos no manifesto e devolve os que já passaram da carência"""
+        now = time.time()
+        retired = manifest.get('retired', []) + [{'id': segment_id, 'at': now} for segment_id in replaced]
+        expired = {r['id'] for r in retired if now - r['at'] >= RETIRED_GRACE_SECONDS}
+        manifest['retired'] = [r for r in retired if r['id'] not in expired]
+        return expired
+
+    def _remove(self, segment_ids):
+        for segment_id in segment_ids:
+            self._segments.pop(segment_id, None)
+            shutil.rmtree(os.path.join(self.directory, segment_id), ignore_errors=True)
+
+    def _segment(self, entry):
+        segment = self._segments.get(entry['id'])
+        if segment is None:
+            segment = Segment(os.path.join(self.directory, entry['id']))
+            self._segments[entry['id']] = segment
+        return segment
+
+    # Escrita
+
+    def append(self, keys, timestamps, values):
+        """Acrescenta um lote de observações; grava um segmento quando o buffer enche"""
+        keys = np.asarray(keys, dtype=str)
+        batch = (keys, to_seconds(timestamps), np.asarray(values, dtype=np.float64))
+        if not (len(batch[0]) == len(batch[1]) == len(batch[2])):
+            raise ValueError("Chaves, instantes e valores precisam ter o mesmo tamanho")
+        with self._lock:
+            self._buffer.append(batch)
+            self._buffered += len(keys)
+            if self._buffered >= self.flush_rows:
+                self._flush_locked()
+
+    def flush(self):
+        """Grava as observações pendentes como um novo segmento"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._buffered:
+            return
+        keys = np.concatenate([b[0] for b in self._buffer])
+        ts = np.concatenate([b[1] for b in self._buffer])
+        values = np.concatenate([b[2] for b in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        manifest = dict(self._read_manifest())
+        segment_id = f"seg-{manifest['next_id']:06d}"
+        entry = Segment.write(os.path.join(self.directory, segment_id), keys, ts, values)
+        entry['id'] = segment_id
+        manifest['segments'] = manifest['segments'] + [entry]
+        manifest['next_id'] = manifest['next_id'] + 1
+        expired = self._retire(manifest)
+        self._write_manifest(manifest)
+        self._remove(expired)
+
+        if len(manifest['segments']) > MAX_SEGMENTS:
+            self._compact_locked()
+
+    def compact(self):
+        """Funde os segmentos pequenos em um só, mantendo todas as observações"""
+        with self._lock:
+            self._flush_locked()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        manifest = dict(self._read_manifest())
+        small = [s for s in manifest['segments'] if s['rows'] < COMPACT_ROWS]
+        if len(small) < 2:
+            return
+        parts = [self._segment(entry).columns() for entry in small]
+        keys = np.concatenate([p[0] for p in parts])
+        ts = np.concatenate([p[1] for p in parts])
+        values = np.concatenate([p[2] for p in parts])
+
+        segment_id = f"seg-{manifest['next_id']:06d}"
+        entry = Segment.write(os.path.join(self.directory, segment_id), keys, ts, values)
+        entry['id'] = segment_id
+        merged = {s['id'] for s in small}
+        manifest['segments'] = [s for s in manifest['segments'] if s['id'] not in merged] + [entry]
+        manifest['next_id'] = manifest['next_id'] + 1
+        expired = self._retire(manifest, sorted(merged))
+        self._write_manifest(manifest)
+
+        # Um leitor com o manifesto anterior ainda abre os segmentos fundidos
+        # durante a carência; os já mapeados continuam legíveis mesmo depois
+        for segment_id in merged:
+            self._segments.pop(segment_id, None)
+        self._remove(expired)
+
+    # Leitura
+
+    def version(self):
+        """Identificador que muda a cada segmento gravado ou compactado"""
+        with self._lock:
+            return self._read_manifest()['next_id']
+
+    def read(self, key, start, end):
+        """Observações de uma chave na janela [start, end], ordenadas por instante"""
+        start, end = int(to_seconds(start)), int(to_seconds(end))
+        with self._lock:
+            manifest = self._read_manifest()
+            ts_parts, value_parts = [], []
+            for entry in manifest['segments']:
+                if entry['ts_max'] < start or entry['ts_min'] > end:
+                    continue
+                segment = self._segment(entry)
+                window = segment.range(key, start, end)
+                if window.stop > window.start:
+                    ts_parts.append(segment.ts[window])
+                    value_parts.append(segment.values[window])
+        if not ts_parts:
+            return np.empty(0, dtype='datetime64[s]'), np.empty(0, dtype=np.float64)
+        ts = np.concatenate(ts_parts)
+        values = np.concatenate(value_parts)
+        if len(ts_parts) > 1:
+            order = np.argsort(ts, kind='stable')
+            ts, values = ts[order], values[order]
+        return ts.astype('datetime64[s]'), values
+
+    def read_many(self, keys, start, end):
+        """Leitura de várias chaves na mesma janela"""
+        return {key: self.read(key, start, end) for key in keys}
+
+
+def ingest_csv(store, path, batch_rows=FLUSH_ROWS):
+    """Ingere um CSV com colunas key,timestamp,value em lotes de tamanho fixo"""
+    total = 0
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        keys, timestamps, values = [], [], []
+        for row in reader:
+            keys.append(row['key'])
+            timestamps.append(row['timestamp'])
+            values.append(float(row['value']))
+            if len(keys) >= batch_rows:
+                store.append(keys, timestamps, values)
+                total += len(keys)
+                keys, timestamps, values = [], [], []
+        if keys:
+            store.append(keys, timestamps, values)
+            total += len(keys)
+    store.flush()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingere observações reais de preço/custo no armazenamento local")
+    parser.add_argument('kind', choices=['prices', 'costs'], help="Série de destino")
+    parser.add_argument('files', nargs='+', help="CSVs com colunas key,timestamp,value")
+    parser.add_argument('--compact', action='store_true', help="Compacta os segmentos ao final")
+    args = parser.parse_args()
+
+    store = TimeSeriesStore(PRICE_STORE_DIR if args.kind == 'prices' else COST_STORE_DIR)
+    for path in args.files:
+        rows = ingest_csv(store, path)
+        print(f"{path}: {rows:,} observações")
+    if args.compact:
+        store.compact()
+
+
+if __name__ == "__main__":
+    main()